@@ -3,15 +3,49 @@
 # requires-python = ">=3.12"
 # dependencies = []
 # ///
-"""Aggregate the daily CSV corpus in ./data into a single JSON for the static web app."""
+"""Aggregate the daily CSV corpus in ./data into a single JSON for the static web app.
+
+Besides the per-date route lists, the output has each route's availability as
+runs of consecutive collection days (see routeruns.py), indexed like `routes`,
+a round-trip table: for every return window of k collection days (see
+--round-trip-days), the number of days each route A -> B was available with
+B -> A available on one of the next k days, out of `outbound_days`, and
+ranking tables: for the last N collection days (see --ranking-windows), the
+days each route was available and the route ids of the top routes overall,
+per origin (`top_from`) and per destination (`top_to`), indexed like
+`airports`.
+
+With --index-out, also write the route index (a versioned binary route x day
+matrix, see routeindex.py) that `main.py query` and the dashboard's mmap
+backend open without parsing the CSVs.
+
+The last collection days are checked for outlying route and airport counts
+(see anomalies.py); with --fail-on-anomaly, outlying global route or airport
+counts exit with status 3.
+"""
 
 import argparse
 import csv
+import heapq
 import json
 import sys
 from datetime import datetime
 from pathlib import Path
 
+from anomalies import (
+    ANOMALY_EXIT_CODE,
+    DEFAULT_THRESHOLD,
+    DEFAULT_WINDOW,
+    Anomaly,
+    AnomalyDetector,
+    DayCounts,
+    fails_run,
+    format_report,
+    record_anomaly_metrics,
+)
+from metrics import TextfileMetrics, lag_seconds
+from routeindex import RouteIndex, data_version
+from routeruns import RunBuilder
 
 REQUIRED_COLUMNS = ("departure_from", "departure_to")
 
@@ -53,7 +87,9 @@ def read_csv_routes(path: Path) -> set[tuple[str, str]] | None:
         return routes
 
 
-def build_aggregated_data(data_dir: Path) -> dict:
+def build_aggregated_data(
+    data_dir: Path, metrics: TextfileMetrics | None = None
+) -> dict:
     csv_files = sorted(data_dir.glob("*.csv"))
     if not csv_files:
         raise SystemExit(f"no csv files in {data_dir}")
@@ -81,6 +117,13 @@ def build_aggregated_data(data_dir: Path) -> dict:
         print(f"skipped {len(skipped)} files:", file=sys.stderr)
         for line in skipped:
             print(f"  {line}", file=sys.stderr)
+    if metrics is not None:
+        metrics.gauge(
+            "skipped_files",
+            len(skipped),
+            "CSV files skipped during aggregation.",
+            stage="aggregate",
+        )
 
     if not per_date_routes:
         raise SystemExit("no usable data")
@@ -105,6 +148,10 @@ def build_aggregated_data(data_dir: Path) -> dict:
         for date in sorted(per_date_routes)
     }
 
+    runs = RunBuilder(len(sorted_routes))
+    for day, date in enumerate(availability):
+        runs.add_day(day, availability[date])
+
     latest_ts = next(
         (
             ts
@@ -119,9 +166,104 @@ def build_aggregated_data(data_dir: Path) -> dict:
         "airports": airports,
         "routes": routes_encoded,
         "availability": availability,
+        "runs": [runs.flat(r) for r in range(len(sorted_routes))],
     }
 
 
+def round_trip_table(index: RouteIndex, return_days: list[int]) -> list[dict]:
+    return [
+        {
+            "return_days": k,
+            "outbound_days": max(0, len(index.dates) - k),
+            "counts": index.round_trip_counts(k),
+        }
+        for k in return_days
+    ]
+
+
+def top_routes(routes, days: list[int], k: int) -> list[int]:
+    """The `k` routes of `routes` available on the most days (ties go to the
+    lower route id), leaving out routes never available"""
+    available = (r for r in routes if days[r])
+    return heapq.nlargest(k, available, key=lambda r: (days[r], -r))
+
+
+def ranking_table(index: RouteIndex, windows: list[int], k: int) -> list[dict]:
+    tables = []
+    for n in windows:
+        since = index.dates[-n] if 0 < n < len(index.dates) else None
+        window = index.day_range_mask(since, None)
+        days = [index.days_available(r, window) for r in range(len(index.routes))]
+        tables.append(
+            {
+                "window_days": n,
+                "collection_days": window.bit_count(),
+                "days": days,
+                "top": top_routes(range(len(index.routes)), days, k),
+                "top_from": [top_routes(rs, days, k) for rs in index.outbound],
+                "top_to": [top_routes(rs, days, k) for rs in index.inbound],
+            }
+        )
+    return tables
+
+
+def check_anomalies(
+    data: dict, check_days: int, window: int, threshold: float
+) -> list[Anomaly]:
+    """Outliers of the last `check_days` collection days, each against the
+    `window` days before it; earlier days are not summarized at all"""
+    airports = data["airports"]
+    routes = [(airports[o], airports[d]) for o, d in data["routes"]]
+    dates = list(data["availability"])
+    first_checked = max(len(dates) - check_days, 0)
+    detector = AnomalyDetector(window, threshold)
+    anomalies: list[Anomaly] = []
+    for i in range(max(first_checked - window, 0), len(dates)):
+        day = DayCounts.from_routes(
+            dates[i], (routes[r] for r in data["availability"][dates[i]])
+        )
+        found = detector.check(day)
+        if i >= first_checked:
+            anomalies.extend(found)
+    return anomalies
+
+
+def record_metrics(metrics: TextfileMetrics, data: dict, size_bytes: int) -> None:
+    metrics.gauge(
+        "routes",
+        len(data["routes"]),
+        "Distinct routes in the corpus.",
+        stage="aggregate",
+    )
+    metrics.gauge(
+        "airports",
+        len(data["airports"]),
+        "Distinct airports in the corpus.",
+        stage="aggregate",
+    )
+    metrics.gauge(
+        "days",
+        len(data["availability"]),
+        "Collection days in the corpus.",
+        stage="aggregate",
+    )
+    metrics.gauge(
+        "output_size_bytes",
+        size_bytes,
+        "Size of the written output file.",
+        stage="aggregate",
+    )
+    if data["generated_at"]:
+        # Filenames carry the PDF's naive local (CET/CEST) time
+        generated = datetime.fromisoformat(data["generated_at"])
+        metrics.gauge(
+            "data_generated_lag_seconds",
+            lag_seconds(generated),
+            "Seconds between the newest snapshot's data_generated time and now.",
+            stage="aggregate",
+        )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
@@ -136,21 +278,103 @@ def main() -> None:
         default=Path("aggregated-data.json"),
         help="output JSON path (default: ./aggregated-data.json)",
     )
+    parser.add_argument(
+        "--index-out",
+        type=Path,
+        default=None,
+        help="also write the binary route index to this path (e.g. route-index.bin)",
+    )
+    parser.add_argument(
+        "--round-trip-days",
+        type=int,
+        nargs="*",
+        default=[3, 7],
+        metavar="K",
+        help="return windows of the round-trip table, in days (default: 3 7)",
+    )
+    parser.add_argument(
+        "--ranking-windows",
+        type=int,
+        nargs="*",
+        default=[30, 90],
+        metavar="N",
+        help="rank routes over the last N collection days (default: 30 90)",
+    )
+    parser.add_argument(
+        "--ranking-size",
+        type=int,
+        default=10,
+        help="routes per ranking table (default: 10)",
+    )
+    parser.add_argument(
+        "--anomaly-days",
+        type=int,
+        default=1,
+        help="check the last N collection days for outliers (default: 1)",
+    )
+    parser.add_argument(
+        "--anomaly-window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help=f"collection days of the outlier baseline (default: {DEFAULT_WINDOW})",
+    )
+    parser.add_argument(
+        "--anomaly-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"robust z-score of an outlier (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--fail-on-anomaly",
+        action="store_true",
+        help=f"exit with status {ANOMALY_EXIT_CODE} when the route or airport"
+        " counts are outliers",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=None,
+        help="write node-exporter textfile metrics to this path (e.g. aggregate.prom)",
+    )
     args = parser.parse_args()
 
-    data = build_aggregated_data(args.data_dir)
+    metrics = TextfileMetrics()
+    with metrics.stage("aggregate"):
+        data = build_aggregated_data(args.data_dir, metrics)
+        index = RouteIndex.from_aggregated(data, data_version(args.data_dir))
+        data["round_trips"] = round_trip_table(index, args.round_trip_days)
+        data["rankings"] = ranking_table(index, args.ranking_windows, args.ranking_size)
+
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with args.out.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+        if args.index_out is not None:
+            index_size = index.write(args.index_out)
+
+    with metrics.stage("anomalies"):
+        anomalies = check_anomalies(
+            data, args.anomaly_days, args.anomaly_window, args.anomaly_threshold
+        )
 
-    args.out.parent.mkdir(parents=True, exist_ok=True)
-    with args.out.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    size_bytes = args.out.stat().st_size
+    if args.metrics_file is not None:
+        record_metrics(metrics, data, size_bytes)
+        record_anomaly_metrics(metrics, anomalies)
+        metrics.write(args.metrics_file)
 
-    size_kb = args.out.stat().st_size / 1024
+    size_kb = size_bytes / 1024
     print(
         f"wrote {args.out} ({size_kb:.1f} KB): "
         f"{len(data['availability'])} days, "
         f"{len(data['airports'])} airports, "
         f"{len(data['routes'])} routes"
     )
+    if args.index_out is not None:
+        print(f"wrote {args.index_out} ({index_size / 1024:.1f} KB)")
+    print(format_report(anomalies), file=sys.stderr if anomalies else sys.stdout)
+    if fails_run(anomalies) and args.fail_on_anomaly:
+        sys.exit(ANOMALY_EXIT_CODE)
 
 
 if __name__ == "__main__":
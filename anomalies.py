@@ -0,0 +1,211 @@
+"""Outlier checks of a new snapshot against the preceding collection days.
+
+Each collection day is summarized as its number of routes, its number of
+airports and, per airport, the number of routes departing from or arriving at
+it. A day is compared with the same counts over the previous `window`
+collection days, using robust statistics: the median as the baseline and the
+median absolute deviation (MAD) as the spread. A count is an outlier when its
+modified z-score 0.6745 * (x - median) / MAD exceeds `threshold` in absolute
+value. Counts are often identical for days on end, so the MAD is floored at
+`min_mad` and at `min_mad_ratio` of the median, to keep a change of a few
+routes or airports from being reported as infinitely unusual.
+
+Per-airport route counts swing widely from day to day, so they are only
+checked for airports with a stable history (present on every day of the
+window, with a median of at least `min_airport_routes`), and only reported
+when they also move by `min_airport_change` of the median. They are
+informational: only the global route and airport counts fail a run (see
+`is_global`).
+
+The detector keeps only the last `window` days, so checking a new day costs
+the same however long the corpus is.
+"""
+
+import statistics
+from collections import Counter, deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from metrics import TextfileMetrics
+
+DEFAULT_WINDOW = 28
+DEFAULT_THRESHOLD = 3.5
+DEFAULT_MIN_HISTORY = 7
+DEFAULT_MIN_MAD = 1.0
+DEFAULT_MIN_MAD_RATIO = 0.02
+DEFAULT_MIN_AIRPORT_ROUTES = 10
+DEFAULT_MIN_AIRPORT_CHANGE = 0.75
+# Exit status of the commands run with --fail-on-anomaly when outliers are found
+ANOMALY_EXIT_CODE = 3
+# Scales the MAD to the standard deviation of normally distributed counts
+MAD_SCALE = 0.6745
+
+
+@dataclass(frozen=True)
+class DayCounts:
+    date: str
+    routes: int
+    airports: int
+    per_airport: dict[str, int]
+
+    @classmethod
+    def from_routes(cls, date: str, routes: Iterable[tuple[str, str]]) -> "DayCounts":
+        routes = set(routes)
+        per_airport = Counter(o for o, _ in routes) + Counter(d for _, d in routes)
+        return cls(date, len(routes), len(per_airport), dict(per_airport))
+
+
+@dataclass(frozen=True)
+class Anomaly:
+    date: str
+    metric: str
+    airport: str | None
+    value: int
+    median: float
+    mad: float
+    score: float
+
+    @property
+    def is_global(self) -> bool:
+        """Whether this is a corpus-wide count rather than one airport's"""
+        return self.airport is None
+
+    def __str__(self) -> str:
+        name = f"{self.metric}[{self.airport}]" if self.airport else self.metric
+        return (
+            f"{self.date} {name}: {self.value} "
+            f"(median {self.median:g}, MAD {self.mad:g}, score {self.score:+.1f})"
+        )
+
+
+class AnomalyDetector:
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        threshold: float = DEFAULT_THRESHOLD,
+        min_history: int = DEFAULT_MIN_HISTORY,
+        min_mad: float = DEFAULT_MIN_MAD,
+        min_mad_ratio: float = DEFAULT_MIN_MAD_RATIO,
+        min_airport_routes: float = DEFAULT_MIN_AIRPORT_ROUTES,
+        min_airport_change: float = DEFAULT_MIN_AIRPORT_CHANGE,
+    ):
+        self.history: deque[DayCounts] = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_history = min_history
+        self.min_mad = min_mad
+        self.min_mad_ratio = min_mad_ratio
+        self.min_airport_routes = min_airport_routes
+        self.min_airport_change = min_airport_change
+
+    def _outlier(
+        self,
+        date: str,
+        metric: str,
+        airport: str | None,
+        value: int,
+        baseline,
+        min_change: float = 0.0,
+    ) -> Anomaly | None:
+        median = statistics.median(baseline)
+        mad = statistics.median(abs(x - median) for x in baseline)
+        spread = max(mad, self.min_mad, self.min_mad_ratio * abs(median))
+        score = MAD_SCALE * (value - median) / spread
+        if abs(score) <= self.threshold or abs(value - median) < min_change:
+            return None
+        return Anomaly(date, metric, airport, value, median, mad, score)
+
+    def check(self, day: DayCounts) -> list[Anomaly]:
+        """Outliers of `day` against the preceding days, then add it to them;
+        days must be checked in increasing order. Nothing is reported until
+        `min_history` days have been seen."""
+        found: list[Anomaly | None] = []
+        history = self.history
+        if len(history) >= self.min_history:
+            found.append(
+                self._outlier(
+                    day.date, "routes", None, day.routes, [h.routes for h in history]
+                )
+            )
+            found.append(
+                self._outlier(
+                    day.date,
+                    "airports",
+                    None,
+                    day.airports,
+                    [h.airports for h in history],
+                )
+            )
+            # Only airports present on every day of the window; one missing
+            # on the checked day counts as having no routes
+            names = set.intersection(*(set(h.per_airport) for h in history))
+            for name in sorted(names):
+                baseline = [h.per_airport[name] for h in history]
+                median = statistics.median(baseline)
+                if median < self.min_airport_routes:
+                    continue
+                found.append(
+                    self._outlier(
+                        day.date,
+                        "airport_routes",
+                        name,
+                        day.per_airport.get(name, 0),
+                        baseline,
+                        self.min_airport_change * median,
+                    )
+                )
+        history.append(day)
+        return [a for a in found if a is not None]
+
+
+def check_latest(
+    data_dir: Path,
+    window: int = DEFAULT_WINDOW,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Anomaly]:
+    """Outliers of the newest collection day in `data_dir` against the
+    `window` days before it; only those days' CSVs are read"""
+    # aggregate.py imports this module
+    from aggregate import parse_collection_date, read_csv_routes
+
+    per_date_files: dict[str, list[Path]] = {}
+    for path in sorted(Path(data_dir).glob("*.csv")):
+        date = parse_collection_date(path.name)
+        if date is not None:
+            per_date_files.setdefault(date, []).append(path)
+
+    detector = AnomalyDetector(window, threshold)
+    anomalies: list[Anomaly] = []
+    for date in sorted(per_date_files)[-(window + 1) :]:
+        routes: set[tuple[str, str]] = set()
+        for path in per_date_files[date]:
+            routes.update(read_csv_routes(path) or ())
+        anomalies = detector.check(DayCounts.from_routes(date, routes))
+    return anomalies
+
+
+def fails_run(anomalies: list[Anomaly]) -> bool:
+    """Whether the anomalies should fail a run with --fail-on-anomaly: only
+    the global route and airport counts do"""
+    return any(anomaly.is_global for anomaly in anomalies)
+
+
+def record_anomaly_metrics(metrics: TextfileMetrics, anomalies: list[Anomaly]) -> None:
+    """Gauge of the anomalies found, split into global and per-airport ones"""
+    n_global = sum(anomaly.is_global for anomaly in anomalies)
+    for scope, count in (("global", n_global), ("airport", len(anomalies) - n_global)):
+        metrics.gauge(
+            "anomalies",
+            count,
+            "Outlying counts in the last checked collection days.",
+            stage="anomalies",
+            scope=scope,
+        )
+
+
+def format_report(anomalies: list[Anomaly]) -> str:
+    if not anomalies:
+        return "no anomalies"
+    lines = [f"{len(anomalies)} anomalies:"]
+    lines.extend(f"  {anomaly}" for anomaly in anomalies)
+    return "\n".join(lines)
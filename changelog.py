@@ -0,0 +1,130 @@
+"""Day-over-day log of routes appearing in and disappearing from the snapshots.
+
+Each event is (date, departure_from, departure_to, change), where change is
+"added" or "removed" relative to the previous collection day. The log is a CSV
+file that is only ever appended to; the first snapshot shows up as every route
+being added. Replaying the events up to a date reconstructs that day's route
+set, and since events are sorted by date, any date range is a contiguous slice
+found by binary search.
+"""
+
+import bisect
+import csv
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+from aggregate import parse_collection_date, read_csv_routes
+
+DEFAULT_CHANGES_PATH = Path("route-changes.csv")
+FIELDS = ("date", "departure_from", "departure_to", "change")
+ADDED = "added"
+REMOVED = "removed"
+
+
+@dataclass(frozen=True)
+class RouteChange:
+    date: str
+    departure_from: str
+    departure_to: str
+    change: str
+
+    @property
+    def route(self) -> tuple[str, str]:
+        return (self.departure_from, self.departure_to)
+
+
+class RouteChangeLog:
+    def __init__(self, path: Path = DEFAULT_CHANGES_PATH):
+        self.path = Path(path)
+        self.events: list[RouteChange] = []
+        if self.path.exists():
+            with self.path.open(newline="", encoding="utf-8") as f:
+                self.events = [RouteChange(**row) for row in csv.DictReader(f)]
+        # Parallel list of event dates, for binary searches
+        self._dates = [event.date for event in self.events]
+
+    @property
+    def last_date(self) -> str | None:
+        return self._dates[-1] if self._dates else None
+
+    def update(self, data_dir: Path) -> list[RouteChange]:
+        """Diff every snapshot newer than the last logged change against the
+        day before it and append the changes.
+
+        Snapshots of days after the last change that were already diffed
+        changed nothing, so diffing them again adds no events.
+        """
+        per_date_files: dict[str, list[Path]] = defaultdict(list)
+        for path in sorted(Path(data_dir).glob("*.csv")):
+            date = parse_collection_date(path.name)
+            if date is not None and (self.last_date is None or date > self.last_date):
+                per_date_files[date].append(path)
+
+        current = self.replay()
+        new_events: list[RouteChange] = []
+        for date in sorted(per_date_files):
+            routes: set[tuple[str, str]] = set()
+            for path in per_date_files[date]:
+                routes.update(read_csv_routes(path) or ())
+            if not routes:
+                # An empty or unreadable snapshot says nothing about the routes
+                continue
+            new_events.extend(
+                RouteChange(date, o, d, ADDED) for o, d in sorted(routes - current)
+            )
+            new_events.extend(
+                RouteChange(date, o, d, REMOVED) for o, d in sorted(current - routes)
+            )
+            current = routes
+
+        if new_events:
+            self._append(new_events)
+        return new_events
+
+    def _append(self, events: list[RouteChange]) -> None:
+        write_header = not self.path.exists() or self.path.stat().st_size == 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(FIELDS)
+            for event in events:
+                writer.writerow(
+                    (event.date, event.departure_from, event.departure_to, event.change)
+                )
+        self.events.extend(events)
+        self._dates.extend(event.date for event in events)
+
+    def _slice(self, since: str | None, until: str | None) -> list[RouteChange]:
+        lo = bisect.bisect_left(self._dates, since) if since else 0
+        hi = bisect.bisect_right(self._dates, until) if until else len(self._dates)
+        return self.events[lo:hi]
+
+    def replay(self, until: str | None = None) -> set[tuple[str, str]]:
+        """Routes available on the last collection day on or before `until`
+        (ISO date; the latest day if omitted)"""
+        routes: set[tuple[str, str]] = set()
+        for event in self._slice(None, until):
+            if event.change == ADDED:
+                routes.add(event.route)
+            else:
+                routes.discard(event.route)
+        return routes
+
+    def changes(
+        self, since: str | None = None, until: str | None = None
+    ) -> list[RouteChange]:
+        """Changes logged between `since` and `until` (inclusive ISO dates)"""
+        return self._slice(since, until)
+
+    def churn(
+        self, since: str | None = None, until: str | None = None
+    ) -> dict[str, Counter]:
+        """Per airport, the number of its routes (in either direction) added
+        and removed between `since` and `until`"""
+        result: dict[str, Counter] = defaultdict(Counter)
+        for event in self._slice(since, until):
+            result[event.departure_from][event.change] += 1
+            result[event.departure_to][event.change] += 1
+        return dict(result)
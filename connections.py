@@ -0,0 +1,117 @@
+"""One- and two-stop connections between airports, from a RouteIndex.
+
+For a window of collection days, the route network is a set of adjacency
+bitsets: bit d of outbound[o] is set when o -> d was available on some day of
+the window, and inbound[d] is its transpose. The hubs of one-stop trips from A
+to B are outbound[A] & inbound[B]; two-stop trips extend every first hop X with
+outbound[X] & inbound[B]. An itinerary is feasible on a day when all of its
+legs were available that same day (each snapshot covers bookings in the next
+72 hours), which is the AND of the legs' day masks.
+
+Itineraries are ranked by reliability: the product of each leg's share of all
+collection days on which it was available.
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import pairwise
+
+from routeindex import RouteIndex
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of `mask`, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass(frozen=True)
+class Connection:
+    airports: tuple[str, ...]
+    days: int
+    reliability: float
+
+    @property
+    def stops(self) -> int:
+        return len(self.airports) - 2
+
+
+class ConnectionFinder:
+    def __init__(self, index: RouteIndex):
+        self.index = index
+        # Read once: a mapped index would otherwise decode them on every query
+        self.masks = list(index.masks)
+        n_days = len(index.dates)
+        # Historical availability of every route over all collection days
+        self.route_ratio = [
+            mask.bit_count() / n_days if n_days else 0.0 for mask in self.masks
+        ]
+
+    def _adjacency(self, window: int) -> tuple[list[int], list[int], dict]:
+        """Outbound and inbound airport bitsets of the routes available on some
+        day of `window`, and those routes' masks restricted to it"""
+        n_airports = len(self.index.airports)
+        outbound = [0] * n_airports
+        inbound = [0] * n_airports
+        masks: dict[tuple[int, int], int] = {}
+        for r, (o, d) in enumerate(self.index.routes):
+            mask = self.masks[r] & window
+            if mask:
+                outbound[o] |= 1 << d
+                inbound[d] |= 1 << o
+                masks[(o, d)] = mask
+        return outbound, inbound, masks
+
+    def find(
+        self,
+        origin: str,
+        destination: str,
+        since: str | None = None,
+        until: str | None = None,
+        max_stops: int = 1,
+        limit: int | None = None,
+    ) -> list[Connection]:
+        """Itineraries from `origin` to `destination` with at most `max_stops`
+        changes that were feasible on at least one collection day between
+        `since` and `until` (inclusive ISO dates), most reliable first; raises
+        ValueError if `origin` is `destination` or `limit` is negative"""
+        if origin == destination:
+            raise ValueError("origin and destination must differ")
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        index = self.index
+        a, b = index.airport_idx[origin], index.airport_idx[destination]
+        outbound, inbound, masks = self._adjacency(index.day_range_mask(since, until))
+
+        paths: list[tuple[int, ...]] = []
+        if (a, b) in masks:
+            paths.append((a, b))
+        if max_stops >= 1:
+            paths.extend((a, x, b) for x in _bits(outbound[a] & inbound[b]))
+        if max_stops >= 2:
+            for x in _bits(outbound[a] & ~(1 << b)):
+                second = outbound[x] & inbound[b] & ~(1 << a)
+                paths.extend((a, x, y, b) for y in _bits(second))
+
+        results = []
+        for path in paths:
+            legs = list(pairwise(path))
+            days = masks[legs[0]]
+            for leg in legs[1:]:
+                days &= masks[leg]
+            if not days:
+                continue
+            reliability = 1.0
+            for leg in legs:
+                reliability *= self.route_ratio[index.route_idx[leg]]
+            results.append(
+                Connection(
+                    tuple(index.airports[i] for i in path),
+                    days.bit_count(),
+                    reliability,
+                )
+            )
+        results.sort(key=lambda c: (-c.reliability, -c.days, c.stops))
+        return results[:limit] if limit is not None else results
@@ -0,0 +1,114 @@
+"""Airport coordinates and a grid index for nearby-airport queries.
+
+The coordinates live in airport-coordinates.json (name -> [lat, lon]), which
+the static site's map reads too. `NearbyAirports` buckets airports into
+cells of `cell_deg` degrees; a radius query only computes great-circle
+distances for the airports in the cells overlapping the radius' bounding box,
+all at once with numpy.
+"""
+
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+COORDINATES_PATH = Path(__file__).with_name("airport-coordinates.json")
+EARTH_RADIUS_KM = 6371.0
+# Length of one degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def load_coordinates(
+    path: Union[str, Path] = COORDINATES_PATH,
+) -> Dict[str, Tuple[float, float]]:
+    """Airport name -> (latitude, longitude)"""
+    with open(path, encoding="utf-8") as f:
+        return {name: (lat, lon) for name, (lat, lon) in json.load(f).items()}
+
+
+def haversine_km(
+    lat: float, lon: float, lats: np.ndarray, lons: np.ndarray
+) -> np.ndarray:
+    """Great-circle distances from (lat, lon) to every (lats, lons), in km"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NearbyAirports:
+    def __init__(
+        self, coordinates: Dict[str, Tuple[float, float]], cell_deg: float = 2.0
+    ) -> None:
+        self.coordinates = coordinates
+        self.names = list(coordinates)
+        points = np.array(list(coordinates.values()), dtype=float).reshape(-1, 2)
+        self.lats, self.lons = points[:, 0], points[:, 1]
+        self.cell_deg = cell_deg
+        self._n_lon_cells = math.ceil(360 / cell_deg)
+        cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, (lat, lon) in enumerate(points):
+            cells[self._cell(lat, lon)].append(i)
+        self._cells = {cell: np.array(ids) for cell, ids in cells.items()}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path] = COORDINATES_PATH) -> "NearbyAirports":
+        return cls(load_coordinates(path))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_deg),
+            math.floor((lon % 360) / self.cell_deg) % self._n_lon_cells,
+        )
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Airports in the cells overlapping the bounding box of the radius"""
+        lat_span = radius_km / KM_PER_DEGREE
+        lat_lo = max(lat - lat_span, -90.0)
+        lat_hi = min(lat + lat_span, 90.0)
+        # Longitude degrees shrink towards the poles; near them, take every cell
+        widest = max(abs(lat_lo), abs(lat_hi))
+        if widest >= 89.0:
+            lon_cells = range(self._n_lon_cells)
+        else:
+            lon_span = lat_span / math.cos(math.radians(widest))
+            first = math.floor((lon - lon_span) / self.cell_deg)
+            last = math.floor((lon + lon_span) / self.cell_deg)
+            lon_cells = {
+                c % self._n_lon_cells
+                for c in range(first, min(last, first + self._n_lon_cells - 1) + 1)
+            }
+        found = [
+            self._cells[(lat_cell, lon_cell)]
+            for lat_cell in range(
+                math.floor(lat_lo / self.cell_deg),
+                math.floor(lat_hi / self.cell_deg) + 1,
+            )
+            for lon_cell in lon_cells
+            if (lat_cell, lon_cell) in self._cells
+        ]
+        return np.concatenate(found) if found else np.array([], dtype=int)
+
+    def within(
+        self, name: str, radius_km: float, include_self: bool = True
+    ) -> List[Tuple[str, float]]:
+        """(airport, distance in km) of the airports within `radius_km` of
+        `name`, nearest first; empty if `name` has no coordinates"""
+        center: Optional[Tuple[float, float]] = self.coordinates.get(name)
+        if center is None:
+            return []
+        ids = self._candidates(center[0], center[1], radius_km)
+        distances = haversine_km(center[0], center[1], self.lats[ids], self.lons[ids])
+        order = np.argsort(distances, kind="stable")
+        return [
+            (self.names[ids[i]], float(distances[i]))
+            for i in order
+            if distances[i] <= radius_km
+            and (include_self or self.names[ids[i]] != name)
+        ]
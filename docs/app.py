@@ -1,9 +1,47 @@
+import abc
+import functools
+import hashlib
+import heapq
+import inspect
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from pathlib import Path
-from typing import Optional, Tuple, List, Union
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Hashable,
+    Optional,
+    Sequence,
+    Tuple,
+    List,
+    Union,
+)
+
+from airports import NearbyAirports, load_coordinates
+from chunkedcsv import (
+    DEFAULT_CHUNK_ROWS,
+    RouteDayCounts,
+    read_records,
+    reduce_route_days,
+)
+from perf import PerfRecorder, current_perf, set_current_perf, timed
+from routematrix import RouteMatrix, popcount_rows, read_matrix_header
+from sqlstore import FlightStore
+from travelwindows import TravelWindows
 
 # Configuration constants
 APP_CONFIG = {
@@ -51,206 +89,328 @@ WEEKDAY_ORDER = [
     "Sunday",
 ]
 
+MONTH_NAMES = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+# Daily series longer than this are downsampled (LTTB) before plotting
+DAILY_CHART_MAX_POINTS = 730
+
+# Route timeline heatmaps
+WEEKDAY_ABBREVIATIONS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday=0)
+# Hover state by cell value: no data (NaN), no flight (0), flight available (1)
+TIMELINE_STATES = ["No data collected", "No flight", "✈️ Flight available"]
+TIMELINE_COLORSCALE = [[0.0, "#e8e8e8"], [1.0, "#1f77b4"]]
+MULTI_TIMELINE_BASE_HEIGHT = 120
+MULTI_TIMELINE_ROW_HEIGHT = 18
+
 # Data path search order
 DATA_PATHS = [Path("../data"), Path("data"), Path("./data")]
 
-# Airport coordinates dictionary - corrected coordinates for actual airports
-AIRPORT_COORDINATES = {
-    "Aalesund": (62.5625, 6.1194),
-    "Aberdeen": (57.2019, -2.1977),
-    "Abu Dhabi": (24.4330, 54.6511),
-    "Agadir": (30.3281, -9.4131),
-    "Alexandria": (31.1884, 29.9489),
-    "Alghero": (40.6322, 8.2908),
-    "Alicante": (38.2822, -0.5581),
-    "Almaty": (43.3517, 77.0400),
-    "Amman": (31.7225, 35.9928),
-    "Ancona": (43.6161, 13.3619),
-    "Antalya": (36.8986, 30.8008),
-    "Asyut": (27.0467, 31.0119),
-    "Athens": (37.9364, 23.9475),
-    "Bacau": (46.5211, 26.9103),
-    "Baku": (40.4675, 50.0467),
-    "Banja Luka": (44.9411, 17.2975),
-    "Barcelona": (41.2974, 2.0833),
-    "Bari": (41.1389, 16.7606),
-    "Basel/Mulhouse": (47.5897, 7.5294),
-    "Beirut": (33.8206, 35.4883),
-    "Belgrade": (44.8184, 20.3092),
-    "Bergen": (60.2934, 5.2181),
-    "Berlin": (52.3512, 13.4936),
-    "Bilbao": (43.3011, -2.9106),
-    "Billund": (55.7403, 9.1522),
-    "Birmingham": (52.4539, -1.7481),
-    "Bishkek": (43.0611, 74.4761),
-    "Bologna": (44.5353, 11.2889),
-    "Brasov": (45.5950, 25.5156),
-    "Bratislava": (48.1703, 17.2128),
-    "Brussels": (50.9014, 4.4844),
-    "Bucharest": (44.5711, 26.0850),
-    "Budapest": (47.4381, 19.2556),
-    "Burgas": (42.5697, 27.5153),
-    "Castellon": (40.2097, 0.0703),
-    "Catania": (37.4669, 15.0664),
-    "Chania": (35.5317, 24.1497),
-    "Chisinau": (46.9275, 28.9308),
-    "Cluj": (46.7853, 23.6864),
-    "Comiso": (36.9947, 14.6072),
-    "Constanta": (44.3442, 28.4883),
-    "Copenhagen": (55.6181, 12.6508),
-    "Craiova": (44.3181, 23.8886),
-    "Dalaman": (36.7133, 28.7925),
-    "Dammam": (26.4711, 49.7978),
-    "Debrecen": (47.4889, 21.6153),
-    "Dortmund": (51.5178, 7.6122),
-    "Dubai": (25.2522, 55.3644),
-    "Dubrovnik": (42.5614, 18.2681),
-    "Eindhoven": (51.4500, 5.3747),
-    "Faro": (37.0144, -7.9658),
-    "Frankfurt": (50.0379, 8.5622),
-    "Friedrichshafen": (47.6719, 9.5114),
-    "Fuerteventura": (28.4528, -13.8639),
-    "Gabala": (40.8267, 47.7125),
-    "Gdansk": (54.3775, 18.4661),
-    "Genoa": (44.4133, 8.8375),
-    "Girona": (41.9011, 2.7608),
-    "Giza": (30.1203, 30.8067),
-    "Glasgow": (55.8719, -4.4331),
-    "Gothenburg": (57.6628, 12.2797),
-    "Gran Canaria": (27.9319, -15.3867),
-    "Gyumri": (40.7500, 43.8514),
-    "Hamburg": (53.6304, 10.0067),
-    "Haugesund": (59.3453, 5.2081),
-    "Heraklion": (35.3387, 25.1803),
-    "Hurghada": (27.1783, 33.7994),
-    "Iasi": (47.1781, 27.6206),
-    "Ibiza": (38.8728, 1.3731),
-    "Istanbul": (41.2754, 28.7519),
-    "Jeddah": (21.6796, 39.1564),
-    "Karlsruhe/Baden-Baden": (48.7794, 8.0806),
-    "Katowice": (50.4742, 19.0800),
-    "Kaunas": (54.9639, 24.0844),
-    "Kerkyra": (39.6017, 19.9119),
-    "Kosice": (48.6631, 21.2411),
-    "Krakow": (50.0778, 19.7847),
-    "Kutaisi": (42.1761, 42.4825),
-    "Larnaca": (34.8750, 33.6249),
-    "Leeds/Bradford": (53.8658, -1.6603),
-    "Leipzig/Halle": (51.4239, 12.2361),
-    "Lisbon": (38.7813, -9.1361),
-    "Liverpool": (53.3356, -2.8497),
-    "Ljubljana": (46.2237, 14.4581),
-    "London": (51.4700, -0.4543),
-    "Lublin": (51.7225, 23.1714),
-    "Lyon": (45.7256, 5.0811),
-    "Madeira": (32.6978, -16.7745),
-    "Madinah": (24.5536, 39.7050),
-    "Madrid": (40.4936, -3.5667),
-    "Malaga": (36.6750, -4.4992),
-    "Male": (4.1917, 73.5289),
-    "Malmo": (55.5361, 13.3675),
-    "Malta": (35.8575, 14.4775),
-    "Marrakech": (31.6067, -8.0361),
-    "Marsa Alam": (25.5572, 34.5836),
-    "Memmingen": (47.9881, 10.2394),
-    "Milan": (45.6306, 8.7281),
-    "Mykonos": (37.4350, 25.3483),
-    "Naples": (40.8860, 14.2908),
-    "Nice": (43.6653, 7.2150),
-    "Nis": (43.3372, 21.8536),
-    "Nur-Sultan": (51.0219, 71.4669),
-    "Nuremberg": (49.4986, 11.0669),
-    "Ohrid": (41.1800, 20.7428),
-    "Olbia": (40.8986, 9.5181),
-    "Oslo": (60.1939, 11.1003),
-    "Palma De Mallorca": (39.5517, 2.7386),
-    "Paphos": (34.7181, 32.4856),
-    "Paris": (49.0097, 2.5478),
-    "Perugia": (43.0956, 12.5133),
-    "Pescara": (42.4317, 14.1811),
-    "Pisa": (43.6839, 10.3928),
-    "Plovdiv": (42.0678, 24.8508),
-    "Podgorica": (42.3597, 19.2519),
-    "Poprad/Tatry": (49.0736, 20.2406),
-    "Porto": (41.2481, -8.6814),
-    "Poznan": (52.4214, 16.8269),
-    "Prague": (50.1008, 14.2600),
-    "Pristina": (42.5728, 21.0361),
-    "Radom": (51.3889, 21.2133),
-    "Reykjavik": (63.9850, -22.6056),
-    "Rhodes": (36.4054, 28.0864),
-    "Riga": (56.9236, 23.9711),
-    "Rimini": (44.0203, 12.6114),
-    "Riyadh": (24.9578, 46.6983),
-    "Rome": (41.8003, 12.2389),
-    "Rzeszow": (50.1100, 22.0192),
-    "Salalah": (17.0386, 54.0914),
-    "Salerno": (40.6203, 14.9114),
-    "Salzburg": (47.7931, 13.0044),
-    "Samarkand": (39.7006, 66.9844),
-    "Santorini": (36.3992, 25.4794),
-    "Sarajevo": (43.8247, 18.3314),
-    "Satu Mare": (47.7031, 22.8856),
-    "Sevilla": (37.4181, -5.8931),
-    "Sharm el-Sheikh": (27.9772, 34.3947),
-    "Sibiu": (45.7856, 24.0914),
-    "Skiathos": (39.1769, 23.5036),
-    "Skopje": (41.9617, 21.6214),
-    "Sofia": (42.6947, 23.4114),
-    "Sohag": (26.3428, 31.7428),
-    "Split": (43.5389, 16.2981),
-    "Stavanger": (58.8767, 5.6378),
-    "Stockholm": (59.6519, 17.9186),
-    "Stuttgart": (48.6897, 9.2219),
-    "Suceava": (47.6875, 26.3544),
-    "Szczecin": (53.5847, 14.9019),
-    "Tallinn": (59.4133, 24.8328),
-    "Targu-Mures": (46.4681, 24.4119),
-    "Tashkent": (41.2578, 69.2811),
-    "Tel Aviv": (32.0114, 34.8867),
-    "Tenerife": (28.0828, -16.5725),
-    "Thessaloniki": (40.5197, 22.9706),
-    "Timisoara": (45.8103, 21.3378),
-    "Tirana": (41.4147, 19.7206),
-    "Trieste": (45.8275, 13.4719),
-    "Tromso": (69.6833, 18.9189),
-    "Trondheim": (63.4578, 10.9242),
-    "Turin": (45.2006, 7.6494),
-    "Turkistan": (43.2733, 68.3072),
-    "Turku": (60.5142, 22.2628),
-    "Tuzla": (44.4586, 18.7250),
-    "Valencia": (39.4894, -0.4814),
-    "Varna": (43.2322, 27.8253),
-    "Venice": (45.5053, 12.3519),
-    "Verona": (45.3956, 10.8883),
-    "Vienna": (48.1103, 16.5697),
-    "Vilnius": (54.6342, 25.2858),
-    "Warsaw": (52.1658, 20.9675),
-    "Wroclaw": (51.1025, 16.8858),
-    "Yerevan": (40.1475, 44.3956),
-    "Zakinthos Island": (37.7508, 20.8828),
-    "Zaragoza": (41.6661, -1.0406),
-}
+# Performance panel switches: set the env var or add ?perf=1 to the URL
+PERF_PANEL_ENV_VAR = "AYCF_PERF_PANEL"
+PERF_PANEL_QUERY_PARAM = "perf"
+TRUTHY_VALUES = ("1", "true", "yes", "on")
+
+# Upper bound on memoized filtered frames / derived series per FlightAnalytics
+MEMO_MAX_ENTRIES = 64
+
+# Process-wide cache of serialized figures, shared by all sessions
+FIGURE_CACHE_MAX_ENTRIES = 512
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Number of busiest hubs whose figures are prebuilt when new data lands (0 = off)
+FIGURE_WARMUP_ENV_VAR = "AYCF_FIGURE_WARMUP_HUBS"
+
+# Storage backend: "pandas" loads every CSV into memory, "sqlite" ingests
+# them into an embedded database and answers queries with SQL, "mmap" maps a
+# prebuilt route x day matrix file
+BACKEND_ENV_VAR = "AYCF_BACKEND"
+SQLITE_PATH_ENV_VAR = "AYCF_SQLITE_PATH"
+SQLITE_DEFAULT_NAME = "flights.sqlite3"
+# Matrix file written by `aggregate.py --index-out`, next to the data directory
+# unless overridden
+MATRIX_PATH_ENV_VAR = "AYCF_MATRIX_PATH"
+MATRIX_DEFAULT_NAME = "route-index.bin"
+
+# Rows per chunk read by the streaming backend
+CHUNK_ROWS_ENV_VAR = "AYCF_CHUNK_ROWS"
+
+# Alternative routes may start and end this far from the requested airports
+ALTERNATIVE_ROUTE_RADIUS_KM = 150
+# Recent windows (in collection days) and length of the route rankings
+RANKING_WINDOWS = [30, 90]
+RANKING_SIZE = 10
+
+# Default radius of the nearby-airport search
+NEARBY_RADIUS_KM = 100
+
+# Inclusive (first, last) collection dates a view is restricted to; None for all
+Period = Optional[Tuple[date, date]]
+
+# Airport name -> (latitude, longitude), shared with the static site's map
+AIRPORT_COORDINATES = load_coordinates()
+NEARBY_AIRPORTS = NearbyAirports(AIRPORT_COORDINATES)
+
+
+class LRUCache:
+    """Thread-safe mapping bounded to `max_entries` (and optionally to
+    `max_bytes` as measured by `sizeof`), evicting the least recently used
+    entries. Hits and misses are reported to the perf panel."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], label: Optional[str] = None
+    ) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss.
+        `label` names the cache in the perf panel (defaults to the cache name)"""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+                value = self._entries[key]
+        current_perf().cache_event(label or self.name, hit)
+        if hit:
+            return value
+
+        # Compute outside the lock so slow entries don't block other sessions
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store `value`, evicting least recently used entries over the bounds.
+        Values larger than `max_bytes` on their own are not stored."""
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            self.total_bytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(evicted)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+
+def memoized(method):
+    """Decorator memoizing a FlightAnalytics method on (data version, method,
+    arguments). DataFrames are returned as shallow copies so callers adding
+    columns cannot alter the cached frame."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(bound.arguments.items())[1:]  # drop self
+        key = (self.data_version, method.__name__, arguments)
+        result = self._memo.get_or_compute(
+            key,
+            lambda: method(self, *args, **kwargs),
+            label=f"memo {method.__name__}",
+        )
+        if isinstance(result, pd.DataFrame):
+            return result.copy(deep=False)
+        return result
+
+    return wrapper
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; the interior is split into
+    `threshold - 2` buckets and from each the point forming the largest
+    triangle with the previously kept point and the next bucket's mean is
+    kept, which preserves peaks and dips that plain striding would drop."""
+    n = len(y)
+    if threshold < 3 or n <= threshold:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = np.empty(threshold, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_lo, next_hi = hi, edges[bucket + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        next_x = x[next_lo:next_hi].mean()
+        next_y = y[next_lo:next_hi].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+    return keep
+
+
+class FigureCache:
+    """Bounded LRU cache of serialized Plotly figures keyed by (chart kind,
+    chart arguments, data version), shared by every session of the process."""
+
+    # Chart kind -> FlightAnalytics method building it
+    BUILDERS: ClassVar[Dict[str, str]] = {
+        "daily_flights": "create_daily_flights_chart",
+        "monthly_flights": "create_monthly_flights_chart",
+        "weekday": "create_weekday_chart",
+        "route_map": "create_route_map",
+        "route_timeline": "create_route_timeline_chart",
+        "multi_route_timeline": "create_multi_route_timeline_chart",
+        "selection_daily": "create_selection_daily_chart",
+        "selection_monthly": "create_selection_monthly_chart",
+        "selection_weekday": "create_selection_weekday_chart",
+    }
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self._figures = LRUCache(
+            "figures",
+            max_entries,
+            max_bytes=max_bytes,
+            sizeof=lambda figure_json: len(figure_json or ""),
+        )
+        self._warmed_versions = set()
+        self._lock = threading.Lock()
+
+    def get(
+        self, analytics: "FlightAnalytics", kind: str, *args
+    ) -> Optional[go.Figure]:
+        """The figure built by `kind`'s builder for `args`, or None if the
+        builder produced no figure. Failed builds are reported and not cached,
+        so the next rerun tries again."""
+        try:
+            figure_json = self._figures.get_or_compute(
+                self._key(analytics, kind, args),
+                lambda: self._build(analytics, kind, args),
+            )
+        except Exception as e:
+            st.error(f"Error creating {kind.replace('_', ' ')} chart: {e}")
+            return None
+        if figure_json is None:
+            return None
+        with current_perf().section(f"deserialize {kind}"):
+            return pio.from_json(figure_json, skip_invalid=True)
+
+    def _key(self, analytics: "FlightAnalytics", kind: str, args: tuple) -> tuple:
+        return (kind, args, analytics.data_version)
+
+    def _build(self, analytics: "FlightAnalytics", kind: str, args: tuple):
+        fig = getattr(analytics, self.BUILDERS[kind])(*args)
+        return None if fig is None else fig.to_json()
+
+    def warm_up(self, analytics: "FlightAnalytics", n_hubs: int) -> None:
+        """Prebuild the hub-only figures of the `n_hubs` busiest hubs in a
+        background thread, once per data version"""
+        if n_hubs <= 0 or not analytics.data_version:
+            return
+        with self._lock:
+            if analytics.data_version in self._warmed_versions:
+                return
+            self._warmed_versions.add(analytics.data_version)
+
+        def build_all():
+            for hub in analytics.get_busiest_hubs(n_hubs):
+                # Same arguments as the hub-only view in main()
+                for kind, args in [
+                    ("daily_flights", (hub, None, None, None)),
+                    ("monthly_flights", (hub, None, None)),
+                    ("weekday", (hub, None, None)),
+                    ("route_map", (hub, None, None)),
+                ]:
+                    key = self._key(analytics, kind, args)
+                    if key in self._figures:
+                        continue
+                    try:
+                        figure_json = self._build(analytics, kind, args)
+                    except Exception as e:
+                        # No script context to report in; the session that
+                        # asks for this figure rebuilds it and shows the error
+                        print(
+                            f"warm-up of {kind} for {hub} failed: {e}", file=sys.stderr
+                        )
+                        continue
+                    self._figures.put(key, figure_json)
+
+        threading.Thread(target=build_all, name="figure-warmup", daemon=True).start()
+
+
+def perf_panel_enabled() -> bool:
+    """Whether the performance panel was requested via env var or query param"""
+    if os.environ.get(PERF_PANEL_ENV_VAR, "").lower() in TRUTHY_VALUES:
+        return True
+    return st.query_params.get(PERF_PANEL_QUERY_PARAM, "").lower() in TRUTHY_VALUES
 
 
 class FlightAnalytics:
     def __init__(self, data_path: Optional[Union[str, Path]] = None) -> None:
         if data_path is None:
-            # Try different paths depending on where the script is run from
-            self.data_path = None
-            for path in DATA_PATHS:
-                if path.exists() and list(path.glob("*.csv")):
-                    self.data_path = path
-                    break
-            if self.data_path is None:
-                self.data_path = DATA_PATHS[0]  # fallback
+            self.data_path = self.find_data_path()
         else:
             self.data_path = Path(data_path)
+        self.data_version = ""
+        self._memo = LRUCache("memo", MEMO_MAX_ENTRIES)
         self._load_data()
 
+    @timed
     def _load_data(self) -> None:
         """Load all CSV files from the data directory"""
         self.data = pd.DataFrame()  # Initialize data attribute
+        self.available_dates = []
+        self.available_weekdays = np.array([], dtype=int)
+        self.months = pd.DatetimeIndex([])
+        self.days_per_month = np.array([], dtype=np.int64)
+        self._date_month_idx = np.array([], dtype=np.intp)
+        self._row_offsets = np.zeros(1, dtype=np.intp)
+        self.matrix = RouteMatrix.empty()
 
         try:
             csv_files = list(self.data_path.glob("*.csv"))
@@ -262,6 +422,9 @@ class FlightAnalytics:
             st.error(f"No CSV files found in {self.data_path}")
             return
 
+        self.data_version = self._compute_data_version(csv_files)
+        self._memo.clear()
+
         dfs = []
         failed_files = []
 
@@ -330,6 +493,7 @@ class FlightAnalytics:
                     self.available_dates = sorted(self.data["collection_date"].unique())
                 else:
                     self.available_dates = []
+                self._index_dates()
 
             except Exception as e:
                 st.error(f"Error combining data files: {e}")
@@ -338,6 +502,105 @@ class FlightAnalytics:
         else:
             st.error("No valid data files could be loaded")
 
+    def _index_dates(self) -> None:
+        """Precompute date positions and month buckets used by the reductions:
+        `date_idx` is each row's position in `available_dates`, and
+        `_date_month_idx` maps a date position to its position in `months`.
+        Rows are sorted by date, and `_row_offsets[i]` is the first row of
+        date position i, so a date range is a slice of the rows."""
+        dates = pd.DatetimeIndex(self.available_dates)
+        self.data["date_idx"] = dates.get_indexer(self.data["collection_date"])
+        self.data = self.data.sort_values("date_idx", kind="stable", ignore_index=True)
+        self._row_offsets = np.searchsorted(
+            self.data["date_idx"].to_numpy(), np.arange(len(dates) + 1)
+        )
+        self._index_months()
+
+        # Route x day presence, shared by the per-airport and per-route stats
+        self.matrix = RouteMatrix.from_frame(self.data, self.available_dates)
+
+    def _index_months(self) -> None:
+        """Weekday (Monday=0) of every collection date, and month buckets"""
+        dates = pd.DatetimeIndex(self.available_dates)
+        # Sorted, for binary searches by date
+        self._date_axis = dates.to_numpy().astype("datetime64[D]")
+        self.available_weekdays = dates.dayofweek.to_numpy()
+        month_starts = dates.to_period("M").to_timestamp()
+        self.months = month_starts.unique()
+        self._date_month_idx = self.months.get_indexer(month_starts)
+        self.days_per_month = np.bincount(
+            self._date_month_idx, minlength=len(self.months)
+        ).astype(np.int64)
+
+    @property
+    def has_data(self) -> bool:
+        return not self.data.empty
+
+    @property
+    def has_travel_dates(self) -> bool:
+        """Whether the backend keeps the availability windows that the routes
+        by travel date are computed from"""
+        return True
+
+    def _date_window(self, period: Period = None) -> Tuple[int, int]:
+        """Positions lo..hi-1 of the collection dates within `period`, found
+        by binary search over the sorted date axis"""
+        if period is None:
+            return 0, len(self.available_dates)
+        first, last = (np.datetime64(pd.Timestamp(d).date(), "D") for d in period)
+        lo = int(np.searchsorted(self._date_axis, first, side="left"))
+        hi = int(np.searchsorted(self._date_axis, last, side="right"))
+        return lo, max(lo, hi)
+
+    def _month_window(
+        self, lo: int, hi: int
+    ) -> Tuple[int, pd.DatetimeIndex, np.ndarray]:
+        """First month position, months and collection days per month of the
+        date positions lo..hi-1"""
+        if hi <= lo:
+            return 0, self.months[:0], np.zeros(0, dtype=np.int64)
+        first = int(self._date_month_idx[lo])
+        last = int(self._date_month_idx[hi - 1])
+        days = np.bincount(
+            self._date_month_idx[lo:hi] - first, minlength=last - first + 1
+        )
+        return first, self.months[first : last + 1], days.astype(np.int64)
+
+    def _period_rows(self, period: Period = None) -> pd.DataFrame:
+        """Records collected within `period`: a slice of the date-sorted rows"""
+        if period is None:
+            return self.data
+        lo, hi = self._date_window(period)
+        return self.data.iloc[self._row_offsets[lo] : self._row_offsets[hi]]
+
+    @staticmethod
+    def find_data_path() -> Path:
+        """First data directory with CSV files, trying different paths depending
+        on where the script is run from"""
+        for path in DATA_PATHS:
+            if path.exists() and list(path.glob("*.csv")):
+                return path
+        return DATA_PATHS[0]  # fallback
+
+    @classmethod
+    def data_version_for(cls, data_path: Path) -> str:
+        """Data version of the CSV files currently in `data_path`, without
+        loading them"""
+        try:
+            return cls._compute_data_version(list(Path(data_path).glob("*.csv")))
+        except OSError:
+            return ""
+
+    @staticmethod
+    def _compute_data_version(csv_files: List[Path]) -> str:
+        """Short digest of the CSV file names, sizes and mtimes, which changes
+        whenever a snapshot is added, removed or rewritten"""
+        digest = hashlib.sha1()
+        for file in sorted(csv_files):
+            stat = file.stat()
+            digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:12]
+
     def _validate_data_integrity(self) -> bool:
         """Validate the integrity of loaded data"""
         if self.data.empty:
@@ -392,31 +655,34 @@ class FlightAnalytics:
         if not location:
             return True  # None/empty is valid
 
-        if self.data.empty:
+        if not self.has_data:
             return False
 
-        all_locations = set(self.data["departure_from"].unique()) | set(
-            self.data["departure_to"].unique()
-        )
-        if location not in all_locations:
+        if self.matrix.airport_index(location) < 0:
             st.error(f"Invalid {location_type}: '{location}' not found in data")
             return False
 
         return True
 
+    @timed
     def get_unique_locations(self) -> Tuple[List[str], List[str]]:
         """Get unique departure and destination locations"""
-        if self.data.empty:
-            return [], []
-
-        departures = sorted(self.data["departure_from"].unique())
-        destinations = sorted(self.data["departure_to"].unique())
+        # Airports are sorted by name, so sorted indices give sorted names
+        airports = np.array(self.matrix.airports, dtype=object)
+        departures = airports[np.unique(self.matrix.origins)].tolist()
+        destinations = airports[np.unique(self.matrix.destinations)].tolist()
         return departures, destinations
 
+    @timed
+    @memoized
     def filter_data(
-        self, hub: Optional[str] = None, destination: Optional[str] = None
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
     ) -> pd.DataFrame:
-        """Filter data based on hub and/or destination with validation"""
+        """Filter data based on hub and/or destination, and the collection
+        dates within `period`, with validation"""
         if self.data.empty:
             return pd.DataFrame()
 
@@ -427,7 +693,7 @@ class FlightAnalytics:
             return pd.DataFrame()
 
         try:
-            filtered_data = self.data.copy()
+            filtered_data = self._period_rows(period).copy()
 
             if hub and destination:
                 # Show flights both directions: hub->destination and destination->hub
@@ -470,23 +736,21 @@ class FlightAnalytics:
             st.error(f"Error filtering data: {e}")
             return pd.DataFrame()
 
-    def get_daily_flight_counts(self, hub=None, destination=None):
+    @timed
+    @memoized
+    def get_daily_flight_counts(self, hub=None, destination=None, period=None):
         """Calculate daily flight counts with optional filtering"""
-        filtered_data = self.filter_data(hub, destination)
+        filtered_data = self.filter_data(hub, destination, period)
         if filtered_data.empty:
             return pd.DataFrame()
 
         # Use available dates from the dataset instead of a full date range
-        # This ensures we only show days where data was actually collected
-        available_dates = pd.to_datetime(self.available_dates)
-        
-        # Filter available dates to be within the range of the filtered data
-        # to avoid showing empty dates far outside the relevant period
-        if not filtered_data.empty:
-            min_date = filtered_data["collection_date"].min()
-            max_date = filtered_data["collection_date"].max()
-            available_dates = [d for d in available_dates if min_date <= d <= max_date]
-            available_dates = pd.DatetimeIndex(available_dates)
+        # This ensures we only show days where data was actually collected.
+        # Only the dates within the range of the filtered data are kept, to
+        # avoid showing empty dates far outside the relevant period.
+        first = filtered_data["date_idx"].min()
+        last = filtered_data["date_idx"].max()
+        available_dates = pd.DatetimeIndex(self.available_dates[first : last + 1])
 
         if hub and destination:
             # Get all possible directions
@@ -534,106 +798,78 @@ class FlightAnalytics:
 
         return daily_counts
 
-    def get_monthly_flight_counts(self, hub=None, destination=None):
+    @timed
+    @memoized
+    def get_monthly_flight_counts(self, hub=None, destination=None, period=None):
         """Calculate monthly average daily flight counts with optional filtering"""
-        filtered_data = self.filter_data(hub, destination)
+        filtered_data = self.filter_data(hub, destination, period)
         if filtered_data.empty:
             return pd.DataFrame()
 
-        # Use available dates to determine days with data per month
-        available_df = pd.DataFrame({"date": pd.to_datetime(self.available_dates)})
-        available_df["month"] = available_df["date"].dt.to_period("M").dt.to_timestamp()
-        
-        # Count days with data for each month
-        days_per_month = (
-            available_df.groupby("month")
-            .size()
-            .reset_index(name="days_with_data")
+        # Month bucket of every row, via the precomputed date -> month index,
+        # relative to the first month of the period
+        first_month, months, days_per_month = self._month_window(
+            *self._date_window(period)
         )
-
-        # Create a monthly period column for grouping filtered data
-        filtered_data = filtered_data.copy()
-        filtered_data["month"] = (
-            filtered_data["collection_date"]
-            .dt.to_period("M")
-            .dt.to_timestamp()
+        n_months = len(months)
+        row_months = (
+            self._date_month_idx[filtered_data["date_idx"].to_numpy()] - first_month
         )
 
         if hub and destination:
             # Get all possible directions
             directions = [f"{hub} → {destination}", f"{destination} → {hub}"]
-            
-            # Get months that have any data
-            all_months = days_per_month["month"].unique()
-
-            # Create a complete grid of months and directions
-            month_direction_grid = pd.MultiIndex.from_product(
-                [all_months, directions], names=["month", "direction"]
-            ).to_frame(index=False)
-
-            # Group actual data by month and direction
-            actual_counts = (
-                filtered_data.groupby(["month", "direction"])
-                .size()
-                .reset_index(name="total_flights")
+            direction_codes = pd.Categorical(
+                filtered_data["direction"], categories=directions
+            ).codes
+
+            # Flights per (month, direction) in one bincount, month-major; float
+            # like the counts of the merge-and-fillna this replaced
+            total_flights = np.bincount(
+                row_months * len(directions) + direction_codes,
+                minlength=n_months * len(directions),
+            ).astype(float)
+            days_with_data = np.repeat(days_per_month, len(directions))
+
+            monthly_counts = pd.DataFrame(
+                {
+                    "month": np.repeat(months, len(directions)),
+                    "direction": directions * n_months,
+                    "total_flights": total_flights,
+                    "days_with_data": days_with_data,
+                    # Every listed month has at least one collection day
+                    "flight_count": total_flights / days_with_data,
+                }
             )
 
-            # Merge with complete grid
-            monthly_counts = month_direction_grid.merge(
-                actual_counts, on=["month", "direction"], how="left"
-            ).fillna(0)
-            
-            # Merge with days_per_month
-            monthly_counts = monthly_counts.merge(
-                days_per_month, on="month", how="left"
-            )
-            
-            # Calculate average daily flights
-            # Avoid division by zero (though days_with_data should be > 0 if month is in list)
-            monthly_counts["flight_count"] = monthly_counts.apply(
-                lambda x: x["total_flights"] / x["days_with_data"] if x["days_with_data"] > 0 else 0,
-                axis=1
-            )
-            
         else:
-            # Group actual data
-            actual_counts = (
-                filtered_data.groupby("month")
-                .size()
-                .reset_index(name="total_flights")
-            )
-
-            # Merge with days_per_month (this acts as the grid)
-            monthly_counts = days_per_month.merge(
-                actual_counts, on="month", how="left"
-            ).fillna(0)
-            
-            # Set direction
-            monthly_counts["direction"] = (
-                filtered_data["direction"].iloc[0]
-                if not filtered_data.empty
-                else "All Flights"
+            # For non-route specific views (hub only or no filter), we show total
+            # monthly flights
+            total_flights = np.bincount(row_months, minlength=n_months).astype(float)
+            monthly_counts = pd.DataFrame(
+                {
+                    "month": months,
+                    "days_with_data": days_per_month,
+                    "total_flights": total_flights,
+                    "direction": filtered_data["direction"].iloc[0],
+                    "flight_count": total_flights,
+                }
             )
-            
-            # Calculate average daily flights
-            # For non-route specific views (hub only or no filter), we show total monthly flights
-            # For route specific views (hub + dest), we'll calculate probability later, so we keep daily average here
-            # which represents the fraction of days having flights
-            monthly_counts["flight_count"] = monthly_counts["total_flights"]
-
 
         return monthly_counts
 
-    def get_average_daily_flights(self, hub=None, destination=None):
+    @timed
+    @memoized
+    def get_average_daily_flights(self, hub=None, destination=None, period=None):
         """Calculate average number of daily available flights with optional
         filtering"""
-        daily_counts = self.get_daily_flight_counts(hub, destination)
+        daily_counts = self.get_daily_flight_counts(hub, destination, period)
         if daily_counts.empty:
             return 0
 
         if hub and destination:
             # Return separate averages for both directions
-            filtered_data = self.filter_data(hub, destination)
+            filtered_data = self.filter_data(hub, destination, period)
 
             # Calculate for each direction
             hub_to_dest = filtered_data[
@@ -658,7 +894,8 @@ class FlightAnalytics:
             )
 
             # Calculate percentages of days with flights based on available days
-            total_days = len(self.available_dates)
+            lo, hi = self._date_window(period)
+            total_days = hi - lo
             hub_to_dest_days = (
                 len(hub_to_dest_daily) if len(hub_to_dest_daily) > 0 else 0
             )
@@ -685,9 +922,645 @@ class FlightAnalytics:
             # so .mean() works correctly
             return daily_counts["flight_count"].mean()
 
-    def get_data_collection_interval(self, hub=None, destination=None):
+    def count_records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> int:
+        """Number of flight records matching the filter"""
+        return len(self.filter_data(hub, destination, period))
+
+    def preview_records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        n=100,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """First `n` flight records matching the filter"""
+        return self.filter_data(hub, destination, period).head(n)
+
+    def get_route_runs(self, origin: str, destination: str) -> pd.DataFrame:
+        """Runs of consecutive collection days on which origin -> destination
+        was available, with their first and last date and length"""
+        route_id = self.matrix.route_index(origin, destination)
+        if route_id < 0:
+            return pd.DataFrame(columns=["start", "end", "days"])
+        starts, ends = self.matrix.route_runs(route_id)
+        dates = pd.DatetimeIndex(self.available_dates)
+        return pd.DataFrame(
+            {"start": dates[starts], "end": dates[ends], "days": ends - starts + 1}
+        )
+
+    def get_route_run_stats(
+        self,
+        origin: str,
+        destination: str,
+        window_days: Optional[int] = None,
+        period: Period = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Availability statistics of origin -> destination from its runs
+        within `period`: last seen date, collection days since then, current
+        and longest streak, longest gap, and the share of the period's last
+        `window_days` collection days (all of them if None) with the route
+        available. None if the route has no days in the period."""
+        route_id = self.matrix.route_index(origin, destination)
+        if route_id < 0:
+            return None
+        lo, hi = self._date_window(period)
+        starts, ends = self.matrix.route_runs(route_id)
+        # Runs overlapping the period, clipped to it
+        overlapping = (ends >= lo) & (starts < hi)
+        if not overlapping.any():
+            return None
+        starts = np.maximum(starts[overlapping], lo)
+        ends = np.minimum(ends[overlapping], hi - 1)
+        last_day = hi - 1
+        first_day = lo if window_days is None else max(lo, last_day - window_days + 1)
+
+        # Runs overlapping the ratio's window, clipped to it
+        first_run = int(np.searchsorted(ends, first_day, side="left"))
+        window_starts = np.maximum(starts[first_run:], first_day)
+        days_in_window = int((ends[first_run:] - window_starts + 1).sum())
+
+        lengths = ends - starts + 1
+        gaps = starts[1:] - ends[:-1] - 1
+        return {
+            "last_seen": self.available_dates[ends[-1]],
+            "days_since_last_seen": int(last_day - ends[-1]),
+            "current_streak": int(lengths[-1]) if ends[-1] == last_day else 0,
+            "longest_streak": int(lengths.max()),
+            "longest_gap": int(gaps.max()) if len(gaps) else 0,
+            "availability_ratio": days_in_window / (last_day - first_day + 1),
+        }
+
+    def _travel_windows(self) -> pd.DataFrame:
+        """Route and availability window of every record"""
+        return self.data
+
+    @timed
+    @memoized
+    def _travel_window_index(self) -> TravelWindows:
+        return TravelWindows.from_frame(self._travel_windows())
+
+    def get_travel_date_routes(
+        self,
+        travel_date,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Routes advertised for travel on `travel_date` (rather than collected
+        on it), with the number of records whose availability window covers it"""
+        return self._travel_window_index().routes_on(travel_date, hub, destination)
+
+    def count_travel_date_snapshots(
+        self, origin: str, destination: str, travel_date
+    ) -> int:
+        """Number of records that advertised origin -> destination for travel
+        on `travel_date`"""
+        return self._travel_window_index().snapshot_count(
+            origin, destination, travel_date
+        )
+
+    @timed
+    @memoized
+    def get_connections(
+        self,
+        origin: str,
+        destination: str,
+        max_stops: int = 1,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Direct and connecting trips from origin to destination with at most
+        `max_stops` changes, all legs available on the same collection day
+        within `period`.
+
+        `days` counts the days the whole trip was possible; `reliability` is
+        the product of each leg's share of the period's collection days with
+        the leg available. Most reliable first.
+        """
+        lo, hi = self._date_window(period)
+        legs, days = self.matrix.connections(origin, destination, max_stops, lo, hi)
+        ratios = self.matrix.window_counts(hi - lo, hi - 1) / max(hi - lo, 1)
+        reliability = np.ones(len(days))
+        stops = np.full(len(days), -1)
+        path = np.full(len(days), origin, dtype=object)
+        for leg in legs:
+            used = leg >= 0
+            reliability[used] *= ratios[leg[used]]
+            stops += used
+            airports = np.array(self.matrix.airports, dtype=object)
+            path[used] += " → " + airports[self.matrix.destinations[leg[used]]]
+        connections = pd.DataFrame(
+            {
+                "route": path,
+                "stops": stops,
+                "days": days,
+                "reliability": reliability,
+            }
+        )
+        return connections.sort_values(
+            ["reliability", "days"], ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    @timed
+    @memoized
+    def get_top_routes(
+        self,
+        window_days: int = 30,
+        k: int = 10,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """The `k` routes available on the most of the last `window_days`
+        collection days of `period`, optionally only those from `hub` and/or
+        to `destination`; ties go to the route listed first"""
+        lo, hi = self._date_window(period)
+        collected = min(window_days, hi - lo)
+        counts = self.matrix.window_counts(collected, hi - 1)
+        candidates = np.ones(self.matrix.n_routes, dtype=bool)
+        if hub:
+            candidates &= self.matrix.origins == self.matrix.airport_index(hub)
+        if destination:
+            candidates &= self.matrix.destinations == self.matrix.airport_index(
+                destination
+            )
+        candidates &= counts > 0
+        top = np.array(
+            heapq.nlargest(
+                k, np.flatnonzero(candidates), key=lambda r: (counts[r], -r)
+            ),
+            dtype=np.intp,
+        )
+        airports = np.array(self.matrix.airports, dtype=object)
+        return pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[top]],
+                "departure_to": airports[self.matrix.destinations[top]],
+                "days_available": counts[top],
+                "availability": counts[top] / max(collected, 1),
+            }
+        )
+
+    @timed
+    @memoized
+    def get_round_trips(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        return_days: int = 3,
+        weekdays: Optional[Tuple[int, ...]] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Historical probability of a round trip on every route pair: the
+        share of the collection days in `period` on which the outbound flight
+        was available and the return was available within the next
+        `return_days` collection days of the period. `weekdays` (0 = Monday)
+        restricts the outbound days. Routes start at `hub` and/or end at
+        `destination`; most feasible first."""
+        lo, hi = self._date_window(period)
+        outbound_days = None
+        if weekdays is not None:
+            outbound_days = np.isin(self.available_weekdays, weekdays)
+        counts = self.matrix.round_trip_counts(return_days, outbound_days, lo, hi)
+        n_outbound = max(hi - lo - return_days, 0)
+        if outbound_days is not None:
+            n_outbound = int(outbound_days[lo : lo + n_outbound].sum())
+
+        route_ids = np.flatnonzero(counts)
+        if hub:
+            route_ids = route_ids[
+                self.matrix.origins[route_ids] == self.matrix.airport_index(hub)
+            ]
+        if destination:
+            route_ids = route_ids[
+                self.matrix.destinations[route_ids]
+                == self.matrix.airport_index(destination)
+            ]
+        route_ids = route_ids[np.argsort(-counts[route_ids], kind="stable")]
+        airports = np.array(self.matrix.airports, dtype=object)
+        return pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[route_ids]],
+                "departure_to": airports[self.matrix.destinations[route_ids]],
+                "round_trip_days": counts[route_ids],
+                "outbound_days": n_outbound,
+                "probability": counts[route_ids] / max(n_outbound, 1),
+            }
+        )
+
+    def _area_airport_ids(self, name: str, radius_km: float) -> np.ndarray:
+        """Matrix positions of `name` and the airports within `radius_km`"""
+        nearby = [near for near, _ in NEARBY_AIRPORTS.within(name, radius_km)]
+        ids = [self.matrix.airport_index(a) for a in [name, *nearby]]
+        return np.array([i for i in ids if i >= 0], dtype=np.int64)
+
+    def _area_routes_mask(
+        self, origin: Optional[str], destination: Optional[str], radius_km: float
+    ) -> np.ndarray:
+        """Routes from any airport within `radius_km` of `origin` to any
+        airport within `radius_km` of `destination` (either end unrestricted
+        if None), as a boolean mask over the matrix rows"""
+        mask = np.ones(self.matrix.n_routes, dtype=bool)
+        if origin:
+            mask &= np.isin(
+                self.matrix.origins, self._area_airport_ids(origin, radius_km)
+            )
+        if destination:
+            mask &= np.isin(
+                self.matrix.destinations,
+                self._area_airport_ids(destination, radius_km),
+            )
+        return mask
+
+    @timed
+    @memoized
+    def get_area_availability(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        radius_km: float = NEARBY_RADIUS_KM,
+        period: Period = None,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Routes from any airport within `radius_km` of `origin` to any
+        airport within `radius_km` of `destination` with days in `period`,
+        with their days available, most available first; and the number of
+        the period's collection days on which at least one of them was
+        available (an OR of their rows)."""
+        lo, hi = self._date_window(period)
+        route_ids = np.flatnonzero(
+            self._area_routes_mask(origin, destination, radius_km)
+        )
+        if origin is None and destination is None:
+            route_ids = route_ids[:0]
+        days = self._route_days_between(lo, hi)[route_ids]
+        order = np.argsort(-days, kind="stable")
+        route_ids, days = route_ids[order], days[order]
+        route_ids, days = route_ids[days > 0], days[days > 0]
+        any_days = 0
+        if len(route_ids):
+            merged = np.bitwise_or.reduce(self.matrix.window_bits(lo, hi)[route_ids])
+            any_days = int(popcount_rows(merged[None, :])[0])
+        airports = np.array(self.matrix.airports, dtype=object)
+        routes = pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[route_ids]],
+                "departure_to": airports[self.matrix.destinations[route_ids]],
+                "days_available": days,
+                "availability": days / max(hi - lo, 1),
+            }
+        )
+        return routes, any_days
+
+    @timed
+    @memoized
+    def get_alternative_routes(
+        self,
+        origin: str,
+        destination: str,
+        k: int = 10,
+        radius_km: float = ALTERNATIVE_ROUTE_RADIUS_KM,
+        by: str = "similarity",
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """The `k` best alternatives to origin -> destination by `by` over the
+        collection days of `period`, among the routes from the same origin, to
+        the same destination, and between airports within `radius_km` of each
+        end.
+
+        `similarity` is the Jaccard index of the days both routes were
+        available; `coverage` is the share of the days origin -> destination
+        was missing on which the alternative flew.
+        """
+        route_id = self.matrix.route_index(origin, destination)
+        lo, hi = self._date_window(period)
+        if route_id < 0 or self._route_days_between(lo, hi)[route_id] == 0:
+            return pd.DataFrame(
+                columns=[
+                    "departure_from",
+                    "departure_to",
+                    "relation",
+                    "similarity",
+                    "coverage",
+                ]
+            )
+
+        same_origin = self.matrix.origins == self.matrix.airport_index(origin)
+        same_destination = self.matrix.destinations == self.matrix.airport_index(
+            destination
+        )
+        nearby = self._area_routes_mask(origin, destination, radius_km)
+        candidates = np.flatnonzero(same_origin | same_destination | nearby)
+        candidates = candidates[candidates != route_id]
+
+        jaccard, coverage = self.matrix.similarity(route_id, candidates, lo, hi)
+        score = coverage if by == "coverage" else jaccard
+        top = np.argsort(-score, kind="stable")[:k]
+        candidates = candidates[top]
+        relation = np.where(
+            same_origin[candidates],
+            "same origin",
+            np.where(same_destination[candidates], "same destination", "nearby"),
+        )
+        airports = np.array(self.matrix.airports, dtype=object)
+        return pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[candidates]],
+                "departure_to": airports[self.matrix.destinations[candidates]],
+                "relation": relation,
+                "similarity": jaccard[top],
+                "coverage": coverage[top],
+            }
+        )
+
+    def get_busiest_hubs(self, n: int) -> List[str]:
+        """The `n` airports with the most outbound routes"""
+        route_counts = np.bincount(
+            self.matrix.origins, minlength=len(self.matrix.airports)
+        )
+        top = np.argsort(-route_counts, kind="stable")[:n]
+        return [self.matrix.airports[i] for i in top if route_counts[i] > 0]
+
+    @memoized
+    def _route_day_records(self) -> pd.DataFrame:
+        """Records per route and collection day, as `route_id`, `date_idx` and
+        `records` columns sorted by `date_idx`, omitting route-days without
+        records"""
+        n_routes = max(self.matrix.n_routes, 1)
+        route_ids = self.matrix.route_ids(
+            self.data["departure_from"], self.data["departure_to"]
+        )
+        # Day-major keys, so the unique keys come out sorted by date
+        keys, records = np.unique(
+            self.data["date_idx"].to_numpy(np.int64) * n_routes + route_ids,
+            return_counts=True,
+        )
+        return pd.DataFrame(
+            {
+                "route_id": keys % n_routes,
+                "date_idx": keys // n_routes,
+                "records": records,
+            }
+        )
+
+    @staticmethod
+    def _selection_label(origins: Sequence[str], destinations: Sequence[str]) -> str:
+        """Direction label of a multi-airport selection"""
+
+        def names(airports: Sequence[str], max_display: int = 3) -> str:
+            shown = ", ".join(airports[:max_display])
+            if len(airports) > max_display:
+                shown += f" (+{len(airports) - max_display} more)"
+            return shown
+
+        if origins and destinations:
+            return f"{names(origins)} → {names(destinations)}"
+        if origins:
+            return f"From {names(origins)}"
+        if destinations:
+            return f"To {names(destinations)}"
+        return "All Flights"
+
+    @memoized
+    def _selection_day_counts(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> np.ndarray:
+        """Records per collection day within `period` (positions lo..hi-1 of
+        `_date_window`) of the routes from any of `origins` to any of
+        `destinations` (an empty side matches every airport). The selection
+        is a route mask built from airport-code lookup tables, so the cost does
+        not grow with the number of airports selected, and only the route-days
+        of the period, found by binary search, are counted."""
+        lo, hi = self._date_window(period)
+        records = self._route_day_records()
+        date_idx = records["date_idx"].to_numpy()
+        start, stop = np.searchsorted(date_idx, [lo, hi])
+        selected = self.matrix.route_mask(origins, destinations)[
+            records["route_id"].to_numpy()[start:stop]
+        ]
+        return np.bincount(
+            date_idx[start:stop][selected] - lo,
+            weights=records["records"].to_numpy()[start:stop][selected],
+            minlength=hi - lo,
+        ).astype(np.int64)
+
+    @timed
+    @memoized
+    def get_selection_daily_counts(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Combined daily flight counts of a multi-airport selection, between the
+        first and last day with records"""
+        counts = self._selection_day_counts(origins, destinations, period)
+        days = np.flatnonzero(counts)
+        if not len(days):
+            return pd.DataFrame()
+        lo, _ = self._date_window(period)
+        first, last = days[0], days[-1]
+        return pd.DataFrame(
+            {
+                "collection_date": pd.DatetimeIndex(
+                    self.available_dates[lo + first : lo + last + 1]
+                ),
+                "flight_count": counts[first : last + 1],
+                "direction": self._selection_label(origins, destinations),
+            }
+        )
+
+    @timed
+    @memoized
+    def get_selection_monthly_counts(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Combined monthly flight counts of a multi-airport selection"""
+        counts = self._selection_day_counts(origins, destinations, period)
+        if not counts.any():
+            return pd.DataFrame()
+        lo, hi = self._date_window(period)
+        first_month, months, days_per_month = self._month_window(lo, hi)
+        total_flights = np.bincount(
+            self._date_month_idx[lo:hi] - first_month,
+            weights=counts,
+            minlength=len(months),
+        )
+        return pd.DataFrame(
+            {
+                "month": months,
+                "days_with_data": days_per_month,
+                "total_flights": total_flights,
+                "direction": self._selection_label(origins, destinations),
+                "flight_count": total_flights,
+            }
+        )
+
+    @timed
+    @memoized
+    def get_selection_weekday_analysis(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Average combined flights per weekday of a multi-airport selection,
+        over the days with records"""
+        counts = self._selection_day_counts(origins, destinations, period)
+        days = np.flatnonzero(counts)
+        if not len(days):
+            return pd.DataFrame()
+        lo, _ = self._date_window(period)
+        weekdays = self.available_weekdays[lo + days]
+        present = np.bincount(weekdays, minlength=7)
+        flights = np.bincount(weekdays, weights=counts[days], minlength=7)
+        order = np.flatnonzero(present)
+        return pd.DataFrame(
+            {
+                "weekday": [WEEKDAY_ORDER[i] for i in order],
+                "weekday_num": order.astype(np.int32),
+                "flight_count": flights[order] / present[order],
+            }
+        )
+
+    @timed
+    @memoized
+    def get_selection_routes(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Routes of a multi-airport selection with the number and share of
+        collection days within `period` on which each was available, most
+        available first"""
+        lo, hi = self._date_window(period)
+        route_ids = np.flatnonzero(self.matrix.route_mask(origins, destinations))
+        days = self._route_days_between(lo, hi)[route_ids]
+        keep = days > 0
+        route_ids, days = route_ids[keep], days[keep]
+        order = np.argsort(-days, kind="stable")
+        airports = np.array(self.matrix.airports, dtype=object)
+        return pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[route_ids[order]]],
+                "departure_to": airports[self.matrix.destinations[route_ids[order]]],
+                "days": days[order],
+                "availability": days[order] / max(hi - lo, 1),
+            }
+        )
+
+    @timed
+    def create_selection_daily_chart(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        visible_range: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None,
+        period: Period = None,
+    ) -> Optional[go.Figure]:
+        """Daily flights of a multi-airport selection, plotted like the hub-only
+        view"""
+        daily_counts = self.get_selection_daily_counts(origins, destinations, period)
+        if daily_counts.empty:
+            return None
+        fig = px.line(
+            self._downsample_daily_counts(daily_counts, visible_range),
+            x="collection_date",
+            y="flight_count",
+            title=f"Daily Available Flights: {daily_counts['direction'].iloc[0]}",
+            labels={"collection_date": "Date", "flight_count": "Number of Flights"},
+        )
+        avg_flights = daily_counts["flight_count"].mean()
+        fig.add_hline(
+            y=avg_flights,
+            line_dash="dash",
+            line_color="red",
+            annotation_text=f"Average: {avg_flights:.2f}",
+        )
+        fig.update_xaxes(rangeslider_visible=True)
+        if visible_range is not None:
+            fig.update_xaxes(range=list(visible_range))
+        fig.update_yaxes(fixedrange=True)
+        return fig
+
+    @timed
+    def create_selection_monthly_chart(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> Optional[go.Figure]:
+        """Average monthly flights of a multi-airport selection"""
+        monthly_counts = self.get_selection_monthly_counts(
+            origins, destinations, period
+        )
+        if monthly_counts.empty:
+            return None
+        avg_monthly_counts = self._average_by_calendar_month(monthly_counts)
+        avg_monthly_counts["flight_count"] = avg_monthly_counts["flight_count"].round(0)
+        avg_monthly_counts["formatted_count"] = avg_monthly_counts[
+            "flight_count"
+        ].apply(lambda x: "{:.0f}".format(x))
+        fig = px.bar(
+            avg_monthly_counts,
+            x="month_name",
+            y="flight_count",
+            text="formatted_count",
+            title=(
+                "Average Monthly Available Flights: "
+                + monthly_counts["direction"].iloc[0]
+            ),
+            labels={"month_name": "Month", "flight_count": "Average Monthly Flights"},
+        )
+        self._add_chart_labels(fig, percentage_mode=False, text_format="%{text}")
+        fig.update_xaxes(fixedrange=True)
+        fig.update_yaxes(fixedrange=True)
+        return fig
+
+    @timed
+    def create_selection_weekday_chart(
+        self,
+        origins: Tuple[str, ...] = (),
+        destinations: Tuple[str, ...] = (),
+        period: Period = None,
+    ) -> Optional[go.Figure]:
+        """Average flights per weekday of a multi-airport selection"""
+        weekday_data = self.get_selection_weekday_analysis(
+            origins, destinations, period
+        )
+        if weekday_data.empty:
+            return None
+        label = self._selection_label(origins, destinations)
+        fig = px.bar(
+            weekday_data,
+            x="weekday",
+            y="flight_count",
+            title=f"Average Flights by Weekday: {label}",
+            labels={
+                "weekday": "Day of Week",
+                "flight_count": "Average Number of Flights",
+            },
+        )
+        self._configure_chart_axes(fig, weekday_order=True)
+        self._add_chart_labels(fig, percentage_mode=False)
+        fig.update_layout(xaxis_title="Day of Week", showlegend=False, height=400)
+        fig.update_xaxes(fixedrange=True)
+        fig.update_yaxes(fixedrange=True)
+        return fig
+
+    @timed
+    @memoized
+    def get_data_collection_interval(self, hub=None, destination=None, period=None):
         """Get the interval of data collection with optional filtering"""
-        filtered_data = self.filter_data(hub, destination)
+        filtered_data = self.filter_data(hub, destination, period)
         if filtered_data.empty:
             return None, None
 
@@ -695,269 +1568,380 @@ class FlightAnalytics:
         max_date = filtered_data["collection_date"].max()
         return min_date, max_date
 
+    @timed
     def create_daily_flights_chart(
-        self, hub: Optional[str] = None, destination: Optional[str] = None
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        visible_range: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None,
+        period: Period = None,
     ) -> Optional[go.Figure]:
-        """Create a chart showing daily flight counts with optional filtering"""
-        try:
-            daily_counts = self.get_daily_flight_counts(hub, destination)
-            if daily_counts.empty:
-                return None
+        """Create a chart showing daily flight counts with optional filtering.
 
-            # Create title based on filters
-            title = self._generate_chart_title(
-                "Daily Available Flights", hub, destination
-            )
+        Only points within `visible_range` (default: everything) are sent, and
+        series longer than DAILY_CHART_MAX_POINTS are downsampled with LTTB, so
+        narrowing the range brings back full resolution."""
+        daily_counts = self.get_daily_flight_counts(hub, destination, period)
+        if daily_counts.empty:
+            return None
+        plot_counts = self._downsample_daily_counts(daily_counts, visible_range)
 
-            # Create chart based on whether we have hub+destination filtering
-            if hub and destination:
-                # Create separate lines for each direction
-                fig = px.line(
-                    daily_counts,
-                    x="collection_date",
-                    y="flight_count",
-                    color="direction",
-                    title=title,
-                    labels={
-                        "collection_date": "Date",
-                        "flight_count": "Number of Flights",
-                    },
-                )
-            else:
-                fig = px.line(
-                    daily_counts,
-                    x="collection_date",
-                    y="flight_count",
-                    title=title,
-                    labels={
-                        "collection_date": "Date",
-                        "flight_count": "Number of Flights",
-                    },
-                )
+        # Create title based on filters
+        title = self._generate_chart_title("Daily Available Flights", hub, destination)
 
-            # Add average line(s)
-            if hub and destination:
-                # Add average lines for each direction
-                for direction in daily_counts["direction"].unique():
-                    direction_data = daily_counts[
-                        daily_counts["direction"] == direction
-                    ]
-                    avg_flights = direction_data["flight_count"].mean()
-                    fig.add_hline(
-                        y=avg_flights,
-                        line_dash="dash",
-                        annotation_text=f"Avg {direction}: {avg_flights:.2f}",
-                    )
-            else:
-                avg_flights = self.get_average_daily_flights(hub, destination)
+        # Create chart based on whether we have hub+destination filtering
+        if hub and destination:
+            # Create separate lines for each direction
+            fig = px.line(
+                plot_counts,
+                x="collection_date",
+                y="flight_count",
+                color="direction",
+                title=title,
+                labels={
+                    "collection_date": "Date",
+                    "flight_count": "Number of Flights",
+                },
+            )
+        else:
+            fig = px.line(
+                plot_counts,
+                x="collection_date",
+                y="flight_count",
+                title=title,
+                labels={
+                    "collection_date": "Date",
+                    "flight_count": "Number of Flights",
+                },
+            )
+
+        # Add average line(s)
+        if hub and destination:
+            # Add average lines for each direction
+            for direction in daily_counts["direction"].unique():
+                direction_data = daily_counts[daily_counts["direction"] == direction]
+                avg_flights = direction_data["flight_count"].mean()
                 fig.add_hline(
                     y=avg_flights,
                     line_dash="dash",
-                    line_color="red",
-                    annotation_text=f"Average: {avg_flights:.2f}",
+                    annotation_text=f"Avg {direction}: {avg_flights:.2f}",
                 )
+        else:
+            avg_flights = self.get_average_daily_flights(hub, destination, period)
+            fig.add_hline(
+                y=avg_flights,
+                line_dash="dash",
+                line_color="red",
+                annotation_text=f"Average: {avg_flights:.2f}",
+            )
 
-            fig.update_xaxes(rangeslider_visible=True)
-            fig.update_yaxes(fixedrange=True)
+        fig.update_xaxes(rangeslider_visible=True)
+        if visible_range is not None:
+            fig.update_xaxes(range=list(visible_range))
+        fig.update_yaxes(fixedrange=True)
 
-            return fig
+        return fig
 
-        except Exception as e:
-            st.error(f"Error creating daily flights chart: {e}")
-            return None
+    def _downsample_daily_counts(self, daily_counts, visible_range=None):
+        """Restrict each direction's daily series to the visible range and reduce
+        it to at most DAILY_CHART_MAX_POINTS points"""
+        if visible_range is not None:
+            start, end = (pd.Timestamp(d) for d in visible_range)
+            dates = daily_counts["collection_date"]
+            daily_counts = daily_counts[(dates >= start) & (dates <= end)]
+
+        parts = []
+        for _, direction_counts in daily_counts.groupby("direction", sort=False):
+            days = (
+                direction_counts["collection_date"]
+                .to_numpy()
+                .astype("datetime64[D]")
+                .astype(np.int64)
+            )
+            keep = downsample_lttb(
+                days,
+                direction_counts["flight_count"].to_numpy(),
+                DAILY_CHART_MAX_POINTS,
+            )
+            parts.append(direction_counts.iloc[keep])
+        if not parts:
+            return daily_counts
+        return pd.concat(parts)
+
+    def _timeline_rows(
+        self, route_ids: np.ndarray, lo: int = 0, hi: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calendar days from the first to the last collection date (of date
+        positions lo..hi-1, default all), and one row per route with 1 (flight
+        available), 0 (no flight) or NaN (no data collected). Route ids of -1
+        (never seen) give all-zero rows."""
+        hi = self.matrix.n_days if hi is None else hi
+        dates = self.matrix.dates[lo:hi]
+        calendar = np.arange(dates[0], dates[-1] + np.timedelta64(1, "D"))
+        # Position of every collection date on the calendar axis
+        positions = (dates - dates[0]).astype(np.int64)
+
+        z = np.full((len(route_ids), len(calendar)), np.nan)
+        z[:, positions] = 0
+        known = np.flatnonzero(route_ids >= 0)
+        if len(known):
+            z[np.ix_(known, positions)] = self.matrix.rows(route_ids[known], lo, hi)
+        return calendar, z
+
+    @staticmethod
+    def _timeline_hover(calendar: np.ndarray, row: np.ndarray, label: str):
+        """Hover strings for one timeline row, built with array operations"""
+        weekdays = np.array(WEEKDAY_ABBREVIATIONS)[
+            (calendar.astype(np.int64) + EPOCH_WEEKDAY) % 7
+        ]
+        states = np.array(TIMELINE_STATES)[
+            np.where(np.isnan(row), 0, np.nan_to_num(row).astype(np.int64) + 1)
+        ]
+        text = np.char.add(f"<b>{label}</b><br>", np.datetime_as_string(calendar))
+        text = np.char.add(np.char.add(text, " ("), weekdays)
+        return np.char.add(np.char.add(text, ")<br>"), states)
 
+    @timed
     def create_route_timeline_chart(
-        self, hub: str, destination: str
+        self, hub: str, destination: str, period: Period = None
     ) -> Optional[go.Figure]:
         """Two-row binary timeline (heatmap) of daily flight availability per
         direction, with a 'Both' summary row on top. Each cell = one day."""
-        try:
-            filtered_data = self.filter_data(hub, destination)
-            if filtered_data.empty:
-                return None
-
-            ab = f"{hub} → {destination}"
-            ba = f"{destination} → {hub}"
+        filtered_data = self.filter_data(hub, destination, period)
+        lo, hi = self._date_window(period)
+        if filtered_data.empty or hi <= lo:
+            return None
 
-            counts = (
-                filtered_data.groupby(["collection_date", "direction"])
-                .size()
-                .unstack(fill_value=0)
-            )
+        ab = f"{hub} → {destination}"
+        ba = f"{destination} → {hub}"
 
-            available_set = {pd.Timestamp(d) for d in self.available_dates}
-            if not available_set:
-                return None
-            full_dates = pd.date_range(
-                min(available_set), max(available_set), freq="D"
-            )
+        route_ids = np.array(
+            [
+                self.matrix.route_index(hub, destination),
+                self.matrix.route_index(destination, hub),
+            ]
+        )
+        full_dates, (ab_row, ba_row) = self._timeline_rows(route_ids, lo, hi)
+        # Both rows have gaps on the same (uncollected) days
+        both_row = ab_row * ba_row
+
+        y_labels = ["Both", ab, ba]
+        z = np.vstack([both_row, ab_row, ba_row])
+        customdata = np.vstack(
+            [
+                self._timeline_hover(full_dates, both_row, "Both directions"),
+                self._timeline_hover(full_dates, ab_row, ab),
+                self._timeline_hover(full_dates, ba_row, ba),
+            ]
+        )
 
-            ab_set = (
-                set(counts.index[counts[ab] > 0]) if ab in counts.columns else set()
-            )
-            ba_set = (
-                set(counts.index[counts[ba] > 0]) if ba in counts.columns else set()
+        fig = go.Figure(
+            data=go.Heatmap(
+                z=z,
+                x=full_dates,
+                y=y_labels,
+                customdata=customdata,
+                hovertemplate="%{customdata}<extra></extra>",
+                colorscale=TIMELINE_COLORSCALE,
+                zmin=0,
+                zmax=1,
+                showscale=False,
+                xgap=1,
+                ygap=4,
             )
+        )
 
-            def cell(d, has_set):
-                if d not in available_set:
-                    return None
-                return 1 if d in has_set else 0
+        fig.update_layout(
+            title=self._generate_chart_title(
+                "Daily Flight Availability", hub, destination
+            ),
+            xaxis_title="Date",
+            yaxis=dict(autorange="reversed", title=None),
+            height=240,
+            plot_bgcolor="white",
+            margin=dict(l=120, r=20, t=60, b=40),
+        )
+        fig.update_xaxes(showgrid=False, ticks="outside", rangeslider_visible=True)
+        fig.update_yaxes(showgrid=False, fixedrange=True)
 
-            ab_row = [cell(d, ab_set) for d in full_dates]
-            ba_row = [cell(d, ba_set) for d in full_dates]
-            both_row = [
-                None if (a is None or b is None) else (1 if a == 1 and b == 1 else 0)
-                for a, b in zip(ab_row, ba_row)
-            ]
+        return fig
 
-            def hover(d, val, label):
-                date_str = d.strftime("%Y-%m-%d (%a)")
-                if val is None:
-                    state = "No data collected"
-                elif val == 1:
-                    state = "✈️ Flight available"
-                else:
-                    state = "No flight"
-                return f"<b>{label}</b><br>{date_str}<br>{state}"
-
-            both_hover = [hover(d, v, "Both directions") for d, v in zip(full_dates, both_row)]
-            ab_hover = [hover(d, v, ab) for d, v in zip(full_dates, ab_row)]
-            ba_hover = [hover(d, v, ba) for d, v in zip(full_dates, ba_row)]
-
-            y_labels = ["Both", ab, ba]
-            z = [both_row, ab_row, ba_row]
-            customdata = [both_hover, ab_hover, ba_hover]
-
-            fig = go.Figure(
-                data=go.Heatmap(
-                    z=z,
-                    x=full_dates,
-                    y=y_labels,
-                    customdata=customdata,
-                    hovertemplate="%{customdata}<extra></extra>",
-                    colorscale=[[0.0, "#e8e8e8"], [1.0, "#1f77b4"]],
-                    zmin=0,
-                    zmax=1,
-                    showscale=False,
-                    xgap=1,
-                    ygap=4,
-                )
-            )
+    def get_timeline_routes(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> List[Tuple[str, str]]:
+        """Routes from the hub and/or to the destination with days within
+        `period`, most available first"""
+        if hub:
+            route_ids = self.matrix.routes_from(hub)
+        else:
+            route_ids = np.arange(self.matrix.n_routes)
+        if destination:
+            destination_idx = self.matrix.airport_index(destination)
+            route_ids = route_ids[self.matrix.destinations[route_ids] == destination_idx]
+        route_days = self._route_days_between(*self._date_window(period))[route_ids]
+        order = np.argsort(-route_days, kind="stable")
+        return self.matrix.route_names(route_ids[order][route_days[order] > 0])
+
+    @timed
+    def create_multi_route_timeline_chart(
+        self,
+        routes: Sequence[Tuple[str, str]],
+        title: Optional[str] = None,
+        period: Period = None,
+    ) -> Optional[go.Figure]:
+        """Stacked binary timeline with one heatmap row per (origin, destination)
+        route over `period`. Cells carry no per-cell hover strings, so the
+        figure stays small for hundreds of routes across years of days."""
+        lo, hi = self._date_window(period)
+        if not routes or hi <= lo:
+            return None
 
-            fig.update_layout(
-                title=self._generate_chart_title(
-                    "Daily Flight Availability", hub, destination
+        route_ids = np.array(
+            [self.matrix.route_index(origin, dest) for origin, dest in routes]
+        )
+        calendar, z = self._timeline_rows(route_ids, lo, hi)
+
+        fig = go.Figure(
+            data=go.Heatmap(
+                # float32 halves the typed-array payload; NaN marks gaps
+                z=z.astype(np.float32),
+                x=calendar,
+                y=[f"{origin} → {dest}" for origin, dest in routes],
+                hovertemplate=(
+                    "<b>%{y}</b><br>%{x|%Y-%m-%d (%a)}<br>"
+                    "Flight available: %{z}<extra></extra>"
                 ),
-                xaxis_title="Date",
-                yaxis=dict(autorange="reversed", title=None),
-                height=240,
-                plot_bgcolor="white",
-                margin=dict(l=120, r=20, t=60, b=40),
+                hoverongaps=False,
+                colorscale=TIMELINE_COLORSCALE,
+                zmin=0,
+                zmax=1,
+                showscale=False,
+                ygap=1,
             )
-            fig.update_xaxes(showgrid=False, ticks="outside", rangeslider_visible=True)
-            fig.update_yaxes(showgrid=False, fixedrange=True)
+        )
 
-            return fig
-        except Exception as e:
-            st.error(f"Error creating route timeline chart: {e}")
-            return None
+        fig.update_layout(
+            title=title or "Daily Flight Availability by Route",
+            xaxis_title="Date",
+            yaxis=dict(autorange="reversed", title=None),
+            height=MULTI_TIMELINE_BASE_HEIGHT + MULTI_TIMELINE_ROW_HEIGHT * len(routes),
+            plot_bgcolor="white",
+            margin=dict(l=200, r=20, t=60, b=40),
+        )
+        fig.update_xaxes(showgrid=False, ticks="outside")
+        fig.update_yaxes(showgrid=False, fixedrange=True)
+
+        return fig
 
+    @timed
     def create_monthly_flights_chart(
-        self, hub: Optional[str] = None, destination: Optional[str] = None
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
     ) -> Optional[go.Figure]:
         """Create a chart showing average monthly flight counts with optional filtering"""
-        try:
-            monthly_counts = self.get_monthly_flight_counts(hub, destination)
-            if monthly_counts.empty:
-                return None
+        monthly_counts = self.get_monthly_flight_counts(hub, destination, period)
+        if monthly_counts.empty:
+            return None
 
-            # Add month metadata for averaging and sorting
-            monthly_counts["month_name"] = monthly_counts["month"].dt.strftime("%B")
-            monthly_counts["month_num"] = monthly_counts["month"].dt.month
+        # Calculate average flights per month (aggregating across years)
+        avg_monthly_counts = self._average_by_calendar_month(monthly_counts)
 
-            # Calculate average flights per month (aggregating across years)
-            avg_monthly_counts = (
-                monthly_counts.groupby(["month_num", "month_name", "direction"])["flight_count"]
-                .mean()
-                .reset_index()
-                .sort_values("month_num")
+        # Create chart based on whether we have hub+destination filtering
+        if hub and destination:
+            # Convert to percentage for specific route
+            avg_monthly_counts["flight_count"] = (avg_monthly_counts["flight_count"] * 100).round(1)
+            avg_monthly_counts["formatted_count"] = avg_monthly_counts["flight_count"].apply(lambda x: "{:.1f}%".format(x))
+            
+            title = self._generate_chart_title(
+                "Monthly Flight Availability Probability", hub, destination
             )
 
-            # Create chart based on whether we have hub+destination filtering
-            if hub and destination:
-                # Convert to percentage for specific route
-                avg_monthly_counts["flight_count"] = (avg_monthly_counts["flight_count"] * 100).round(1)
-                avg_monthly_counts["formatted_count"] = avg_monthly_counts["flight_count"].apply(lambda x: "{:.1f}%".format(x))
-                
-                title = self._generate_chart_title(
-                    "Monthly Flight Availability Probability", hub, destination
-                )
-
-                fig = px.bar(
-                    avg_monthly_counts,
-                    x="month_name",
-                    y="flight_count",
-                    color="direction",
-                    text="formatted_count",
-                    title=title,
-                    barmode="group",
-                    labels={
-                        "month_name": "Month",
-                        "flight_count": "Availability Probability (%)",
-                    },
-                )
-                # Set y-axis to 0-100 range for consistency in percentages
-                fig.update_yaxes(range=[0, 100])
-            else:
-                # Round to 0 decimal places for monthly total display (integers)
-                avg_monthly_counts["flight_count"] = (
-                    avg_monthly_counts["flight_count"].round(0)
-                )
-                # Format as integer
-                avg_monthly_counts["formatted_count"] = avg_monthly_counts[
-                    "flight_count"
-                ].apply(lambda x: "{:.0f}".format(x))
-
-                title = self._generate_chart_title(
-                    "Average Monthly Available Flights", hub, destination
-                )
-
-                fig = px.bar(
-                    avg_monthly_counts,
-                    x="month_name",
-                    y="flight_count",
-                    text="formatted_count",
-                    title=title,
-                    labels={
-                        "month_name": "Month",
-                        "flight_count": "Average Monthly Flights",
-                    },
-                )
-
-            self._add_chart_labels(fig, percentage_mode=False, text_format="%{text}")
+            fig = px.bar(
+                avg_monthly_counts,
+                x="month_name",
+                y="flight_count",
+                color="direction",
+                text="formatted_count",
+                title=title,
+                barmode="group",
+                labels={
+                    "month_name": "Month",
+                    "flight_count": "Availability Probability (%)",
+                },
+            )
+            # Set y-axis to 0-100 range for consistency in percentages
+            fig.update_yaxes(range=[0, 100])
+        else:
+            # Round to 0 decimal places for monthly total display (integers)
+            avg_monthly_counts["flight_count"] = avg_monthly_counts[
+                "flight_count"
+            ].round(0)
+            # Format as integer
+            avg_monthly_counts["formatted_count"] = avg_monthly_counts[
+                "flight_count"
+            ].apply(lambda x: "{:.0f}".format(x))
 
-            fig.update_xaxes(fixedrange=True)
-            fig.update_yaxes(fixedrange=True)
+            title = self._generate_chart_title(
+                "Average Monthly Available Flights", hub, destination
+            )
 
-            return fig
+            fig = px.bar(
+                avg_monthly_counts,
+                x="month_name",
+                y="flight_count",
+                text="formatted_count",
+                title=title,
+                labels={
+                    "month_name": "Month",
+                    "flight_count": "Average Monthly Flights",
+                },
+            )
 
-        except Exception as e:
-            st.error(f"Error creating monthly flights chart: {e}")
-            return None
+        self._add_chart_labels(fig, percentage_mode=False, text_format="%{text}")
+
+        fig.update_xaxes(fixedrange=True)
+        fig.update_yaxes(fixedrange=True)
 
-    def _calculate_flight_probabilities(self, flights, total_collection_days):
-        """Calculate flight availability probabilities for given flights"""
-        if len(flights) == 0:
-            return 0, 0
+        return fig
 
-        unique_days = len(flights["collection_date"].unique())
-        probability = (
-            (unique_days / total_collection_days * 100)
-            if total_collection_days > 0
-            else 0
+    def _average_by_calendar_month(self, monthly_counts):
+        """Average `flight_count` over years for each calendar month and direction,
+        with weighted bincounts over the (month, direction) rows"""
+        directions = sorted(monthly_counts["direction"].unique())
+        direction_codes = pd.Categorical(
+            monthly_counts["direction"], categories=directions
+        ).codes
+        # 0-based calendar month of each row, combined with the direction code
+        cells = (monthly_counts["month"].dt.month.to_numpy() - 1) * len(
+            directions
+        ) + direction_codes
+        n_cells = 12 * len(directions)
+        sums = np.bincount(
+            cells, weights=monthly_counts["flight_count"], minlength=n_cells
         )
-        return probability, unique_days
+        counts = np.bincount(cells, minlength=n_cells)
+        present = np.flatnonzero(counts)
+
+        month_nums = present // len(directions) + 1
+        return pd.DataFrame(
+            {
+                "month_num": month_nums,
+                "month_name": [MONTH_NAMES[m - 1] for m in month_nums],
+                "direction": [directions[c % len(directions)] for c in present],
+                "flight_count": sums[present] / counts[present],
+            }
+        )
+
+    def _calculate_probability(self, active_days, total_collection_days):
+        """Percentage of collection days on which flights were available"""
+        if total_collection_days <= 0:
+            return 0
+        return active_days / total_collection_days * 100
 
     def _create_airport_data(self, name, coords, color, hover_text, size=None):
         """Create airport data dictionary for map visualization"""
@@ -980,20 +1964,38 @@ class FlightAnalytics:
                 + f", ... (+{len(destinations) - max_display} more)"
             )
 
-    def _get_hub_airports_data(self, hub, filtered_data, total_collection_days):
+    def _route_days_between(self, lo: int, hi: int) -> np.ndarray:
+        """Collection days each route was available among date positions
+        lo..hi-1, counted over the bytes of that window only"""
+        if (lo, hi) == (0, self.matrix.n_days):
+            return self.matrix.day_counts()
+        return popcount_rows(self.matrix.window_bits(lo, hi))
+
+    def _routes_active_between(
+        self, route_ids: np.ndarray, route_days: np.ndarray
+    ) -> np.ndarray:
+        """The routes among `route_ids` that, in either direction, have days in
+        `route_days` (a `_route_days_between` result)"""
+        reverse = self.matrix.reverse_routes()[route_ids]
+        return_days = np.where(reverse >= 0, route_days[np.maximum(reverse, 0)], 0)
+        return route_ids[(route_days[route_ids] > 0) | (return_days > 0)]
+
+    def _get_hub_airports_data(self, hub, total_collection_days, lo=0, hi=None):
         """Get airport data when hub is selected"""
         airports_data = []
-        hub_outbound = filtered_data[filtered_data["departure_from"] == hub]
-        hub_inbound = self.data[self.data["departure_to"] == hub]
-        destinations_from_hub = set(hub_outbound["departure_to"].unique())
+        matrix = self.matrix
+        route_days = self._route_days_between(lo, matrix.n_days if hi is None else hi)
+        hub_routes = self._routes_active_between(matrix.routes_from(hub), route_days)
+        destinations_from_hub = [
+            matrix.airports[d] for d in matrix.destinations[hub_routes]
+        ]
 
         # Add hub airport
         if hub in AIRPORT_COORDINATES:
-            hub_destinations = sorted(set(hub_outbound["departure_to"].unique()))
             coords = AIRPORT_COORDINATES[hub]
-            dest_text = self._format_destinations_text(hub_destinations)
+            dest_text = self._format_destinations_text(destinations_from_hub)
 
-            hover_text = f"{hub} (Hub)<br>Available Destinations: {len(hub_destinations)}<br>{dest_text}"
+            hover_text = f"{hub} (Hub)<br>Available Destinations: {len(destinations_from_hub)}<br>{dest_text}"
             airports_data.append(
                 self._create_airport_data(
                     hub, coords, AIRPORT_COLORS["hub"], hover_text
@@ -1001,16 +2003,17 @@ class FlightAnalytics:
             )
 
         # Add destinations reachable from hub
-        for dest in sorted(destinations_from_hub):
+        for route, dest in zip(hub_routes, destinations_from_hub):
             if dest in AIRPORT_COORDINATES:
-                outbound_flights = hub_outbound[hub_outbound["departure_to"] == dest]
-                inbound_flights = hub_inbound[hub_inbound["departure_from"] == dest]
+                return_route = matrix.route_index(dest, hub)
+                outbound_days = int(route_days[route])
+                inbound_days = int(route_days[return_route]) if return_route >= 0 else 0
 
-                outbound_prob, outbound_days = self._calculate_flight_probabilities(
-                    outbound_flights, total_collection_days
+                outbound_prob = self._calculate_probability(
+                    outbound_days, total_collection_days
                 )
-                inbound_prob, inbound_days = self._calculate_flight_probabilities(
-                    inbound_flights, total_collection_days
+                inbound_prob = self._calculate_probability(
+                    inbound_days, total_collection_days
                 )
 
                 coords = AIRPORT_COORDINATES[dest]
@@ -1033,21 +2036,23 @@ class FlightAnalytics:
         return airports_data
 
     def _get_destination_airports_data(
-        self, destination, filtered_data, total_collection_days
+        self, destination, total_collection_days, lo=0, hi=None
     ):
         """Get airport data when destination is selected"""
         airports_data = []
-        dest_inbound = filtered_data[filtered_data["departure_to"] == destination]
-        dest_outbound = self.data[self.data["departure_from"] == destination]
-        origins_to_dest = set(dest_inbound["departure_from"].unique())
+        matrix = self.matrix
+        route_days = self._route_days_between(lo, matrix.n_days if hi is None else hi)
+        dest_routes = self._routes_active_between(
+            matrix.routes_to(destination), route_days
+        )
+        origins_to_dest = [matrix.airports[o] for o in matrix.origins[dest_routes]]
 
         # Add destination airport
         if destination in AIRPORT_COORDINATES:
-            dest_origins = sorted(set(dest_inbound["departure_from"].unique()))
             coords = AIRPORT_COORDINATES[destination]
-            origins_text = self._format_destinations_text(dest_origins)
+            origins_text = self._format_destinations_text(origins_to_dest)
 
-            hover_text = f"{destination} (Destination)<br>Available Origins: {len(dest_origins)}<br>{origins_text}"
+            hover_text = f"{destination} (Destination)<br>Available Origins: {len(origins_to_dest)}<br>{origins_text}"
             airports_data.append(
                 self._create_airport_data(
                     destination, coords, AIRPORT_COLORS["destination"], hover_text, 15
@@ -1055,18 +2060,19 @@ class FlightAnalytics:
             )
 
         # Add origins that connect to destination
-        for origin in sorted(origins_to_dest):
+        for route, origin in zip(dest_routes, origins_to_dest):
             if origin in AIRPORT_COORDINATES:
-                inbound_flights = dest_inbound[dest_inbound["departure_from"] == origin]
-                outbound_flights = dest_outbound[
-                    dest_outbound["departure_to"] == origin
-                ]
+                return_route = matrix.route_index(destination, origin)
+                inbound_days = int(route_days[route])
+                outbound_days = (
+                    int(route_days[return_route]) if return_route >= 0 else 0
+                )
 
-                inbound_prob, inbound_days = self._calculate_flight_probabilities(
-                    inbound_flights, total_collection_days
+                inbound_prob = self._calculate_probability(
+                    inbound_days, total_collection_days
                 )
-                outbound_prob, outbound_days = self._calculate_flight_probabilities(
-                    outbound_flights, total_collection_days
+                outbound_prob = self._calculate_probability(
+                    outbound_days, total_collection_days
                 )
 
                 coords = AIRPORT_COORDINATES[origin]
@@ -1148,28 +2154,23 @@ class FlightAnalytics:
 
         return airports_data
 
-    def _get_all_airports_data(self, filtered_data, total_collection_days):
+    def _get_all_airports_data(self, total_collection_days, lo=0, hi=None):
         """Get airport data when no filters are applied"""
         airports_data = []
-        routes = filtered_data[["departure_from", "departure_to"]].drop_duplicates()
-        all_airports = set(
-            routes["departure_from"].tolist() + routes["departure_to"].tolist()
-        )
+        # Active days of every airport at once, from OR-reduced route rows
+        outbound_active = self.matrix.airport_active_days(True, lo, hi)
+        inbound_active = self.matrix.airport_active_days(False, lo, hi)
 
-        for airport in sorted(all_airports):
+        for airport_idx, airport in enumerate(self.matrix.airports):
             if airport in AIRPORT_COORDINATES:
-                outbound_flights = filtered_data[
-                    filtered_data["departure_from"] == airport
-                ]
-                inbound_flights = filtered_data[
-                    filtered_data["departure_to"] == airport
-                ]
+                outbound_days = int(outbound_active[airport_idx])
+                inbound_days = int(inbound_active[airport_idx])
 
-                outbound_prob, outbound_days = self._calculate_flight_probabilities(
-                    outbound_flights, total_collection_days
+                outbound_prob = self._calculate_probability(
+                    outbound_days, total_collection_days
                 )
-                inbound_prob, inbound_days = self._calculate_flight_probabilities(
-                    inbound_flights, total_collection_days
+                inbound_prob = self._calculate_probability(
+                    inbound_days, total_collection_days
                 )
 
                 coords = AIRPORT_COORDINATES[airport]
@@ -1194,34 +2195,37 @@ class FlightAnalytics:
 
         return airports_data
 
+    @timed
     def create_route_map(
-        self, hub: Optional[str] = None, destination: Optional[str] = None
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
     ) -> Optional[go.Figure]:
         """Create a route map showing flight routes with optional filtering"""
-        filtered_data = self.filter_data(hub, destination)
+        filtered_data = self.filter_data(hub, destination, period)
         if filtered_data.empty:
             return None
 
         # Get total collection days for accurate percentages
-        total_collection_days = len(self.data["collection_date"].unique())
+        lo, hi = self._date_window(period)
+        total_collection_days = hi - lo
 
         # Determine which airports to show based on filters
         if hub and not destination:
             airports_data = self._get_hub_airports_data(
-                hub, filtered_data, total_collection_days
+                hub, total_collection_days, lo, hi
             )
         elif destination and not hub:
             airports_data = self._get_destination_airports_data(
-                destination, filtered_data, total_collection_days
+                destination, total_collection_days, lo, hi
             )
         elif hub and destination:
             airports_data = self._get_hub_destination_airports_data(
                 hub, destination, filtered_data
             )
         else:
-            airports_data = self._get_all_airports_data(
-                filtered_data, total_collection_days
-            )
+            airports_data = self._get_all_airports_data(total_collection_days, lo, hi)
 
         airports_df = pd.DataFrame(airports_data)
         if airports_df.empty:
@@ -1300,67 +2304,62 @@ class FlightAnalytics:
         )
         return fig
 
-    def get_weekday_analysis(self, hub=None, destination=None):
+    @timed
+    @memoized
+    def get_weekday_analysis(self, hub=None, destination=None, period=None):
         """Analyze flights by weekday with different logic based on filtering"""
-        filtered_data = self.filter_data(hub, destination)
+        filtered_data = self.filter_data(hub, destination, period)
         if filtered_data.empty:
             return pd.DataFrame()
 
-        # Add weekday information
-        filtered_data = filtered_data.copy()
-        filtered_data["weekday"] = filtered_data["collection_date"].dt.day_name()
-        filtered_data["weekday_num"] = filtered_data["collection_date"].dt.dayofweek
-
         if hub and destination:
             # For hub+destination: Calculate percentage of days with flights for each direction
-            weekday_stats = []
-
-            for direction in [f"{hub} → {destination}", f"{destination} → {hub}"]:
-                direction_data = filtered_data[filtered_data["direction"] == direction]
-
-                for weekday_num, weekday_name in enumerate(WEEKDAY_ORDER):
-                    # Get all dates for this weekday in the data range
-                    all_dates = self.data["collection_date"].unique()
-                    weekday_dates = [
-                        d
-                        for d in all_dates
-                        if pd.to_datetime(d).dayofweek == weekday_num
-                    ]
-                    total_possible_days = len(weekday_dates)
-
-                    # Count how many of those days had flights
-                    days_with_flights = len(
-                        direction_data[direction_data["weekday_num"] == weekday_num][
-                            "collection_date"
-                        ].unique()
-                    )
-
-                    percentage = (
-                        (days_with_flights / total_possible_days * 100)
-                        if total_possible_days > 0
-                        else 0
-                    )
-
-                    weekday_stats.append(
-                        {
-                            "weekday": weekday_name,
-                            "weekday_num": weekday_num,
-                            "direction": direction,
-                            "percentage": percentage,
-                            "days_with_flights": days_with_flights,
-                            "total_days": total_possible_days,
-                        }
-                    )
+            directions = [f"{hub} → {destination}", f"{destination} → {hub}"]
 
-            return pd.DataFrame(weekday_stats)
+            # Collection days per weekday within the period
+            lo, hi = self._date_window(period)
+            total_days = np.bincount(self.available_weekdays[lo:hi], minlength=7)
+
+            # Distinct (direction, day) pairs, counted per weekday in one bincount
+            active_days = filtered_data[
+                ["direction", "collection_date"]
+            ].drop_duplicates()
+            direction_codes = pd.Categorical(
+                active_days["direction"], categories=directions
+            ).codes
+            weekdays = active_days["collection_date"].dt.dayofweek.to_numpy()
+            days_with_flights = np.bincount(
+                direction_codes * 7 + weekdays, minlength=2 * 7
+            ).reshape(2, 7)
+
+            percentage = np.zeros((2, 7))
+            np.divide(
+                days_with_flights, total_days, out=percentage, where=total_days > 0
+            )
+            percentage *= 100
+
+            return pd.DataFrame(
+                {
+                    "weekday": WEEKDAY_ORDER * 2,
+                    "weekday_num": np.tile(np.arange(7, dtype=np.int64), 2),
+                    "direction": [d for d in directions for _ in WEEKDAY_ORDER],
+                    "percentage": percentage.ravel(),
+                    "days_with_flights": days_with_flights.ravel().astype(np.int64),
+                    "total_days": np.tile(total_days, 2).astype(np.int64),
+                }
+            )
 
         else:
-            # For hub-only or no filtering: Calculate average flights per weekday
+            # For hub-only or no filtering: Calculate average flights per weekday,
+            # attaching weekday information to the per-day counts only
             weekday_counts = (
-                filtered_data.groupby(["collection_date", "weekday", "weekday_num"])
+                filtered_data.groupby("collection_date")
                 .size()
                 .reset_index(name="flight_count")
             )
+            collection_dates = weekday_counts["collection_date"].dt
+            weekday_counts.insert(1, "weekday", collection_dates.day_name())
+            weekday_counts.insert(2, "weekday_num", collection_dates.dayofweek)
             weekday_avg = (
                 weekday_counts.groupby(["weekday", "weekday_num"])["flight_count"]
                 .mean()
@@ -1370,9 +2369,10 @@ class FlightAnalytics:
 
             return weekday_avg
 
-    def create_weekday_chart(self, hub=None, destination=None):
+    @timed
+    def create_weekday_chart(self, hub=None, destination=None, period=None):
         """Create a chart showing weekday flight analysis"""
-        weekday_data = self.get_weekday_analysis(hub, destination)
+        weekday_data = self.get_weekday_analysis(hub, destination, period)
         if weekday_data.empty:
             return None
 
@@ -1428,12 +2428,1119 @@ class FlightAnalytics:
         return fig
 
 
+class AggregateFlightAnalytics(FlightAnalytics, abc.ABC):
+    """FlightAnalytics whose statistics come from per-day record counts.
+
+    Subclasses provide the counts (`_daily_counts`) and the records
+    (`filter_data`) from their storage; the daily, monthly, weekday and
+    interval statistics are then built without touching individual records.
+    """
+
+    @property
+    def has_data(self) -> bool:
+        return self.matrix.n_routes > 0
+
+    @abc.abstractmethod
+    def _daily_counts(
+        self, hub: Optional[str], destination: Optional[str], lo: int, hi: int
+    ) -> pd.DataFrame:
+        """Records per collection day matching the filter among date positions
+        lo..hi-1, as `date_idx` and `flight_count` columns, omitting days
+        without records; with both `hub` and `destination`, one row per day
+        and direction with a boolean `outbound` column (True for hub ->
+        destination)"""
+
+    @staticmethod
+    def _directions(hub: Optional[str], destination: Optional[str]) -> List[str]:
+        """Direction labels of a filter, as set by `filter_data`"""
+        if hub and destination:
+            return [f"{hub} → {destination}", f"{destination} → {hub}"]
+        if hub:
+            return [f"From {hub}"]
+        if destination:
+            return [f"To {destination}"]
+        return ["All Flights"]
+
+    def _with_record_columns(
+        self, records: pd.DataFrame, hub: Optional[str], destination: Optional[str]
+    ) -> pd.DataFrame:
+        """Add the date positions and direction labels `filter_data` returns"""
+        for date_col in [
+            "availability_start",
+            "availability_end",
+            "data_generated",
+            "collection_date",
+        ]:
+            records[date_col] = pd.to_datetime(records[date_col])
+        records["date_idx"] = pd.DatetimeIndex(self.available_dates).get_indexer(
+            records["collection_date"]
+        )
+
+        directions = self._directions(hub, destination)
+        if hub and destination:
+            records["direction"] = np.where(
+                records["departure_from"] == hub, directions[0], directions[1]
+            )
+        else:
+            records["direction"] = directions[0]
+        return records
+
+    def count_records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> int:
+        return int(self._count_by_day(hub, destination, period)["flight_count"].sum())
+
+    @memoized
+    def _route_day_records(self) -> pd.DataFrame:
+        # One record per route-day of the matrix, day-major
+        date_idx, route_ids = np.nonzero(
+            self.matrix.rows(np.arange(self.matrix.n_routes)).T
+        )
+        return pd.DataFrame(
+            {"route_id": route_ids, "date_idx": date_idx, "records": 1}
+        )
+
+    @memoized
+    def _count_by_day(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        """Records per (date position, direction) with at least one record,
+        within `period`"""
+        if not (
+            self._validate_location_exists(hub, "hub")
+            and self._validate_location_exists(destination, "destination")
+        ):
+            return pd.DataFrame(columns=["date_idx", "direction", "flight_count"])
+
+        counts = self._daily_counts(hub, destination, *self._date_window(period))
+        directions = self._directions(hub, destination)
+        if hub and destination:
+            direction = np.where(
+                counts["outbound"].astype(bool), directions[0], directions[1]
+            )
+        else:
+            direction = directions[0]
+        return pd.DataFrame(
+            {
+                "date_idx": counts["date_idx"].to_numpy(dtype=np.intp),
+                "direction": direction,
+                "flight_count": counts["flight_count"].to_numpy(dtype=np.int64),
+            }
+        )
+
+    @timed
+    @memoized
+    def get_daily_flight_counts(self, hub=None, destination=None, period=None):
+        counts = self._count_by_day(hub, destination, period)
+        if counts.empty:
+            return pd.DataFrame()
+
+        # Every collection date between the first and last day with records
+        first, last = counts["date_idx"].min(), counts["date_idx"].max()
+        dates = pd.DatetimeIndex(self.available_dates[first : last + 1])
+        directions = self._directions(hub, destination)
+        grid = np.zeros((len(dates), len(directions)), dtype=np.int64)
+        direction_codes = pd.Categorical(
+            counts["direction"], categories=directions
+        ).codes
+        grid[counts["date_idx"] - first, direction_codes] = counts["flight_count"]
+
+        if hub and destination:
+            return pd.DataFrame(
+                {
+                    "collection_date": np.repeat(dates, len(directions)),
+                    "direction": directions * len(dates),
+                    "flight_count": grid.ravel().astype(int),
+                }
+            )
+        return pd.DataFrame(
+            {
+                "collection_date": dates,
+                "flight_count": grid[:, 0].astype(int),
+                "direction": directions[0],
+            }
+        )
+
+    @timed
+    @memoized
+    def get_monthly_flight_counts(self, hub=None, destination=None, period=None):
+        counts = self._count_by_day(hub, destination, period)
+        if counts.empty:
+            return pd.DataFrame()
+
+        first_month, months, days_per_month = self._month_window(
+            *self._date_window(period)
+        )
+        n_months = len(months)
+        day_months = self._date_month_idx[counts["date_idx"].to_numpy()] - first_month
+        directions = self._directions(hub, destination)
+        direction_codes = pd.Categorical(
+            counts["direction"], categories=directions
+        ).codes
+        total_flights = np.bincount(
+            day_months * len(directions) + direction_codes,
+            weights=counts["flight_count"],
+            minlength=n_months * len(directions),
+        )
+
+        if hub and destination:
+            days_with_data = np.repeat(days_per_month, len(directions))
+            return pd.DataFrame(
+                {
+                    "month": np.repeat(months, len(directions)),
+                    "direction": directions * n_months,
+                    "total_flights": total_flights,
+                    "days_with_data": days_with_data,
+                    "flight_count": total_flights / days_with_data,
+                }
+            )
+        return pd.DataFrame(
+            {
+                "month": months,
+                "days_with_data": days_per_month,
+                "total_flights": total_flights,
+                "direction": directions[0],
+                "flight_count": total_flights,
+            }
+        )
+
+    @timed
+    @memoized
+    def get_data_collection_interval(self, hub=None, destination=None, period=None):
+        counts = self._count_by_day(hub, destination, period)
+        if counts.empty:
+            return None, None
+        return (
+            self.available_dates[counts["date_idx"].min()],
+            self.available_dates[counts["date_idx"].max()],
+        )
+
+    @timed
+    @memoized
+    def get_weekday_analysis(self, hub=None, destination=None, period=None):
+        counts = self._count_by_day(hub, destination, period)
+        if counts.empty:
+            return pd.DataFrame()
+
+        weekdays = self.available_weekdays[counts["date_idx"].to_numpy()]
+        if hub and destination:
+            directions = self._directions(hub, destination)
+            lo, hi = self._date_window(period)
+            total_days = np.bincount(self.available_weekdays[lo:hi], minlength=7)
+            direction_codes = pd.Categorical(
+                counts["direction"], categories=directions
+            ).codes
+            days_with_flights = np.bincount(
+                direction_codes * 7 + weekdays, minlength=2 * 7
+            ).reshape(2, 7)
+
+            percentage = np.zeros((2, 7))
+            np.divide(
+                days_with_flights, total_days, out=percentage, where=total_days > 0
+            )
+            percentage *= 100
+
+            return pd.DataFrame(
+                {
+                    "weekday": WEEKDAY_ORDER * 2,
+                    "weekday_num": np.tile(np.arange(7, dtype=np.int64), 2),
+                    "direction": [d for d in directions for _ in WEEKDAY_ORDER],
+                    "percentage": percentage.ravel(),
+                    "days_with_flights": days_with_flights.ravel().astype(np.int64),
+                    "total_days": np.tile(total_days, 2).astype(np.int64),
+                }
+            )
+
+        # Average over the days with records, as in the pandas backend
+        present = np.bincount(weekdays, minlength=7)
+        flights = np.bincount(weekdays, weights=counts["flight_count"], minlength=7)
+        order = np.flatnonzero(present)
+        return pd.DataFrame(
+            {
+                "weekday": [WEEKDAY_ORDER[i] for i in order],
+                "weekday_num": order.astype(np.int32),
+                "flight_count": flights[order] / present[order],
+            }
+        )
+
+
+class SQLFlightAnalytics(AggregateFlightAnalytics):
+    """FlightAnalytics answering queries from an embedded SQLite database.
+
+    Only the route x day matrix is held in memory; filtered records and daily
+    counts are read through the database indexes, so the cost of a query
+    follows its selectivity rather than the size of the corpus.
+    """
+
+    def __init__(
+        self,
+        data_path: Optional[Union[str, Path]] = None,
+        db_path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        if data_path is None:
+            data_path = self.find_data_path()
+        if db_path is None:
+            db_path = Path(data_path) / SQLITE_DEFAULT_NAME
+        self.store = FlightStore(db_path)
+        super().__init__(data_path)
+
+    @timed
+    def _load_data(self) -> None:
+        """Ingest new or changed CSV files and index the collection dates"""
+        self.data = pd.DataFrame()
+        self.available_dates = []
+        self.matrix = RouteMatrix.empty()
+        self._index_months()
+
+        try:
+            csv_files = list(self.data_path.glob("*.csv"))
+            result = self.store.ingest(self.data_path)
+        except (OSError, sqlite3.Error) as e:
+            st.error(f"Error ingesting {self.data_path} into {self.store.db_path}: {e}")
+            return
+
+        if result.failed:
+            st.warning(
+                f"Failed to load {len(result.failed)} files:\n"
+                + "\n".join(result.failed)
+            )
+
+        self.data_version = self._compute_data_version(csv_files)
+        self._memo.clear()
+        self.available_dates = list(pd.to_datetime(self.store.collection_dates()))
+        if not self.available_dates:
+            st.error("No valid data files could be loaded")
+            return
+        self._index_months()
+
+        route_days = self.store.route_days()
+        route_days["date_idx"] = pd.DatetimeIndex(self.available_dates).get_indexer(
+            pd.to_datetime(route_days["collection_date"])
+        )
+        self.matrix = RouteMatrix.from_frame(route_days, self.available_dates)
+
+    def _date_bounds(
+        self, lo: int, hi: int
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Inclusive ISO bounds of date positions lo..hi-1 (lo < hi) for the
+        store, None where the range reaches the end of the data"""
+        since = str(self._date_axis[lo]) if lo > 0 else None
+        until = str(self._date_axis[hi - 1]) if hi < len(self._date_axis) else None
+        return since, until
+
+    def _period_records(
+        self,
+        hub: Optional[str],
+        destination: Optional[str],
+        period: Period,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        lo, hi = self._date_window(period)
+        if hi <= lo:
+            return pd.DataFrame()
+        records = self.store.records(
+            hub, destination, limit, *self._date_bounds(lo, hi)
+        )
+        return self._with_record_columns(records, hub, destination)
+
+    @timed
+    @memoized
+    def filter_data(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        if not self._validate_location_exists(hub, "hub"):
+            return pd.DataFrame()
+        if not self._validate_location_exists(destination, "destination"):
+            return pd.DataFrame()
+        return self._period_records(hub, destination, period)
+
+    def preview_records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        n=100,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        if not (
+            self._validate_location_exists(hub, "hub")
+            and self._validate_location_exists(destination, "destination")
+        ):
+            return pd.DataFrame()
+        return self._period_records(hub, destination, period, limit=n)
+
+    @memoized
+    def _route_day_records(self) -> pd.DataFrame:
+        route_days = self.store.route_days()
+        records = pd.DataFrame(
+            {
+                "route_id": self.matrix.route_ids(
+                    route_days["departure_from"], route_days["departure_to"]
+                ),
+                "date_idx": pd.DatetimeIndex(self.available_dates).get_indexer(
+                    pd.to_datetime(route_days["collection_date"])
+                ),
+                "records": route_days["records"].to_numpy(dtype=np.int64),
+            }
+        )
+        return records.sort_values("date_idx", kind="stable", ignore_index=True)
+
+    @timed
+    @memoized
+    def get_travel_date_routes(
+        self,
+        travel_date,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> pd.DataFrame:
+        # A range query on the availability window index, not an in-memory index
+        return self.store.travel_routes(
+            pd.Timestamp(travel_date).date().isoformat(), hub, destination
+        )
+
+    def count_travel_date_snapshots(
+        self, origin: str, destination: str, travel_date
+    ) -> int:
+        return self.store.travel_snapshot_count(
+            origin, destination, pd.Timestamp(travel_date).date().isoformat()
+        )
+
+    def _daily_counts(
+        self, hub: Optional[str], destination: Optional[str], lo: int, hi: int
+    ) -> pd.DataFrame:
+        if hi <= lo:
+            return pd.DataFrame(
+                {"date_idx": [], "outbound": [], "flight_count": []}, dtype=np.int64
+            )
+        counts = self.store.daily_counts(hub, destination, *self._date_bounds(lo, hi))
+        counts["date_idx"] = pd.DatetimeIndex(self.available_dates).get_indexer(
+            pd.to_datetime(counts["collection_date"])
+        )
+        return counts
+
+
+class MappedFlightAnalytics(AggregateFlightAnalytics):
+    """FlightAnalytics over the route x day matrix file written by
+    `aggregate.py --index-out` (or `main.py index`), opened with numpy.memmap.
+
+    Nothing is parsed at startup: workers on one host share the file's pages
+    through the OS page cache. Every record is one route on one collection
+    day, so counts come straight from the matrix; the availability window
+    timestamps are not part of the file and show up as NaT.
+    """
+
+    def __init__(
+        self,
+        data_path: Optional[Union[str, Path]] = None,
+        matrix_path: Optional[Union[str, Path]] = None,
+    ) -> None:
+        if data_path is None:
+            data_path = self.find_data_path()
+        self.matrix_path = (
+            Path(matrix_path)
+            if matrix_path is not None
+            else self.default_matrix_path(data_path)
+        )
+        super().__init__(data_path)
+
+    @staticmethod
+    def default_matrix_path(data_path: Union[str, Path]) -> Path:
+        return Path(data_path).parent / MATRIX_DEFAULT_NAME
+
+    @classmethod
+    def data_version_for(cls, matrix_path: Path) -> str:
+        """Data version stored in the header of the matrix file"""
+        try:
+            return read_matrix_header(matrix_path)["version"]
+        except (OSError, ValueError):
+            return ""
+
+    @timed
+    def _load_data(self) -> None:
+        """Map the matrix file and index its collection dates"""
+        self.data = pd.DataFrame()
+        self.available_dates = []
+        self.matrix = RouteMatrix.empty()
+        self._index_months()
+
+        try:
+            self.matrix, self.data_version = RouteMatrix.open(self.matrix_path)
+        except (OSError, ValueError) as e:
+            st.error(f"Error opening route matrix {self.matrix_path}: {e}")
+            return
+
+        self._memo.clear()
+        # Parsed from text like the other backends, so the datetime unit matches
+        self.available_dates = list(pd.to_datetime(self.matrix.dates.astype(str)))
+        self._index_months()
+
+    @property
+    def has_travel_dates(self) -> bool:
+        # The matrix file has no availability windows
+        return False
+
+    def _travel_windows(self) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def _selected_routes(
+        self, hub: Optional[str], destination: Optional[str]
+    ) -> np.ndarray:
+        if hub and destination:
+            ids = [
+                self.matrix.route_index(hub, destination),
+                self.matrix.route_index(destination, hub),
+            ]
+            return np.array([r for r in ids if r >= 0], dtype=np.intp)
+        if hub:
+            return self.matrix.routes_from(hub)
+        if destination:
+            return self.matrix.routes_to(destination)
+        return np.arange(self.matrix.n_routes)
+
+    @timed
+    @memoized
+    def filter_data(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        if not self._validate_location_exists(hub, "hub"):
+            return pd.DataFrame()
+        if not self._validate_location_exists(destination, "destination"):
+            return pd.DataFrame()
+
+        route_ids = self._selected_routes(hub, destination)
+        lo, hi = self._date_window(period)
+        # (day, route) pairs in collection date order
+        day_idx, row_idx = np.nonzero(self.matrix.rows(route_ids, lo, hi).T)
+        day_idx += lo
+        routes = route_ids[row_idx]
+        airports = np.array(self.matrix.airports, dtype=object)
+        records = pd.DataFrame(
+            {
+                "departure_from": airports[self.matrix.origins[routes]],
+                "departure_to": airports[self.matrix.destinations[routes]],
+                "availability_start": pd.NaT,
+                "availability_end": pd.NaT,
+                "data_generated": pd.NaT,
+                "collection_date": pd.DatetimeIndex(self.available_dates)[day_idx],
+                "date_idx": day_idx,
+            }
+        )
+        directions = self._directions(hub, destination)
+        if hub and destination:
+            records["direction"] = np.where(
+                records["departure_from"] == hub, directions[0], directions[1]
+            )
+        else:
+            records["direction"] = directions[0]
+        return records
+
+    def _daily_counts(
+        self, hub: Optional[str], destination: Optional[str], lo: int, hi: int
+    ) -> pd.DataFrame:
+        route_ids = self._selected_routes(hub, destination)
+        presence = self.matrix.rows(route_ids, lo, hi)
+        if hub and destination:
+            route_pos, day_idx = np.nonzero(presence)
+            day_idx += lo
+            outbound = route_ids[route_pos] == self.matrix.route_index(
+                hub, destination
+            )
+            return pd.DataFrame(
+                {"date_idx": day_idx, "outbound": outbound, "flight_count": 1}
+            )
+        per_day = presence.sum(axis=0, dtype=np.int64)
+        day_idx = np.flatnonzero(per_day)
+        return pd.DataFrame(
+            {"date_idx": day_idx + lo, "flight_count": per_day[day_idx]}
+        )
+
+
+class StreamingFlightAnalytics(AggregateFlightAnalytics):
+    """FlightAnalytics for corpora too large to load as one DataFrame.
+
+    The CSV files are read `chunk_rows` rows at a time and every chunk is
+    reduced straight into record counts per route and collection day (see
+    chunkedcsv.py), from which the route x day matrix and all count
+    statistics are built, so peak memory follows the chunk size rather than
+    the corpus. Individual records are streamed back from the files of the
+    requested period when a view shows them; availability windows are not
+    kept.
+    """
+
+    def __init__(
+        self,
+        data_path: Optional[Union[str, Path]] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> None:
+        self.chunk_rows = chunk_rows
+        super().__init__(data_path)
+
+    @timed
+    def _load_data(self) -> None:
+        """Reduce the CSV files chunk by chunk and index the collection dates"""
+        self.data = pd.DataFrame()
+        self.available_dates = []
+        self.matrix = RouteMatrix.empty()
+        self._route_days = RouteDayCounts()
+        self._route_day_ids = np.array([], dtype=np.intp)
+        self._file_date_idx = np.array([], dtype=np.intp)
+        self._index_months()
+
+        try:
+            csv_files = list(self.data_path.glob("*.csv"))
+        except (OSError, PermissionError) as e:
+            st.error(f"Error accessing data directory {self.data_path}: {e}")
+            return
+
+        if not csv_files:
+            st.error(f"No CSV files found in {self.data_path}")
+            return
+
+        self.data_version = self._compute_data_version(csv_files)
+        self._memo.clear()
+
+        route_days = reduce_route_days(csv_files, self.chunk_rows)
+        if route_days.failed:
+            st.warning(
+                f"Failed to load {len(route_days.failed)} files:\n"
+                + "\n".join(route_days.failed)
+            )
+        if not len(route_days.dates):
+            st.error("No valid data files could be loaded")
+            return
+
+        self._route_days = route_days
+        self.available_dates = list(route_days.dates)
+        self._index_months()
+        self.matrix = RouteMatrix.from_codes(
+            route_days.airports,
+            route_days.origins,
+            route_days.destinations,
+            route_days.date_idx,
+            self._date_axis,
+        )
+        # Matrix row of every route-day, and date position of every file
+        self._route_day_ids = self.matrix.route_ids_from_codes(
+            route_days.origins, route_days.destinations
+        )
+        self._file_date_idx = route_days.dates.get_indexer(
+            [file.collection_date for file in route_days.files]
+        )
+
+    @property
+    def has_travel_dates(self) -> bool:
+        # Availability windows are not kept by the chunked reduction
+        return False
+
+    def _travel_windows(self) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    @memoized
+    def _route_day_records(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "route_id": self._route_day_ids,
+                "date_idx": self._route_days.date_idx,
+                "records": self._route_days.records,
+            }
+        )
+
+    def _period_records(
+        self,
+        hub: Optional[str],
+        destination: Optional[str],
+        period: Period,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Records matching the filter, read from the files of `period` only"""
+        lo, hi = self._date_window(period)
+        start, stop = np.searchsorted(self._file_date_idx, [lo, hi])
+
+        def keep(chunk: pd.DataFrame) -> np.ndarray:
+            origins, destinations = chunk["departure_from"], chunk["departure_to"]
+            if hub and destination:
+                return (
+                    ((origins == hub) & (destinations == destination))
+                    | ((origins == destination) & (destinations == hub))
+                ).to_numpy()
+            if hub:
+                return (origins == hub).to_numpy()
+            if destination:
+                return (destinations == destination).to_numpy()
+            return np.ones(len(chunk), dtype=bool)
+
+        records = read_records(
+            self._route_days.files[start:stop], keep, limit, self.chunk_rows
+        )
+        return self._with_record_columns(records, hub, destination)
+
+    @timed
+    @memoized
+    def filter_data(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        if not self._validate_location_exists(hub, "hub"):
+            return pd.DataFrame()
+        if not self._validate_location_exists(destination, "destination"):
+            return pd.DataFrame()
+        return self._period_records(hub, destination, period)
+
+    def preview_records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        n=100,
+        period: Period = None,
+    ) -> pd.DataFrame:
+        if not (
+            self._validate_location_exists(hub, "hub")
+            and self._validate_location_exists(destination, "destination")
+        ):
+            return pd.DataFrame()
+        return self._period_records(hub, destination, period, limit=n)
+
+    def _daily_counts(
+        self, hub: Optional[str], destination: Optional[str], lo: int, hi: int
+    ) -> pd.DataFrame:
+        # Route-days are sorted by day, so the window is one slice
+        start, stop = np.searchsorted(self._route_days.date_idx, [lo, hi])
+        route_ids = self._route_day_ids[start:stop]
+        date_idx = self._route_days.date_idx[start:stop]
+        records = self._route_days.records[start:stop]
+        if hub and destination:
+            outbound_id = self.matrix.route_index(hub, destination)
+            inbound_id = self.matrix.route_index(destination, hub)
+            keep = (route_ids == outbound_id) | (route_ids == inbound_id)
+            return pd.DataFrame(
+                {
+                    "date_idx": date_idx[keep],
+                    "outbound": route_ids[keep] == outbound_id,
+                    "flight_count": records[keep],
+                }
+            )
+        selected = self.matrix.route_mask(
+            (hub,) if hub else (), (destination,) if destination else ()
+        )[route_ids]
+        per_day = np.bincount(
+            date_idx[selected] - lo,
+            weights=records[selected],
+            minlength=max(hi - lo, 0),
+        ).astype(np.int64)
+        day_idx = np.flatnonzero(per_day)
+        return pd.DataFrame(
+            {"date_idx": day_idx + lo, "flight_count": per_day[day_idx]}
+        )
+
+
+def analytics_backend() -> str:
+    return os.environ.get(BACKEND_ENV_VAR, "pandas").lower()
+
+
+def analytics_source(data_path: Path, backend: str) -> Tuple[Path, str]:
+    """Path the backend loads from, and the version of the data there"""
+    if backend == "mmap":
+        matrix_path = Path(
+            os.environ.get(MATRIX_PATH_ENV_VAR)
+            or MappedFlightAnalytics.default_matrix_path(data_path)
+        )
+        return matrix_path, MappedFlightAnalytics.data_version_for(matrix_path)
+    return data_path, FlightAnalytics.data_version_for(data_path)
+
+
+@st.cache_resource(max_entries=1, show_spinner="Loading flight data...")
+def load_analytics(
+    source: str, data_version: str, backend: str = "pandas"
+) -> FlightAnalytics:
+    """FlightAnalytics shared by all sessions until the data version changes;
+    `source` is the path from `analytics_source`"""
+    if backend == "sqlite":
+        return SQLFlightAnalytics(source, os.environ.get(SQLITE_PATH_ENV_VAR))
+    if backend == "mmap":
+        return MappedFlightAnalytics(matrix_path=source)
+    if backend == "stream":
+        return StreamingFlightAnalytics(source, stream_chunk_rows())
+    return FlightAnalytics(source)
+
+
+def stream_chunk_rows() -> int:
+    try:
+        return max(int(os.environ.get(CHUNK_ROWS_ENV_VAR, DEFAULT_CHUNK_ROWS)), 1)
+    except ValueError:
+        return DEFAULT_CHUNK_ROWS
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    return FigureCache(FIGURE_CACHE_MAX_ENTRIES, FIGURE_CACHE_MAX_BYTES)
+
+
+def figure_warmup_hubs() -> int:
+    try:
+        return int(os.environ.get(FIGURE_WARMUP_ENV_VAR, "0"))
+    except ValueError:
+        return 0
+
+
+def show_chart(fig: go.Figure, name: str) -> None:
+    """Render a Plotly figure, recording its payload size for the perf panel"""
+    current_perf().record_figure(name, fig)
+    st.plotly_chart(fig, config=CHART_CONFIG, use_container_width=True)
+
+
+def render_route_run_stats(
+    analytics: FlightAnalytics, hub: str, destination: str, period: Period = None
+) -> None:
+    """Streak and gap statistics of both directions of a route within the
+    period"""
+    columns = st.columns(2)
+    for column, (origin, target) in zip(
+        columns, [(hub, destination), (destination, hub)]
+    ):
+        stats = analytics.get_route_run_stats(origin, target, 30, period)
+        with column:
+            st.markdown(f"**{origin} → {target}**")
+            if stats is None:
+                st.write("Not available in the date range")
+                continue
+            last_seen = pd.Timestamp(stats["last_seen"]).strftime("%Y-%m-%d")
+            st.write(
+                f"Last seen {last_seen} · "
+                f"current streak {stats['current_streak']} days · "
+                f"longest streak {stats['longest_streak']} days · "
+                f"longest gap {stats['longest_gap']} days · "
+                f"{stats['availability_ratio']:.0%} of the range's last 30 collection days"
+            )
+
+
+def render_connections(
+    analytics: FlightAnalytics, hub: str, destination: str, period: Period = None
+) -> None:
+    """Direct and connecting trips from hub to destination within the period"""
+    max_stops = 2 if st.checkbox("Include two-stop trips") else 1
+    connections = analytics.get_connections(hub, destination, max_stops, period)
+    if connections.empty:
+        st.warning(f"No trips from {hub} to {destination} with all legs on one day.")
+        return
+    st.write(
+        "Trips whose legs were all available on the same collection day; "
+        "days = how many days that happened, reliability = product of each "
+        "leg's availability over the collection days of the date range"
+    )
+    st.dataframe(
+        connections.head(50),
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "reliability": st.column_config.NumberColumn(format="percent")
+        },
+    )
+
+
+def render_alternative_routes(
+    analytics: FlightAnalytics, hub: str, destination: str, period: Period = None
+) -> None:
+    """Routes with availability most similar to hub -> destination within the
+    period"""
+    rank_by = st.radio(
+        "Rank by",
+        ["Similar availability", "Fills the gaps"],
+        horizontal=True,
+        help="Fills the gaps: available on the days this route was not",
+    )
+    alternatives = analytics.get_alternative_routes(
+        hub,
+        destination,
+        by="coverage" if rank_by == "Fills the gaps" else "similarity",
+        period=period,
+    )
+    if alternatives.empty:
+        st.warning(f"{hub} → {destination} was not available in the date range.")
+        return
+    st.dataframe(
+        alternatives,
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "similarity": st.column_config.NumberColumn(format="percent"),
+            "coverage": st.column_config.NumberColumn(format="percent"),
+        },
+    )
+
+
+def render_area_availability(
+    analytics: FlightAnalytics,
+    hub: Optional[str],
+    destination: Optional[str],
+    period: Period = None,
+) -> None:
+    """Availability of all routes between the areas around hub and destination
+    within the period"""
+    radius_km = st.slider("Radius (km)", 0, 500, NEARBY_RADIUS_KM, step=25)
+    routes, any_days = analytics.get_area_availability(
+        hub, destination, radius_km, period
+    )
+    if routes.empty:
+        st.warning("No routes between the selected areas.")
+        return
+    ends = [
+        f"{direction} within {radius_km} km of {name}"
+        for direction, name in (("from", hub), ("to", destination))
+        if name is not None
+    ]
+    lo, hi = analytics._date_window(period)
+    n_days = max(hi - lo, 1)
+    st.metric(
+        f"Days with any flight {' '.join(ends)}",
+        f"{any_days} of {n_days} ({any_days / n_days:.0%})",
+    )
+    st.dataframe(
+        routes,
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "availability": st.column_config.NumberColumn(format="percent")
+        },
+    )
+
+
+def render_top_routes(
+    analytics: FlightAnalytics,
+    hub: Optional[str],
+    destination: Optional[str],
+    period: Period = None,
+) -> None:
+    """Routes most reliably available over the end of the period"""
+    window_days = st.radio(
+        "Over the last",
+        RANKING_WINDOWS,
+        format_func=lambda n: f"{n} collection days",
+        horizontal=True,
+        help="Counted back from the end of the date range",
+    )
+    top = analytics.get_top_routes(window_days, RANKING_SIZE, hub, destination, period)
+    if top.empty:
+        st.warning(f"No flights in the last {window_days} collection days.")
+        return
+    # Numbered from 1 as ranks
+    st.dataframe(
+        top.set_axis(range(1, len(top) + 1)),
+        width="stretch",
+        column_config={
+            "availability": st.column_config.NumberColumn(format="percent")
+        },
+    )
+
+
+def render_round_trips(
+    analytics: FlightAnalytics,
+    hub: Optional[str],
+    destination: Optional[str],
+    period: Period = None,
+) -> None:
+    """Most feasible round trips for the selected filters and period"""
+    col1, col2 = st.columns(2)
+    with col1:
+        return_days = st.slider("Return within (days)", 1, 14, 3)
+    with col2:
+        weekend = st.checkbox(
+            "Weekend trips", help="Only outbound flights on Friday or Saturday"
+        )
+    round_trips = analytics.get_round_trips(
+        hub, destination, return_days, (4, 5) if weekend else None, period
+    )
+    if round_trips.empty:
+        st.warning("No round trips for the selected filters.")
+        return
+    st.dataframe(
+        round_trips.head(50),
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "probability": st.column_config.NumberColumn(format="percent")
+        },
+    )
+
+
+def render_travel_date_routes(
+    analytics: FlightAnalytics, hub: Optional[str], destination: Optional[str]
+) -> None:
+    """Routes advertised for travel on a chosen date, most advertised first"""
+    # No default, so the window index is only built once a date is picked
+    travel_date = st.date_input("Travel date", value=None)
+    if travel_date is None:
+        return
+    routes = analytics.get_travel_date_routes(travel_date, hub, destination)
+    if routes.empty:
+        st.warning("No flights were advertised for travel on this date.")
+        return
+    st.write(
+        f"{len(routes)} routes advertised for travel on "
+        f"{travel_date.strftime('%Y-%m-%d')}; snapshots = number of daily "
+        "snapshots whose availability window covered the date"
+    )
+    st.dataframe(routes, width="stretch", hide_index=True)
+
+
+def render_selection(
+    analytics: FlightAnalytics,
+    figures: FigureCache,
+    origins: Tuple[str, ...],
+    destinations: Tuple[str, ...],
+    period: Period = None,
+) -> None:
+    """Combined statistics of every route from any of `origins` to any of
+    `destinations`, over `period`"""
+    daily_counts = analytics.get_selection_daily_counts(origins, destinations, period)
+    if daily_counts.empty:
+        st.warning("No data available for the selected filters.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Average Daily Flights", f"{daily_counts['flight_count'].mean():.2f}")
+    with col2:
+        start_date = daily_counts["collection_date"].iloc[0]
+        end_date = daily_counts["collection_date"].iloc[-1]
+        st.metric("Data Collection Period", f"{(end_date - start_date).days + 1} days")
+    with col3:
+        st.metric("Total Flight Records", f"{daily_counts['flight_count'].sum():,}")
+
+    st.markdown("---")
+    st.subheader("📊 Flight Analytics")
+    visible_range = None
+    first = daily_counts["collection_date"].iloc[0].date()
+    last = daily_counts["collection_date"].iloc[-1].date()
+    if first < last:
+        selected = st.slider(
+            "Visible range",
+            min_value=first,
+            max_value=last,
+            value=(first, last),
+            help="Long ranges are downsampled; narrow the range for full detail",
+        )
+        if selected != (first, last):
+            visible_range = selected
+    for kind, args in [
+        ("selection_daily", (origins, destinations, visible_range, period)),
+        ("selection_monthly", (origins, destinations, period)),
+        ("selection_weekday", (origins, destinations, period)),
+    ]:
+        chart = figures.get(analytics, kind, *args)
+        if chart:
+            show_chart(chart, kind)
+
+    st.markdown("---")
+    routes = analytics.get_selection_routes(origins, destinations, period)
+    st.subheader(f"🛫 {len(routes)} Routes")
+    st.dataframe(
+        routes,
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "availability": st.column_config.NumberColumn(format="percent")
+        },
+    )
+
+
+def select_period(analytics: FlightAnalytics) -> Period:
+    """Collection date range picked by the user; None when it spans every
+    collection day or is still being picked"""
+    dates = analytics.available_dates
+    if len(dates) < 2:
+        return None
+    first, last = pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[-1]).date()
+    selected = st.date_input(
+        "Date Range",
+        value=(first, last),
+        min_value=first,
+        max_value=last,
+        help="Only count flights collected between these dates",
+    )
+    # A single date while the end of the range is still being picked
+    if not isinstance(selected, tuple) or len(selected) != 2:
+        return None
+    if selected == (first, last):
+        return None
+    return selected
+
+
+def render_perf_panel(perf: PerfRecorder) -> None:
+    """Show per-section timings, figure payload sizes and cache statistics"""
+    total_ms = (time.perf_counter() - perf.started) * 1000
+    with st.expander(f"⏱️ Performance ({total_ms:.0f} ms this rerun)", expanded=True):
+        if perf.timings:
+            timings = pd.DataFrame(
+                perf.timings, columns=["section", "depth", "seconds"]
+            )
+            summary = (
+                timings.groupby("section")
+                .agg(
+                    calls=("seconds", "size"),
+                    total_ms=("seconds", "sum"),
+                    max_ms=("seconds", "max"),
+                    depth=("depth", "min"),
+                )
+                .sort_values("total_ms", ascending=False)
+            )
+            summary[["total_ms", "max_ms"]] = (
+                summary[["total_ms", "max_ms"]] * 1000
+            ).round(1)
+            st.markdown("**Sections** (nested sections are included in their callers)")
+            st.dataframe(summary, width="stretch")
+
+        if perf.figure_sizes:
+            sizes = pd.DataFrame(
+                [
+                    {"figure": name, "size_kb": round(size / 1024, 1)}
+                    for name, size in perf.figure_sizes.items()
+                ]
+            )
+            st.markdown("**Figure payloads** (serialized JSON)")
+            st.dataframe(sizes, hide_index=True, width="stretch")
+
+        if perf.cache_stats:
+            caches = pd.DataFrame(
+                [
+                    {
+                        "cache": name,
+                        "hits": stats["hits"],
+                        "misses": stats["misses"],
+                        "hit_rate": round(
+                            stats["hits"] / (stats["hits"] + stats["misses"]) * 100, 1
+                        ),
+                    }
+                    for name, stats in perf.cache_stats.items()
+                ]
+            )
+            st.markdown("**Caches**")
+            st.dataframe(caches, hide_index=True, width="stretch")
+        else:
+            st.caption("No cache activity recorded during this rerun.")
+
+
 def main() -> None:
     title = APP_CONFIG["page_title"]
     st.set_page_config(
         page_title=title, page_icon=APP_CONFIG["page_icon"], layout=APP_CONFIG["layout"]
     )
 
+    perf = PerfRecorder(enabled=perf_panel_enabled())
+    set_current_perf(perf)
+
     st.title(f"✈️ {title}")
 
     st.markdown(
@@ -1483,13 +3590,18 @@ def main() -> None:
     )
     st.markdown("---")
 
-    # Initialize analytics
-    analytics = FlightAnalytics()
+    # Initialize analytics, reloading only when the CSV files change
+    backend = analytics_backend()
+    source, data_version = analytics_source(FlightAnalytics.find_data_path(), backend)
+    analytics = load_analytics(str(source), data_version, backend)
 
-    if analytics.data.empty:
+    if not analytics.has_data:
         st.error("No data available. Please check the data directory.")
         return
 
+    figures = get_figure_cache()
+    figures.warm_up(analytics, figure_warmup_hubs())
+
     # Get unique locations for selectors
     departures, destinations = analytics.get_unique_locations()
 
@@ -1498,30 +3610,41 @@ def main() -> None:
     col1, col2 = st.columns(2)
 
     with col1:
-        selected_hub = st.selectbox(
-            "Select Hub (Optional)",
-            options=["All"] + departures,
-            index=0,
-            help="Filter flights departing from this hub",
+        selected_hubs = st.multiselect(
+            "Select Hubs (Optional)",
+            options=departures,
+            placeholder="All",
+            help="Filter flights departing from any of these hubs",
         )
-        hub = None if selected_hub == "All" else selected_hub
 
     with col2:
-        selected_destination = st.selectbox(
-            "Select Destination (Optional)",
-            options=["All"] + destinations,
-            index=0,
-            help="Filter flights arriving at this destination",
+        selected_destinations = st.multiselect(
+            "Select Destinations (Optional)",
+            options=destinations,
+            placeholder="All",
+            help="Filter flights arriving at any of these destinations",
         )
-        destination = None if selected_destination == "All" else selected_destination
+
+    period = select_period(analytics)
 
     st.markdown("---")
 
+    # Sorted, so the same selection in any order shares cached results
+    hubs, dests = tuple(sorted(selected_hubs)), tuple(sorted(selected_destinations))
+    if len(hubs) > 1 or len(dests) > 1:
+        render_selection(analytics, figures, hubs, dests, period)
+        if perf.enabled:
+            render_perf_panel(perf)
+        return
+    # A single airport per side keeps the detailed hub / destination views
+    hub = hubs[0] if hubs else None
+    destination = dests[0] if dests else None
+
     # Main statistics (filtered)
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        avg_flights = analytics.get_average_daily_flights(hub, destination)
+        avg_flights = analytics.get_average_daily_flights(hub, destination, period)
         if isinstance(avg_flights, dict):
             # Both hub and destination selected - show both directions
             st.metric(
@@ -1536,7 +3659,9 @@ def main() -> None:
             st.metric("Average Daily Flights", f"{avg_flights:.2f}")
 
     with col2:
-        start_date, end_date = analytics.get_data_collection_interval(hub, destination)
+        start_date, end_date = analytics.get_data_collection_interval(
+            hub, destination, period
+        )
         if start_date and end_date:
             days = (end_date - start_date).days + 1
             st.metric("Data Collection Period", f"{days} days")
@@ -1544,8 +3669,7 @@ def main() -> None:
             st.metric("Data Collection Period", "N/A")
 
     with col3:
-        filtered_data = analytics.filter_data(hub, destination)
-        total_records = len(filtered_data)
+        total_records = analytics.count_records(hub, destination, period)
         st.metric("Total Flight Records", f"{total_records:,}")
 
     st.markdown("---")
@@ -1567,37 +3691,84 @@ def main() -> None:
     # Daily flights chart (filtered)
     # Two-city special case: render a binary timeline heatmap instead of a line chart.
     if hub and destination:
-        chart = analytics.create_route_timeline_chart(hub, destination)
+        chart = figures.get(analytics, "route_timeline", hub, destination, period)
         if chart:
-            st.plotly_chart(chart, config=CHART_CONFIG, use_container_width=True)
+            show_chart(chart, "route_timeline")
             st.markdown(
                 "**Each cell = one day.**\n"
                 "- 🟦 **Flight available**\n"
                 "- ⬜ **No flight**\n"
                 "- ◽ **No data collected**"
             )
+            render_route_run_stats(analytics, hub, destination, period)
         else:
             st.warning("No data available for the selected filters.")
+        # Also useful when there is no direct flight at all
+        with st.expander(f"🔀 Connections from {hub} to {destination}"):
+            render_connections(analytics, hub, destination, period)
+        with st.expander(f"🔁 Alternatives to {hub} → {destination}"):
+            render_alternative_routes(analytics, hub, destination, period)
     else:
-        chart = analytics.create_daily_flights_chart(hub, destination)
+        visible_range = None
+        lo, hi = analytics._date_window(period)
+        dates = analytics.available_dates[lo:hi]
+        if len(dates) > 1:
+            first, last = pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[-1]).date()
+            selected = st.slider(
+                "Visible range",
+                min_value=first,
+                max_value=last,
+                value=(first, last),
+                help="Long ranges are downsampled; narrow the range for full detail",
+            )
+            if selected != (first, last):
+                visible_range = selected
+        chart = figures.get(
+            analytics, "daily_flights", hub, destination, visible_range, period
+        )
         if chart:
-            st.plotly_chart(chart, config=CHART_CONFIG, use_container_width=True)
+            show_chart(chart, "daily_flights")
         else:
             st.warning("No data available for the selected filters.")
 
+        # Hub-only or destination-only: optionally stack every matching route
+        if hub or destination:
+            if st.checkbox(
+                "Compare routes on a timeline",
+                help="One row per route, most available first",
+            ):
+                timeline_routes = analytics.get_timeline_routes(
+                    hub, destination, period
+                )
+                chart = figures.get(
+                    analytics,
+                    "multi_route_timeline",
+                    tuple(timeline_routes),
+                    analytics._generate_chart_title(
+                        "Daily Flight Availability by Route", hub, destination
+                    ),
+                    period,
+                )
+                if chart:
+                    show_chart(chart, "multi_route_timeline")
+                else:
+                    st.warning("No routes available for the selected filters.")
+
     # Monthly flights chart
     st.markdown("---")
-    monthly_chart = analytics.create_monthly_flights_chart(hub, destination)
+    monthly_chart = figures.get(
+        analytics, "monthly_flights", hub, destination, period
+    )
     if monthly_chart:
-        st.plotly_chart(monthly_chart, config=CHART_CONFIG, use_container_width=True)
+        show_chart(monthly_chart, "monthly_flights")
     else:
         st.warning("No monthly data available for the selected filters.")
 
     # Weekday analysis chart
     st.markdown("---")
-    weekday_chart = analytics.create_weekday_chart(hub, destination)
+    weekday_chart = figures.get(analytics, "weekday", hub, destination, period)
     if weekday_chart:
-        st.plotly_chart(weekday_chart, config=CHART_CONFIG, use_container_width=True)
+        show_chart(weekday_chart, "weekday")
     else:
         st.warning("No weekday data available for the selected filters.")
 
@@ -1606,18 +3777,38 @@ def main() -> None:
     # Only show map if not both hub and destination are selected (not useful for single route)
     if not (hub and destination):
         st.subheader("🗺️ Airport Map")
-        route_map = analytics.create_route_map(hub, destination)
+        route_map = figures.get(analytics, "route_map", hub, destination, period)
         if route_map:
-            st.plotly_chart(route_map, config=CHART_CONFIG, use_container_width=True)
+            show_chart(route_map, "route_map")
 
             # Add legend information
             st.info("🔴 Hub airport | 🔵 Other airports")
         else:
             st.warning("No airport data available for the selected filters.")
 
+    # Route rankings (filtered; a single route has nothing to rank)
+    if not (hub and destination):
+        st.markdown("---")
+        st.subheader("🏆 Most Reliable Routes")
+        render_top_routes(analytics, hub, destination, period)
+
+    # Flights between the areas around the selected airports
+    if hub or destination:
+        with st.expander("📍 Nearby Airports"):
+            render_area_availability(analytics, hub, destination, period)
+
+    # Round trips (filtered)
+    with st.expander("🔁 Round Trips"):
+        render_round_trips(analytics, hub, destination, period)
+
+    # Routes by travel date (filtered); not every backend keeps the windows
+    if analytics.has_travel_dates:
+        with st.expander("🧳 Routes by Travel Date"):
+            render_travel_date_routes(analytics, hub, destination)
+
     # Data preview (filtered)
     with st.expander("📋 Data Preview"):
-        filtered_data = analytics.filter_data(hub, destination)
+        filtered_data = analytics.preview_records(hub, destination, period=period)
         if not filtered_data.empty:
             # Show relevant columns for preview
             preview_cols = [
@@ -1630,10 +3821,13 @@ def main() -> None:
             if "direction" in filtered_data.columns:
                 preview_cols.append("direction")
 
-            st.dataframe(filtered_data[preview_cols].head(100), width="stretch")
+            st.dataframe(filtered_data[preview_cols], width="stretch")
         else:
             st.warning("No data available for the selected filters.")
 
+    if perf.enabled:
+        render_perf_panel(perf)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,236 @@
+"""Chunked reading of the CSV snapshots, for corpora larger than memory.
+
+Files are read `chunk_rows` rows at a time with `usecols`, so only the needed
+columns are parsed, and with explicit dtypes: airport names as categoricals,
+timestamps as strings until a chunk's records are kept. `reduce_route_days`
+folds every chunk straight into record counts per (route, collection day): a
+chunk becomes at most one entry per route, so peak memory follows the chunk
+size and the number of distinct route-days, never the number of records.
+`read_records` streams the records of selected routes back out of the files
+of a date range, for the views that show individual records.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = (
+    "departure_from",
+    "departure_to",
+    "availability_start",
+    "availability_end",
+)
+ROUTE_COLUMNS = ["departure_from", "departure_to"]
+RECORD_COLUMNS = ROUTE_COLUMNS + [
+    "availability_start",
+    "availability_end",
+    "data_generated",
+]
+DATETIME_COLUMNS = ["availability_start", "availability_end", "data_generated"]
+DEFAULT_CHUNK_ROWS = 100_000
+# Airport names repeat on every row; categoricals store each name once
+COLUMN_DTYPES = {
+    "departure_from": "category",
+    "departure_to": "category",
+    "availability_start": str,
+    "availability_end": str,
+    "data_generated": str,
+}
+# Route keys pack the origin code in the high and the destination in the low
+# 32 bits, so they can be built before the number of airports is known
+ROUTE_KEY_SHIFT = 32
+
+
+@dataclass(frozen=True)
+class SnapshotFile:
+    path: Path
+    collection_date: pd.Timestamp
+
+
+@dataclass
+class RouteDayCounts:
+    """Records per (route, collection day), one entry per route-day with at
+    least one record, sorted by day. Airports are sorted by name and routes
+    are given as codes into them; `date_idx` is a position in `dates`."""
+
+    airports: List[str] = field(default_factory=list)
+    origins: np.ndarray = field(default_factory=lambda: np.array([], np.int32))
+    destinations: np.ndarray = field(default_factory=lambda: np.array([], np.int32))
+    date_idx: np.ndarray = field(default_factory=lambda: np.array([], np.intp))
+    records: np.ndarray = field(default_factory=lambda: np.array([], np.int64))
+    dates: pd.DatetimeIndex = field(default_factory=lambda: pd.DatetimeIndex([]))
+    # Files that contributed records, by collection date
+    files: List[SnapshotFile] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+
+def file_collection_date(path: Path) -> pd.Timestamp:
+    """Collection date from the file name (the part before "T"); raises
+    ValueError if there is none"""
+    try:
+        return pd.Timestamp(pd.to_datetime(path.stem.split("T")[0]).date())
+    except (ValueError, IndexError):
+        raise ValueError("Invalid date format in filename") from None
+
+
+def read_chunks(
+    path: Path, columns: Sequence[str], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """`columns` of a snapshot (those present in the file), `chunk_rows` rows
+    at a time; raises ValueError if the file lacks a required column"""
+    # Only the header line; cheaper than letting pandas parse it
+    with open(path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise pd.errors.EmptyDataError("File is empty")
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns {missing}")
+    usecols = [c for c in columns if c in header]
+    yield from pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={c: COLUMN_DTYPES[c] for c in usecols},
+        chunksize=chunk_rows,
+    )
+
+
+def _airport_codes(column: pd.Series, codes: Dict[str, int]) -> np.ndarray:
+    """Codes of a categorical column's names in `codes` (assigning new names
+    the next free code), -1 for missing names"""
+    lookup = np.array(
+        [codes.setdefault(name, len(codes)) for name in column.cat.categories] + [-1],
+        dtype=np.int64,
+    )
+    # Missing values have category code -1, the last entry
+    return lookup[column.cat.codes.to_numpy()]
+
+
+def _sum_by_key(keys: np.ndarray, counts: np.ndarray):
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse.ravel(), weights=counts).astype(np.int64)
+
+
+def reduce_route_days(
+    paths: Iterable[Path], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> RouteDayCounts:
+    """Record counts per route and collection day of the snapshot files"""
+    airport_codes: Dict[str, int] = {}
+    # Collection day -> route keys and record counts of each file that day
+    per_day: Dict[pd.Timestamp, List[tuple]] = {}
+    files: List[SnapshotFile] = []
+    failed: List[str] = []
+
+    for path in sorted(paths):
+        try:
+            day = file_collection_date(path)
+            parts = []
+            for chunk in read_chunks(path, ROUTE_COLUMNS, chunk_rows):
+                origins = _airport_codes(chunk["departure_from"], airport_codes)
+                destinations = _airport_codes(chunk["departure_to"], airport_codes)
+                known = (origins >= 0) & (destinations >= 0)
+                keys = (origins[known] << ROUTE_KEY_SHIFT) | destinations[known]
+                parts.append(np.unique(keys, return_counts=True))
+        except pd.errors.EmptyDataError:
+            failed.append(f"{path.name}: File is empty")
+            continue
+        except pd.errors.ParserError as e:
+            failed.append(f"{path.name}: CSV parsing error - {e}")
+            continue
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            failed.append(f"{path.name}: {e}")
+            continue
+        if not any(len(keys) for keys, _ in parts):
+            continue
+        files.append(SnapshotFile(path, day))
+        per_day.setdefault(day, []).append(
+            _sum_by_key(
+                np.concatenate([keys for keys, _ in parts]),
+                np.concatenate([counts for _, counts in parts]),
+            )
+        )
+
+    if not per_day:
+        return RouteDayCounts(failed=failed)
+
+    days = sorted(per_day)
+    route_keys, records, date_idx = [], [], []
+    for i, day in enumerate(days):
+        parts = per_day.pop(day)
+        keys, counts = (
+            parts[0]
+            if len(parts) == 1
+            else _sum_by_key(
+                np.concatenate([k for k, _ in parts]),
+                np.concatenate([c for _, c in parts]),
+            )
+        )
+        route_keys.append(keys)
+        records.append(counts)
+        date_idx.append(np.full(len(keys), i, dtype=np.intp))
+    keys = np.concatenate(route_keys)
+    origins = keys >> ROUTE_KEY_SHIFT
+    destinations = keys & ((1 << ROUTE_KEY_SHIFT) - 1)
+
+    # Codes were assigned in order of appearance, including airports of files
+    # that failed part way; renumber the airports of some route by name
+    names = np.array(list(airport_codes), dtype=object)
+    used = np.zeros(len(names), dtype=bool)
+    used[origins] = used[destinations] = True
+    used_codes = np.flatnonzero(used)
+    used_codes = used_codes[np.argsort(names[used_codes], kind="stable")]
+    renumber = np.full(len(names), -1, dtype=np.int32)
+    renumber[used_codes] = np.arange(len(used_codes), dtype=np.int32)
+    files.sort(key=lambda f: f.collection_date)
+    return RouteDayCounts(
+        airports=list(names[used_codes]),
+        origins=renumber[origins],
+        destinations=renumber[destinations],
+        date_idx=np.concatenate(date_idx),
+        records=np.concatenate(records),
+        dates=pd.DatetimeIndex(days),
+        files=files,
+        failed=failed,
+    )
+
+
+def read_records(
+    files: Sequence[SnapshotFile],
+    keep: Callable[[pd.DataFrame], np.ndarray],
+    limit: Optional[int] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Records of `files` for which `keep` (given a chunk) is True, in file
+    order, with their collection date; reading stops once `limit` records are
+    found"""
+    kept = []
+    found = 0
+    for file in files:
+        for chunk in read_chunks(file.path, RECORD_COLUMNS, chunk_rows):
+            chunk = chunk[keep(chunk)]
+            if limit is not None:
+                chunk = chunk.head(limit - found)
+            if chunk.empty:
+                continue
+            chunk = chunk.assign(collection_date=file.collection_date)
+            for column in ROUTE_COLUMNS:
+                chunk[column] = chunk[column].astype(object)
+            kept.append(chunk)
+            found += len(chunk)
+            if limit is not None and found >= limit:
+                break
+        if limit is not None and found >= limit:
+            break
+    if not kept:
+        return pd.DataFrame(columns=RECORD_COLUMNS + ["collection_date"])
+    # data_generated is missing from older snapshots
+    records = pd.concat(kept, ignore_index=True).reindex(
+        columns=RECORD_COLUMNS + ["collection_date"]
+    )
+    for column in DATETIME_COLUMNS:
+        records[column] = pd.to_datetime(records[column])
+    return records
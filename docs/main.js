@@ -1,68 +1,5 @@
-const AIRPORT_COORDS = {
-  "Aalesund": [62.5625, 6.1194], "Aberdeen": [57.2019, -2.1977], "Abu Dhabi": [24.433, 54.6511],
-  "Agadir": [30.3281, -9.4131], "Alexandria": [31.1884, 29.9489], "Alghero": [40.6322, 8.2908],
-  "Alicante": [38.2822, -0.5581], "Almaty": [43.3517, 77.04], "Amman": [31.7225, 35.9928],
-  "Ancona": [43.6161, 13.3619], "Antalya": [36.8986, 30.8008], "Asyut": [27.0467, 31.0119],
-  "Athens": [37.9364, 23.9475], "Bacau": [46.5211, 26.9103], "Baku": [40.4675, 50.0467],
-  "Banja Luka": [44.9411, 17.2975], "Barcelona": [41.2974, 2.0833], "Bari": [41.1389, 16.7606],
-  "Basel/Mulhouse": [47.5897, 7.5294], "Beirut": [33.8206, 35.4883], "Belgrade": [44.8184, 20.3092],
-  "Bergen": [60.2934, 5.2181], "Berlin": [52.3512, 13.4936], "Bilbao": [43.3011, -2.9106],
-  "Billund": [55.7403, 9.1522], "Birmingham": [52.4539, -1.7481], "Bishkek": [43.0611, 74.4761],
-  "Bologna": [44.5353, 11.2889], "Brasov": [45.595, 25.5156], "Bratislava": [48.1703, 17.2128],
-  "Brussels": [50.9014, 4.4844], "Bucharest": [44.5711, 26.085], "Budapest": [47.4381, 19.2556],
-  "Burgas": [42.5697, 27.5153], "Castellon": [40.2097, 0.0703], "Catania": [37.4669, 15.0664],
-  "Chania": [35.5317, 24.1497], "Chisinau": [46.9275, 28.9308], "Cluj": [46.7853, 23.6864],
-  "Comiso": [36.9947, 14.6072], "Constanta": [44.3442, 28.4883], "Copenhagen": [55.6181, 12.6508],
-  "Craiova": [44.3181, 23.8886], "Dalaman": [36.7133, 28.7925], "Dammam": [26.4711, 49.7978],
-  "Debrecen": [47.4889, 21.6153], "Dortmund": [51.5178, 7.6122], "Dubai": [25.2522, 55.3644],
-  "Dubrovnik": [42.5614, 18.2681], "Eindhoven": [51.45, 5.3747], "Faro": [37.0144, -7.9658],
-  "Frankfurt": [50.0379, 8.5622], "Friedrichshafen": [47.6719, 9.5114], "Fuerteventura": [28.4528, -13.8639],
-  "Gabala": [40.8267, 47.7125], "Gdansk": [54.3775, 18.4661], "Genoa": [44.4133, 8.8375],
-  "Girona": [41.9011, 2.7608], "Giza": [30.1203, 30.8067], "Glasgow": [55.8719, -4.4331],
-  "Gothenburg": [57.6628, 12.2797], "Gran Canaria": [27.9319, -15.3867], "Gyumri": [40.75, 43.8514],
-  "Hamburg": [53.6304, 10.0067], "Haugesund": [59.3453, 5.2081], "Heraklion": [35.3387, 25.1803],
-  "Hurghada": [27.1783, 33.7994], "Iasi": [47.1781, 27.6206], "Ibiza": [38.8728, 1.3731],
-  "Istanbul": [41.2754, 28.7519], "Jeddah": [21.6796, 39.1564], "Karlsruhe/Baden-Baden": [48.7794, 8.0806],
-  "Katowice": [50.4742, 19.08], "Kaunas": [54.9639, 24.0844], "Kerkyra": [39.6017, 19.9119],
-  "Kosice": [48.6631, 21.2411], "Krakow": [50.0778, 19.7847], "Kutaisi": [42.1761, 42.4825],
-  "Larnaca": [34.875, 33.6249], "Leeds/Bradford": [53.8658, -1.6603], "Leipzig/Halle": [51.4239, 12.2361],
-  "Lisbon": [38.7813, -9.1361], "Liverpool": [53.3356, -2.8497], "Ljubljana": [46.2237, 14.4581],
-  "London": [51.47, -0.4543], "Lublin": [51.7225, 23.1714], "Lyon": [45.7256, 5.0811],
-  "Madeira": [32.6978, -16.7745], "Madinah": [24.5536, 39.705], "Madrid": [40.4936, -3.5667],
-  "Malaga": [36.675, -4.4992], "Male": [4.1917, 73.5289], "Malmo": [55.5361, 13.3675],
-  "Malta": [35.8575, 14.4775], "Marrakech": [31.6067, -8.0361], "Marsa Alam": [25.5572, 34.5836],
-  "Memmingen": [47.9881, 10.2394], "Milan": [45.6306, 8.7281], "Mykonos": [37.435, 25.3483],
-  "Naples": [40.886, 14.2908], "Nice": [43.6653, 7.215], "Nis": [43.3372, 21.8536],
-  "Nur-Sultan": [51.0219, 71.4669], "Nuremberg": [49.4986, 11.0669], "Ohrid": [41.18, 20.7428],
-  "Olbia": [40.8986, 9.5181], "Oslo": [60.1939, 11.1003], "Palma De Mallorca": [39.5517, 2.7386],
-  "Paphos": [34.7181, 32.4856], "Paris": [49.0097, 2.5478], "Perugia": [43.0956, 12.5133],
-  "Pescara": [42.4317, 14.1811], "Pisa": [43.6839, 10.3928], "Plovdiv": [42.0678, 24.8508],
-  "Podgorica": [42.3597, 19.2519], "Poprad/Tatry": [49.0736, 20.2406], "Porto": [41.2481, -8.6814],
-  "Poznan": [52.4214, 16.8269], "Prague": [50.1008, 14.26], "Pristina": [42.5728, 21.0361],
-  "Radom": [51.3889, 21.2133], "Reykjavik": [63.985, -22.6056], "Rhodes": [36.4054, 28.0864],
-  "Riga": [56.9236, 23.9711], "Rimini": [44.0203, 12.6114], "Riyadh": [24.9578, 46.6983],
-  "Rome": [41.8003, 12.2389], "Rzeszow": [50.11, 22.0192], "Salalah": [17.0386, 54.0914],
-  "Salerno": [40.6203, 14.9114], "Salzburg": [47.7931, 13.0044], "Samarkand": [39.7006, 66.9844],
-  "Santorini": [36.3992, 25.4794], "Sarajevo": [43.8247, 18.3314], "Satu Mare": [47.7031, 22.8856],
-  "Sevilla": [37.4181, -5.8931], "Sharm el-Sheikh": [27.9772, 34.3947], "Sibiu": [45.7856, 24.0914],
-  "Skiathos": [39.1769, 23.5036], "Skopje": [41.9617, 21.6214], "Sofia": [42.6947, 23.4114],
-  "Sohag": [26.3428, 31.7428], "Split": [43.5389, 16.2981], "Stavanger": [58.8767, 5.6378],
-  "Stockholm": [59.6519, 17.9186], "Stuttgart": [48.6897, 9.2219], "Suceava": [47.6875, 26.3544],
-  "Szczecin": [53.5847, 14.9019], "Tallinn": [59.4133, 24.8328], "Targu-Mures": [46.4681, 24.4119],
-  "Tashkent": [41.2578, 69.2811], "Tel Aviv": [32.0114, 34.8867], "Tenerife": [28.0828, -16.5725],
-  "Thessaloniki": [40.5197, 22.9706], "Timisoara": [45.8103, 21.3378], "Tirana": [41.4147, 19.7206],
-  "Trieste": [45.8275, 13.4719], "Tromso": [69.6833, 18.9189], "Trondheim": [63.4578, 10.9242],
-  "Turin": [45.2006, 7.6494], "Turkistan": [43.2733, 68.3072], "Turku": [60.5142, 22.2628],
-  "Tuzla": [44.4586, 18.725], "Valencia": [39.4894, -0.4814], "Varna": [43.2322, 27.8253],
-  "Venice": [45.5053, 12.3519], "Verona": [45.3956, 10.8883], "Vienna": [48.1103, 16.5697],
-  "Vilnius": [54.6342, 25.2858], "Warsaw": [52.1658, 20.9675], "Wroclaw": [51.1025, 16.8858],
-  "Yerevan": [40.1475, 44.3956], "Zakinthos Island": [37.7508, 20.8828], "Zaragoza": [41.6661, -1.0406],
-  "Ankara": [40.1281, 32.9951], "Bordeaux": [44.8283, -0.7156], "Brindisi": [40.6576, 17.9470],
-  "Cologne/Bonn": [50.8659, 7.1427], "Klaipeda/Palanga": [55.9733, 21.0939], "Lamezia Terme": [38.9054, 16.2422],
-  "Maastricht": [50.9117, 5.7700], "Menorca": [39.8626, 4.2186], "Oradea": [47.0253, 21.9028],
-  "Palermo": [38.1759, 13.0910], "Sandefjord": [59.1867, 10.2586],
-  "Santander": [43.4267, -3.8200], "Szczytno": [53.4783, 20.9378]
-};
+// name -> [lat, lon], shared with the Streamlit app (airport-coordinates.json)
+let AIRPORT_COORDS = {};
 
 const WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
 const MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December'];
@@ -133,9 +70,14 @@ const STATE = { hub: null, destination: null };
 
 async function init() {
   try {
-    const r = await fetch('aggregated-data.json', { cache: 'no-cache' });
+    const [r, coords] = await Promise.all([
+      fetch('aggregated-data.json', { cache: 'no-cache' }),
+      fetch('airport-coordinates.json'),
+    ]);
     if (!r.ok) throw new Error(`HTTP ${r.status}`);
+    if (!coords.ok) throw new Error(`HTTP ${coords.status}`);
     DATA = await r.json();
+    AIRPORT_COORDS = await coords.json();
     preprocess(DATA);
     applyQueryParams();
     setupCombos();
@@ -183,6 +125,10 @@ function preprocess(d) {
   d.dateSet = new Set(d.dates);
   d.weekdayOfDate = {};
   for (const dt of d.continuousDates) d.weekdayOfDate[dt] = (new Date(dt + 'T00:00:00Z').getUTCDay() + 6) % 7;
+  // Runs of consecutive collection days per route, flattened [s0, e0, s1, e1, ...]
+  if (!d.runs) d.runs = buildRuns(d);
+  d.routeDays = d.runs.map(runDays);
+  d.routeLastIdx = d.runs.map((r) => (r.length ? r[r.length - 1] : -1));
   d.partnersOf = {};
   for (const name of d.airports) d.partnersOf[name] = new Set();
   for (const date of d.dates) {
@@ -194,6 +140,24 @@ function preprocess(d) {
   }
 }
 
+function buildRuns(d) {
+  const runs = d.routes.map(() => []);
+  d.dates.forEach((date, i) => {
+    for (const rid of d.availability[date]) {
+      const r = runs[rid];
+      if (r.length && r[r.length - 1] === i - 1) r[r.length - 1] = i;
+      else r.push(i, i);
+    }
+  });
+  return runs;
+}
+
+function runDays(runs) {
+  let days = 0;
+  for (let i = 0; i < runs.length; i += 2) days += runs[i + 1] - runs[i] + 1;
+  return days;
+}
+
 function fillRange(start, end) {
   const out = [];
   let cur = new Date(start + 'T00:00:00Z');
@@ -338,6 +302,7 @@ function render() {
   renderDailyChart(dc);
   renderMonthlyChart(dc);
   renderWeekdayChart(dc);
+  renderRankings();
   renderMap();
 }
 
@@ -964,6 +929,49 @@ function weekdayDirectionPct(originName, destName) {
   return totals.map(t => t.days ? (t.hits / t.days) * 100 : 0);
 }
 
+let RANKING_WINDOW = null;
+
+function renderRankings() {
+  const { hub, destination } = STATE;
+  const section = document.getElementById('rankings');
+  const tables = DATA.rankings || [];
+  if (!tables.length || (hub && destination)) { section.classList.add('is-hidden'); return; }
+  section.classList.remove('is-hidden');
+
+  const table = tables.find(t => t.window_days === RANKING_WINDOW) || tables[0];
+  RANKING_WINDOW = table.window_days;
+  const rids = hub ? table.top_from[DATA.airportIdx[hub]]
+    : destination ? table.top_to[DATA.airportIdx[destination]]
+    : table.top;
+
+  const scope = hub ? ` from ${hub}` : destination ? ` to ${destination}` : '';
+  document.getElementById('rankings-desc').textContent =
+    `Routes${scope} available on the most of the last ${table.collection_days} collection days.`;
+
+  const buttons = document.getElementById('ranking-windows');
+  buttons.innerHTML = tables.map(t =>
+    `<button type="button" class="ranking-window${t === table ? ' is-active' : ''}" data-window="${t.window_days}">${t.window_days}D</button>`
+  ).join('');
+  buttons.querySelectorAll('.ranking-window').forEach(btn => {
+    btn.onclick = () => {
+      RANKING_WINDOW = Number(btn.dataset.window);
+      renderRankings();
+    };
+  });
+
+  const list = document.getElementById('ranking-list');
+  if (!rids.length) {
+    list.innerHTML = `<li class="ranking-empty">No flights${esc(scope)} in this period</li>`;
+    return;
+  }
+  list.innerHTML = rids.map(rid => {
+    const [o, d] = DATA.routes[rid];
+    const pct = table.days[rid] / table.collection_days * 100;
+    return `<li><span class="ranking-route">${esc(DATA.airports[o])} → ${esc(DATA.airports[d])}</span>` +
+      `<span class="ranking-share">${pct.toFixed(0)}%</span></li>`;
+  }).join('');
+}
+
 function renderMap() {
   const { hub, destination } = STATE;
   const card = document.getElementById('network');
@@ -1172,8 +1180,7 @@ function anchorHover(name, ai, partnerSet, totalDays, isHub) {
   for (const pi of partnerSet) {
     const rid = isHub ? getRouteIdx(ai, pi) : getRouteIdx(pi, ai);
     if (rid < 0) continue;
-    let days = 0;
-    for (const date of DATA.dates) if (DATA.dateAvailSet[date].has(rid)) days++;
+    const days = DATA.routeDays[rid];
     totalFlights += days;
     if (days > bestDays) { bestDays = days; bestPi = pi; }
   }
@@ -1185,9 +1192,8 @@ function anchorHover(name, ai, partnerSet, totalDays, isHub) {
 }
 
 function routeHover(name, outRid, outDest, retRid, retDest, totalDays, lastDateIdx) {
-  let outDays = 0, retDays = 0;
-  if (outRid >= 0) for (const date of DATA.dates) if (DATA.dateAvailSet[date].has(outRid)) outDays++;
-  if (retRid >= 0) for (const date of DATA.dates) if (DATA.dateAvailSet[date].has(retRid)) retDays++;
+  const outDays = outRid >= 0 ? DATA.routeDays[outRid] : 0;
+  const retDays = retRid >= 0 ? DATA.routeDays[retRid] : 0;
   const last = lastSeenStr([outRid, retRid], lastDateIdx);
   const lines = [`<b>${esc(name)}</b>`];
   if (outDays) lines.push(`→ ${esc(outDest)} ${freqWk(outDays, totalDays)}`);
@@ -1204,17 +1210,14 @@ function freqWk(days, totalDays) {
 }
 
 function lastSeenStr(rids, lastDateIdx) {
-  for (let i = lastDateIdx; i >= 0; i--) {
-    const set = DATA.dateAvailSet[DATA.dates[i]];
-    for (const rid of rids) if (rid >= 0 && set.has(rid)) {
-      const off = lastDateIdx - i;
-      if (off === 0) return 'today';
-      if (off < 7) return `${off}d`;
-      if (off < 30) return `${Math.floor(off / 7)}w`;
-      return `${Math.floor(off / 30)}mo`;
-    }
-  }
-  return '—';
+  let i = -1;
+  for (const rid of rids) if (rid >= 0) i = Math.max(i, DATA.routeLastIdx[rid]);
+  if (i < 0) return '—';
+  const off = lastDateIdx - i;
+  if (off === 0) return 'today';
+  if (off < 7) return `${off}d`;
+  if (off < 30) return `${Math.floor(off / 7)}w`;
+  return `${Math.floor(off / 30)}mo`;
 }
 
 function computeAllAirportStats() {
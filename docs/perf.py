@@ -0,0 +1,82 @@
+"""Per-rerun performance instrumentation for the Streamlit app.
+
+Streamlit executes app.py afresh on every rerun, so objects created in it are
+rebuilt each time while objects kept in `st.cache_resource` survive. Keeping
+the recorder and its thread-local here, in an imported module, means shared
+cached objects and the current rerun always see the same recorder.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import plotly.graph_objects as go
+
+
+class PerfRecorder:
+    """Collects section timings, figure sizes and cache statistics for one
+    rerun. A disabled recorder does no work, so instrumentation can stay in
+    place permanently."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.timings: List[Tuple[str, int, float]] = []
+        self.figure_sizes: Dict[str, int] = {}
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        self._depth = 0
+
+    @contextmanager
+    def section(self, name: str):
+        """Time the enclosed block; nested sections are recorded with their depth"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.timings.append((name, self._depth, time.perf_counter() - start))
+
+    def cache_event(self, cache: str, hit: bool) -> None:
+        """Count a hit or miss for the named cache"""
+        if not self.enabled:
+            return
+        stats = self.cache_stats.setdefault(cache, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+    def record_figure(self, name: str, fig: go.Figure) -> None:
+        """Measure the serialized size of a figure as sent to the browser"""
+        if not self.enabled:
+            return
+        with self.section(f"serialize {name}"):
+            self.figure_sizes[name] = len(fig.to_json())
+
+
+# Recorder of the rerun executing on the current thread. Streamlit runs each
+# session's script in its own thread, so shared objects can record safely.
+_perf_local = threading.local()
+_DISABLED_PERF = PerfRecorder(enabled=False)
+
+
+def current_perf() -> PerfRecorder:
+    return getattr(_perf_local, "recorder", _DISABLED_PERF)
+
+
+def set_current_perf(recorder: PerfRecorder) -> None:
+    _perf_local.recorder = recorder
+
+
+def timed(method):
+    """Decorator recording the wrapped method as a section of the current rerun"""
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with current_perf().section(method.__name__):
+            return method(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,485 @@
+"""Compact route x collection-day presence matrix.
+
+Rows are routes (origin, destination) sorted by origin and then destination,
+columns are collection dates in ascending order. Presence is bit-packed along
+the day axis with `numpy.packbits` (most significant bit first), so a route
+over D collection days takes ceil(D / 8) bytes and whole-row statistics are
+byte-wise popcounts instead of scans over the raw rows.
+
+The same layout is stored in the route index file written by the pipeline
+(`aggregate.py --index-out`, see routeindex.py at the repository root), which
+`RouteMatrix.open` maps with `numpy.memmap` instead of building the matrix.
+"""
+
+import json
+import struct
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Route index file: magic, format version and JSON header length, then the
+# header and the matrix at header["matrix_offset"]
+MATRIX_FILE_MAGIC = b"AYCFIDX\0"
+MATRIX_FILE_VERSION = 1
+MATRIX_FILE_PREFIX = struct.Struct("<8sII")
+
+# Number of set bits for every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits in every row of a packed (rows, bytes) array"""
+    if bits.size == 0:
+        return np.zeros(bits.shape[0], dtype=np.int64)
+    return POPCOUNT[bits].sum(axis=1, dtype=np.int64)
+
+
+def read_matrix_header(path: Union[str, Path]) -> dict:
+    """JSON header of a route index file; raises ValueError if `path` is not
+    one or has an unsupported format version"""
+    with open(path, "rb") as f:
+        prefix = f.read(MATRIX_FILE_PREFIX.size)
+        if len(prefix) < MATRIX_FILE_PREFIX.size:
+            raise ValueError(f"{path} is not a route index file")
+        magic, version, header_len = MATRIX_FILE_PREFIX.unpack(prefix)
+        if magic != MATRIX_FILE_MAGIC:
+            raise ValueError(f"{path} is not a route index file")
+        if version != MATRIX_FILE_VERSION:
+            raise ValueError(
+                f"{path} has format version {version}, expected {MATRIX_FILE_VERSION}"
+            )
+        return json.loads(f.read(header_len))
+
+
+class RouteMatrix:
+    def __init__(
+        self,
+        airports: Sequence[str],
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        dates: np.ndarray,
+        bits: np.ndarray,
+    ) -> None:
+        self.airports = list(airports)
+        self.origins = np.asarray(origins, dtype=np.int32)
+        self.destinations = np.asarray(destinations, dtype=np.int32)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.bits = bits
+        self._airport_idx = {name: i for i, name in enumerate(self.airports)}
+        # Routes are sorted by this key, so lookups are binary searches
+        self._route_keys = self.origins.astype(np.int64) * len(self.airports) + (
+            self.destinations
+        )
+        self._day_counts: Optional[np.ndarray] = None
+        self._runs: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._cumulative: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls) -> "RouteMatrix":
+        return cls(
+            [],
+            np.array([], dtype=np.int32),
+            np.array([], dtype=np.int32),
+            np.array([], dtype="datetime64[D]"),
+            np.zeros((0, 0), dtype=np.uint8),
+        )
+
+    @classmethod
+    def from_codes(
+        cls,
+        airports: Sequence[str],
+        origin_codes: np.ndarray,
+        destination_codes: np.ndarray,
+        date_idx: np.ndarray,
+        dates: np.ndarray,
+    ) -> "RouteMatrix":
+        """Build from one (origin, destination, date position) triple per record;
+        duplicate records collapse into a single presence bit. Bits are set in
+        the packed matrix directly, so no unpacked route x day array is made."""
+        n_airports = len(airports)
+        keys = origin_codes.astype(np.int64) * n_airports + destination_codes
+        route_keys, route_ids = np.unique(keys, return_inverse=True)
+
+        date_idx = np.asarray(date_idx, dtype=np.int64)
+        bits = np.zeros((len(route_keys), (len(dates) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(
+            bits,
+            (route_ids.ravel(), date_idx >> 3),
+            (0x80 >> (date_idx & 7)).astype(np.uint8),
+        )
+        return cls(
+            airports, route_keys // n_airports, route_keys % n_airports, dates, bits
+        )
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, dates: Sequence) -> "RouteMatrix":
+        """Build from records with departure_from, departure_to and date_idx
+        (the position of the record's collection date in `dates`)"""
+        airports = sorted(
+            set(data["departure_from"].unique()) | set(data["departure_to"].unique())
+        )
+        origin_codes = pd.Categorical(data["departure_from"], categories=airports).codes
+        destination_codes = pd.Categorical(
+            data["departure_to"], categories=airports
+        ).codes
+        return cls.from_codes(
+            airports,
+            origin_codes,
+            destination_codes,
+            data["date_idx"].to_numpy(),
+            pd.DatetimeIndex(dates).to_numpy().astype("datetime64[D]"),
+        )
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> Tuple["RouteMatrix", str]:
+        """Map a route index file read-only; returns the matrix and the data
+        version recorded in the file"""
+        header = read_matrix_header(path)
+        routes = np.array(header["routes"], dtype=np.int32).reshape(-1, 2)
+        shape = (len(routes), header["row_bytes"])
+        if routes.size and shape[1]:
+            bits = np.memmap(
+                path,
+                dtype=np.uint8,
+                mode="r",
+                offset=header["matrix_offset"],
+                shape=shape,
+            )
+        else:
+            # numpy cannot map an empty region
+            bits = np.zeros(shape, dtype=np.uint8)
+        matrix = cls(
+            header["airports"],
+            routes[:, 0],
+            routes[:, 1],
+            np.array(header["dates"], dtype="datetime64[D]"),
+            bits,
+        )
+        return matrix, header["version"]
+
+    @property
+    def n_routes(self) -> int:
+        return len(self.origins)
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    def airport_index(self, name: Optional[str]) -> int:
+        """Position of the airport in `airports`, or -1 if unknown"""
+        return self._airport_idx.get(name, -1)
+
+    def route_index(self, origin: str, destination: str) -> int:
+        """Row of the origin -> destination route, or -1 if it was never seen"""
+        o, d = self.airport_index(origin), self.airport_index(destination)
+        if o < 0 or d < 0:
+            return -1
+        key = o * len(self.airports) + d
+        pos = int(np.searchsorted(self._route_keys, key))
+        if pos < self.n_routes and self._route_keys[pos] == key:
+            return pos
+        return -1
+
+    def routes_from(self, origin: str) -> np.ndarray:
+        """Rows of all routes departing from `origin` (a contiguous range)"""
+        o = self.airport_index(origin)
+        if o < 0:
+            return np.array([], dtype=np.intp)
+        lo, hi = np.searchsorted(self.origins, [o, o + 1])
+        return np.arange(lo, hi)
+
+    def routes_to(self, destination: str) -> np.ndarray:
+        """Rows of all routes arriving at `destination`"""
+        d = self.airport_index(destination)
+        if d < 0:
+            return np.array([], dtype=np.intp)
+        return np.flatnonzero(self.destinations == d)
+
+    def route_ids(self, departure_from, departure_to) -> np.ndarray:
+        """Row of every (departure_from, departure_to) pair of names, -1 for
+        routes never seen"""
+        origins = pd.Categorical(departure_from, categories=self.airports).codes
+        destinations = pd.Categorical(departure_to, categories=self.airports).codes
+        return self.route_ids_from_codes(origins, destinations)
+
+    def route_ids_from_codes(
+        self, origins: np.ndarray, destinations: np.ndarray
+    ) -> np.ndarray:
+        """Row of every (origin, destination) pair of airport codes, -1 for
+        routes never seen or codes of -1"""
+        keys = origins.astype(np.int64) * len(self.airports) + destinations
+        if self.n_routes == 0:
+            return np.full(len(keys), -1, dtype=np.intp)
+        pos = np.minimum(np.searchsorted(self._route_keys, keys), self.n_routes - 1)
+        found = (origins >= 0) & (destinations >= 0) & (self._route_keys[pos] == keys)
+        return np.where(found, pos, -1)
+
+    def route_mask(
+        self, origins: Sequence[str] = (), destinations: Sequence[str] = ()
+    ) -> np.ndarray:
+        """Boolean mask of the routes departing from any of `origins` and
+        arriving at any of `destinations` (an empty side matches every
+        airport). Each side is a lookup table indexed by airport code, so
+        this is one pass over the routes however many airports are selected."""
+        mask = np.ones(self.n_routes, dtype=bool)
+        sides = [(origins, self.origins), (destinations, self.destinations)]
+        for names, codes in sides:
+            if names:
+                ids = [self._airport_idx[n] for n in names if n in self._airport_idx]
+                selected = np.zeros(len(self.airports), dtype=bool)
+                selected[ids] = True
+                mask &= selected[codes]
+        return mask
+
+    def rows(
+        self, route_ids: np.ndarray, lo: int = 0, hi: Optional[int] = None
+    ) -> np.ndarray:
+        """Unpacked boolean presence of the given routes on day positions
+        lo..hi-1 (default: every day), shape (routes, days); only the bytes
+        covering the window are unpacked"""
+        hi = self.n_days if hi is None else hi
+        route_ids = np.asarray(route_ids, dtype=np.intp)
+        if hi <= lo:
+            return np.zeros((len(route_ids), 0), dtype=bool)
+        packed = self.bits[route_ids, lo // 8 : (hi + 7) // 8]
+        unpacked = np.unpackbits(packed, axis=1)
+        return unpacked[:, lo % 8 : lo % 8 + hi - lo].astype(bool)
+
+    def window_bits(self, lo: int, hi: int) -> np.ndarray:
+        """Packed rows of every route restricted to day positions lo..hi-1:
+        the bytes covering the window, with the bits of days outside it
+        cleared"""
+        if hi <= lo:
+            return np.zeros((self.n_routes, 0), dtype=np.uint8)
+        bits = np.array(self.bits[:, lo // 8 : (hi + 7) // 8])
+        # Day d is bit 7 - d % 8 of byte d // 8
+        bits[:, 0] &= np.uint8(0xFF >> (lo % 8))
+        if hi % 8:
+            bits[:, -1] &= np.uint8((0xFF << (8 - hi % 8)) & 0xFF)
+        return bits
+
+    def day_counts(self) -> np.ndarray:
+        """Number of collection days on which each route was available"""
+        if self._day_counts is None:
+            self._day_counts = popcount_rows(self.bits)
+        return self._day_counts
+
+    def cumulative_days(self) -> np.ndarray:
+        """Running count of available days per route, shape (routes, days + 1)
+        with column i counting days 0..i-1"""
+        if self._cumulative is None:
+            cumulative = np.zeros((self.n_routes, self.n_days + 1), dtype=np.int32)
+            np.cumsum(
+                np.unpackbits(self.bits, axis=1, count=self.n_days),
+                axis=1,
+                out=cumulative[:, 1:],
+            )
+            self._cumulative = cumulative
+        return self._cumulative
+
+    def window_counts(self, window_days: int, end: Optional[int] = None) -> np.ndarray:
+        """Days each route was available in the `window_days` collection days
+        ending at day position `end` (inclusive; the last day if None)"""
+        stop = self.n_days if end is None else end + 1
+        start = max(stop - window_days, 0)
+        cumulative = self.cumulative_days()
+        return cumulative[:, stop] - cumulative[:, start]
+
+    def runs(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Runs of consecutive collection days of every route, as
+        (offsets, starts, ends): route r's runs are starts[offsets[r]:
+        offsets[r + 1]] to the matching ends, both inclusive day positions"""
+        if self._runs is None:
+            presence = np.unpackbits(self.bits, axis=1, count=self.n_days)
+            edges = np.diff(np.pad(presence.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+            # Row-major order: grouped by route, ascending days within a route
+            start_routes, starts = np.nonzero(edges == 1)
+            _, ends = np.nonzero(edges == -1)
+            offsets = np.searchsorted(start_routes, np.arange(self.n_routes + 1))
+            self._runs = (offsets, starts, ends - 1)
+        return self._runs
+
+    def route_runs(self, route_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(starts, ends) of one route's runs"""
+        offsets, starts, ends = self.runs()
+        lo, hi = offsets[route_id], offsets[route_id + 1]
+        return starts[lo:hi], ends[lo:hi]
+
+    def airport_active_days(
+        self, outbound: bool = True, lo: int = 0, hi: Optional[int] = None
+    ) -> np.ndarray:
+        """For every airport, the number of collection days (among day
+        positions lo..hi-1, default all) with at least one outbound (or
+        inbound) route: an OR-reduction of its route rows"""
+        result = np.zeros(len(self.airports), dtype=np.int64)
+        hi = self.n_days if hi is None else hi
+        if self.n_routes == 0 or hi <= lo:
+            return result
+
+        bits = self.bits if (lo, hi) == (0, self.n_days) else self.window_bits(lo, hi)
+        if outbound:
+            keys = self.origins
+        else:
+            order = np.argsort(self.destinations, kind="stable")
+            keys, bits = self.destinations[order], bits[order]
+        group_airports, starts = np.unique(keys, return_index=True)
+        merged = np.bitwise_or.reduceat(bits, starts, axis=0)
+        result[group_airports] = popcount_rows(merged)
+        return result
+
+    def connections(
+        self,
+        origin: str,
+        destination: str,
+        max_stops: int = 1,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Itineraries from `origin` to `destination` with at most `max_stops`
+        changes whose legs were all available on at least one common day among
+        day positions lo..hi-1 (default: every day).
+
+        Returns the legs as a list of route id arrays and the number of days
+        each itinerary was feasible. The last array always holds the last leg
+        and the first ones the legs before it; shorter itineraries have -1 in
+        the unused arrays before the last, so a direct trip is -1 in every
+        array but the last. Changes are only at airports other than `origin`
+        and `destination`.
+        """
+        n_legs = max_stops + 1
+        a, b = self.airport_index(origin), self.airport_index(destination)
+        legs: List[List[np.ndarray]] = [[] for _ in range(n_legs)]
+        none = np.array([], dtype=np.intp)
+        if a < 0 or b < 0:
+            return [none] * n_legs, np.array([], dtype=np.int64)
+
+        def add(*itinerary: np.ndarray) -> None:
+            # First and last leg in place, -1 in the unused middle legs
+            for i in range(n_legs):
+                if i < len(itinerary) - 1:
+                    column = itinerary[i]
+                elif i == n_legs - 1:
+                    column = itinerary[-1]
+                else:
+                    column = np.full(len(itinerary[0]), -1, dtype=np.intp)
+                legs[i].append(np.asarray(column, dtype=np.intp))
+
+        direct = self.route_index(origin, destination)
+        if direct >= 0:
+            add(np.array([direct]))
+
+        # Row of the route from `origin` to every airport, and from every
+        # airport to `destination` (-1 where there is none)
+        first = self.routes_from(origin)
+        last = self.routes_to(destination)
+        first_to = np.full(len(self.airports), -1, dtype=np.intp)
+        first_to[self.destinations[first]] = first
+        last_from = np.full(len(self.airports), -1, dtype=np.intp)
+        last_from[self.origins[last]] = last
+        first_to[b] = last_from[a] = -1
+
+        if max_stops >= 1:
+            via = np.flatnonzero((first_to >= 0) & (last_from >= 0))
+            add(first_to[via], last_from[via])
+        if max_stops >= 2:
+            middle = np.flatnonzero(
+                (first_to[self.origins] >= 0) & (last_from[self.destinations] >= 0)
+            )
+            add(
+                first_to[self.origins[middle]],
+                middle,
+                last_from[self.destinations[middle]],
+            )
+
+        columns = [np.concatenate([none, *leg]) for leg in legs]
+        hi = self.n_days if hi is None else hi
+        bits = self.bits if (lo, hi) == (0, self.n_days) else self.window_bits(lo, hi)
+        days = np.full((1, bits.shape[1]), 0xFF, dtype=np.uint8)
+        for column in columns:
+            leg_bits = bits[np.maximum(column, 0)]
+            days = days & np.where((column >= 0)[:, None], leg_bits, 0xFF)
+        days = np.broadcast_to(days, (len(columns[0]), days.shape[1]))
+        feasible = popcount_rows(days)
+        keep = feasible > 0
+        return [column[keep] for column in columns], feasible[keep]
+
+    def reverse_routes(self) -> np.ndarray:
+        """Row of the destination -> origin route of every route, or -1"""
+        keys = self.destinations.astype(np.int64) * len(self.airports) + self.origins
+        pos = np.searchsorted(self._route_keys, keys)
+        pos = np.minimum(pos, max(self.n_routes - 1, 0))
+        return np.where(self._route_keys[pos] == keys, pos, -1)
+
+    def round_trip_counts(
+        self,
+        return_days: int,
+        outbound_days: Optional[np.ndarray] = None,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> np.ndarray:
+        """For every route A -> B, the number of collection days d among day
+        positions lo..hi-1 (default: every day) on which A -> B was available
+        and B -> A was available on one of the next `return_days` collection
+        days.
+
+        Only the first hi - lo - return_days days of the window count as
+        outbound days (and of those, only the ones set in the boolean
+        `outbound_days`, indexed like the dates), so every return window is
+        fully collected within it. "Any return in (d, d + k]" is a difference
+        of cumulative sums along the day axis.
+        """
+        counts = np.zeros(self.n_routes, dtype=np.int64)
+        hi = self.n_days if hi is None else hi
+        n_outbound = hi - lo - return_days
+        if n_outbound <= 0:
+            return counts
+        reverse = self.reverse_routes()
+        paired = np.flatnonzero(reverse >= 0)
+        returns = self.rows(reverse[paired], lo, hi)
+        cumulative = np.zeros((len(paired), hi - lo + 1), dtype=np.int32)
+        np.cumsum(returns, axis=1, out=cumulative[:, 1:])
+        days = np.arange(n_outbound)
+        within = cumulative[:, days + return_days + 1] > cumulative[:, days + 1]
+        feasible = self.rows(paired, lo, hi)[:, :n_outbound] & within
+        if outbound_days is not None:
+            feasible &= outbound_days[lo : lo + n_outbound]
+        counts[paired] = feasible.sum(axis=1)
+        return counts
+
+    def similarity(
+        self,
+        route_id: int,
+        candidates: np.ndarray,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Compare the day presence of `candidates` with that of `route_id` on
+        day positions lo..hi-1 (default: every day).
+
+        Returns the Jaccard similarity of each candidate (days both were
+        available over days either was) and its coverage: the share of the
+        days `route_id` was missing on which the candidate was available.
+        Both are popcounts over the packed rows.
+        """
+        hi = self.n_days if hi is None else hi
+        bits = self.bits if (lo, hi) == (0, self.n_days) else self.window_bits(lo, hi)
+        target = bits[route_id]
+        rows = bits[np.asarray(candidates, dtype=np.intp)]
+        both = popcount_rows(rows & target)
+        either = popcount_rows(rows | target)
+        # Bits outside the window (and padding past the last day) are 0 in
+        # `rows`, so the AND drops them
+        filled = popcount_rows(rows & ~target)
+        missing = max(hi - lo, 0) - int(popcount_rows(target[None, :])[0])
+        jaccard = np.divide(both, either, out=np.zeros(len(rows)), where=either > 0)
+        coverage = filled / missing if missing else np.zeros(len(rows))
+        return jaccard, coverage
+
+    def route_names(self, route_ids: np.ndarray) -> List[tuple]:
+        """(origin, destination) names of the given routes"""
+        return [
+            (self.airports[self.origins[r]], self.airports[self.destinations[r]])
+            for r in route_ids
+        ]
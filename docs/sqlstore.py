@@ -0,0 +1,389 @@
+"""Embedded SQLite store for the collected availability snapshots.
+
+CSV snapshots are ingested incrementally: a file is (re)loaded only when its
+size or mtime changed since the last ingest, and rows of deleted files are
+dropped. Airports are stored as integer ids, and the indexes on
+(origin, date), (destination, date) and (origin, destination) let filtered
+queries read only the matching rows, so memory use follows the size of a
+query's result rather than of the whole corpus.
+"""
+
+import csv
+import datetime
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+REQUIRED_COLUMNS = (
+    "departure_from",
+    "departure_to",
+    "availability_start",
+    "availability_end",
+)
+INSERT_BATCH_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    file_name TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    collection_date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS airports (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS flights (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    collection_date TEXT NOT NULL,
+    origin INTEGER NOT NULL REFERENCES airports (id),
+    destination INTEGER NOT NULL REFERENCES airports (id),
+    availability_start TEXT,
+    availability_end TEXT,
+    data_generated TEXT
+);
+CREATE INDEX IF NOT EXISTS flights_origin_date ON flights (origin, collection_date);
+CREATE INDEX IF NOT EXISTS flights_destination_date
+    ON flights (destination, collection_date);
+CREATE INDEX IF NOT EXISTS flights_route ON flights (origin, destination);
+CREATE INDEX IF NOT EXISTS flights_snapshot ON flights (snapshot_id);
+CREATE INDEX IF NOT EXISTS flights_date ON flights (collection_date);
+CREATE INDEX IF NOT EXISTS flights_window
+    ON flights (availability_start, availability_end);
+"""
+
+# Records with airport names, as the pandas backend sees them
+RECORDS_SQL = """
+SELECT o.name AS departure_from, d.name AS departure_to,
+       f.availability_start, f.availability_end, f.data_generated,
+       f.collection_date
+FROM flights f
+JOIN airports o ON o.id = f.origin
+JOIN airports d ON d.id = f.destination
+"""
+
+
+@dataclass
+class IngestResult:
+    added: int = 0
+    replaced: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.replaced or self.removed)
+
+
+class FlightStore:
+    """SQLite database of flight availability records.
+
+    The connection is shared between threads (Streamlit sessions), so every
+    access is serialized with a lock.
+    """
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # Longest availability window in days, cached until the next change
+        self._longest_window: Optional[int] = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def ingest(self, data_path: Union[str, Path]) -> IngestResult:
+        """Bring the store in line with the CSV files in `data_path`"""
+        result = IngestResult()
+        csv_files = {file.name: file for file in Path(data_path).glob("*.csv")}
+
+        with self._lock:
+            known = {
+                name: (snapshot_id, size, mtime_ns)
+                for snapshot_id, name, size, mtime_ns in self._conn.execute(
+                    "SELECT id, file_name, size, mtime_ns FROM snapshots"
+                )
+            }
+
+            for name in sorted(known.keys() - csv_files.keys()):
+                with self._conn:
+                    self._delete_snapshot(known[name][0])
+                result.removed += 1
+
+            for name in sorted(csv_files):
+                file = csv_files[name]
+                stat = file.stat()
+                previous = known.get(name)
+                if previous and previous[1:] == (stat.st_size, stat.st_mtime_ns):
+                    result.unchanged += 1
+                    continue
+                try:
+                    with self._conn:
+                        if previous:
+                            self._delete_snapshot(previous[0])
+                        self._insert_snapshot(file, stat)
+                except (ValueError, csv.Error, UnicodeDecodeError) as e:
+                    result.failed.append(f"{name}: {e}")
+                    continue
+                if previous:
+                    result.replaced += 1
+                else:
+                    result.added += 1
+
+            if result.changed:
+                self._conn.execute("ANALYZE")
+                self._longest_window = None
+        return result
+
+    def _delete_snapshot(self, snapshot_id: int) -> None:
+        self._conn.execute("DELETE FROM flights WHERE snapshot_id = ?", (snapshot_id,))
+        self._conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def _insert_snapshot(self, file: Path, stat) -> None:
+        """Insert one CSV file; raises ValueError if it cannot be used"""
+        try:
+            collection_date = datetime.date.fromisoformat(file.stem.split("T")[0])
+        except ValueError:
+            raise ValueError("Invalid date format in filename") from None
+        day = collection_date.isoformat()
+
+        cursor = self._conn.execute(
+            "INSERT INTO snapshots (file_name, size, mtime_ns, collection_date)"
+            " VALUES (?, ?, ?, ?)",
+            (file.name, stat.st_size, stat.st_mtime_ns, day),
+        )
+        snapshot_id = cursor.lastrowid
+
+        with open(file, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                raise ValueError("File is empty")
+            missing = [c for c in REQUIRED_COLUMNS if c not in reader.fieldnames]
+            if missing:
+                raise ValueError(f"Missing columns {missing}")
+
+            airport_ids = {}
+            batch = []
+            for row in reader:
+                batch.append(
+                    (
+                        snapshot_id,
+                        day,
+                        self._airport_id(row["departure_from"], airport_ids),
+                        self._airport_id(row["departure_to"], airport_ids),
+                        row["availability_start"],
+                        row["availability_end"],
+                        row.get("data_generated"),
+                    )
+                )
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    self._insert_flights(batch)
+                    batch = []
+            self._insert_flights(batch)
+
+    def _insert_flights(self, rows: Sequence[tuple]) -> None:
+        self._conn.executemany(
+            "INSERT INTO flights (snapshot_id, collection_date, origin, destination,"
+            " availability_start, availability_end, data_generated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _airport_id(self, name: str, cache: dict) -> int:
+        if name not in cache:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO airports (name) VALUES (?)", (name,)
+            )
+            (cache[name],) = self._conn.execute(
+                "SELECT id FROM airports WHERE name = ?", (name,)
+            ).fetchone()
+        return cache[name]
+
+    def _query(self, sql: str, params: Union[Sequence, dict] = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def collection_dates(self) -> List[str]:
+        """ISO dates of all snapshots with at least one record, ascending"""
+        with self._lock:
+            return [
+                day
+                for (day,) in self._conn.execute(
+                    "SELECT DISTINCT collection_date FROM flights ORDER BY 1"
+                )
+            ]
+
+    def route_days(self) -> pd.DataFrame:
+        """Distinct (departure_from, departure_to, collection_date) triples,
+        with their number of records"""
+        return self._query(
+            """
+            SELECT o.name AS departure_from, d.name AS departure_to,
+                   r.collection_date, r.records
+            FROM (SELECT origin, destination, collection_date, COUNT(*) AS records
+                  FROM flights GROUP BY origin, destination, collection_date) r
+            JOIN airports o ON o.id = r.origin
+            JOIN airports d ON d.id = r.destination
+            """
+        )
+
+    def _window_filter(self, travel_date: str) -> Tuple[List[str], dict]:
+        """Conditions on `flights f` for the records whose availability window
+        covers `travel_date` (an ISO date). Windows are short, so they all
+        start in the longest window's span before the date: a range scan of
+        the availability_start index."""
+        with self._lock:
+            if self._longest_window is None:
+                (longest,) = self._conn.execute(
+                    "SELECT MAX(julianday(date(availability_end))"
+                    " - julianday(date(availability_start))) FROM flights"
+                ).fetchone()
+                self._longest_window = int(longest or 0)
+            longest = self._longest_window
+        day = datetime.date.fromisoformat(travel_date)
+        # Timestamps are ISO text, so they compare with dates as strings
+        return [
+            "f.availability_start >= :earliest",
+            "f.availability_start < :next_day",
+            "f.availability_end >= :day",
+        ], {
+            "earliest": (day - datetime.timedelta(days=longest)).isoformat(),
+            "next_day": (day + datetime.timedelta(days=1)).isoformat(),
+            "day": day.isoformat(),
+        }
+
+    def _airport_ids(self, *names: Optional[str]) -> dict:
+        with self._lock:
+            return {
+                name: airport_id
+                for airport_id, name in self._conn.execute(
+                    "SELECT id, name FROM airports"
+                    f" WHERE name IN ({', '.join('?' * len(names))})",
+                    names,
+                )
+            }
+
+    def travel_routes(
+        self,
+        travel_date: str,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Routes advertised for travel on `travel_date` (an ISO date),
+        optionally only those departing from `hub` and/or arriving at
+        `destination`, with the number of records advertising each, most
+        advertised first"""
+        conditions, params = self._window_filter(travel_date)
+        ids = self._airport_ids(hub, destination)
+        # Unary + keeps the planner off the route indexes, which would scan
+        # every record of an airport rather than a few days of windows
+        if hub:
+            conditions.append("+f.origin = :hub")
+            params["hub"] = ids.get(hub, -1)
+        if destination:
+            conditions.append("+f.destination = :destination")
+            params["destination"] = ids.get(destination, -1)
+        return self._query(
+            f"""
+            SELECT o.name AS departure_from, d.name AS departure_to,
+                   r.snapshots
+            FROM (SELECT f.origin, f.destination, COUNT(*) AS snapshots
+                  FROM flights f WHERE {" AND ".join(conditions)}
+                  GROUP BY f.origin, f.destination) r
+            JOIN airports o ON o.id = r.origin
+            JOIN airports d ON d.id = r.destination
+            ORDER BY r.snapshots DESC, o.name, d.name
+            """,
+            params,
+        )
+
+    def travel_snapshot_count(
+        self, origin: str, destination: str, travel_date: str
+    ) -> int:
+        """Number of records that advertised origin -> destination for travel
+        on `travel_date` (an ISO date)"""
+        routes = self.travel_routes(travel_date, origin, destination)
+        return int(routes["snapshots"].sum())
+
+    def records(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        limit: Optional[int] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Records departing from `hub` and/or arriving at `destination`; with
+        both, records of the route in either direction. `since` and `until`
+        bound the collection dates (inclusive)."""
+        where, params = self._route_filter(hub, destination, since, until)
+        sql = f"{RECORDS_SQL} {where} ORDER BY f.collection_date, f.rowid"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self._query(sql, params)
+
+    def daily_counts(
+        self,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Records per collection date between `since` and `until` (inclusive,
+        optional); with both `hub` and `destination`, also split by direction
+        (`outbound` is 1 for hub -> destination)"""
+        where, params = self._route_filter(hub, destination, since, until)
+        if hub and destination:
+            keys = "f.collection_date, f.origin = :hub AS outbound"
+            group = "1, 2"
+        else:
+            keys, group = "f.collection_date", "1"
+        return self._query(
+            f"SELECT {keys}, COUNT(*) AS flight_count FROM flights f {where}"
+            f" GROUP BY {group} ORDER BY {group}",
+            params,
+        )
+
+    def _route_filter(
+        self,
+        hub: Optional[str],
+        destination: Optional[str],
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[str, dict]:
+        """WHERE clause on `flights f` for a hub/destination filter and a range
+        of collection dates, with the airport names resolved to ids up front
+        so the (airport, collection_date) indexes apply"""
+        ids = self._airport_ids(hub, destination)
+        # Unknown airports match nothing (ids are never negative)
+        params = {"hub": ids.get(hub, -1), "destination": ids.get(destination, -1)}
+        conditions = []
+        if hub and destination:
+            conditions.append(
+                "((f.origin = :hub AND f.destination = :destination)"
+                " OR (f.origin = :destination AND f.destination = :hub))"
+            )
+        elif hub:
+            conditions.append("f.origin = :hub")
+        elif destination:
+            conditions.append("f.destination = :destination")
+        if since:
+            conditions.append("f.collection_date >= :since")
+            params["since"] = since
+        if until:
+            conditions.append("f.collection_date <= :until")
+            params["until"] = until
+        if not conditions:
+            return "", params
+        return "WHERE " + " AND ".join(conditions), params
@@ -0,0 +1,127 @@
+"""Interval index over the availability windows of the collected records.
+
+Every record advertises its route for travel between availability_start and
+availability_end, a few days after the collection date. The windows are kept
+as inclusive (start, end) day numbers sorted by start. Windows are short, so
+the ones covering a travel day T all start in [T - longest window + 1, T],
+which two binary searches find. Per route, the windows covering T number
+#(start <= T) - #(end < T); with starts and ends sorted by (route, day) keys,
+that is four binary searches.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+WINDOW_COLUMNS = [
+    "departure_from",
+    "departure_to",
+    "availability_start",
+    "availability_end",
+]
+
+
+def _day_numbers(values) -> np.ndarray:
+    return pd.DatetimeIndex(values).values.astype("datetime64[D]").astype(np.int64)
+
+
+class TravelWindows:
+    def __init__(
+        self,
+        airports: list,
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+    ) -> None:
+        self.airports = list(airports)
+        self._airport_idx = {name: i for i, name in enumerate(self.airports)}
+        order = np.argsort(starts, kind="stable")
+        self.origins = np.asarray(origins, dtype=np.int32)[order]
+        self.destinations = np.asarray(destinations, dtype=np.int32)[order]
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+        self.max_length = int((self.ends - self.starts).max()) + 1 if len(order) else 0
+
+        # (route, day) keys: route * span + day offset, sorted
+        self._first_day = int(self.starts.min()) if len(order) else 0
+        self._span = int(self.ends.max()) - self._first_day + 1 if len(order) else 1
+        routes = self.origins.astype(np.int64) * len(self.airports) + self.destinations
+        self._start_keys = np.sort(
+            routes * self._span + (self.starts - self._first_day)
+        )
+        self._end_keys = np.sort(routes * self._span + (self.ends - self._first_day))
+
+    @classmethod
+    def empty(cls) -> "TravelWindows":
+        empty = np.array([], dtype=np.int64)
+        return cls([], empty, empty, empty, empty)
+
+    @classmethod
+    def from_frame(cls, records: pd.DataFrame) -> "TravelWindows":
+        """Build from records with the WINDOW_COLUMNS; records without a
+        complete window are left out"""
+        if records.empty or any(c not in records.columns for c in WINDOW_COLUMNS):
+            return cls.empty()
+        windows = records[WINDOW_COLUMNS].dropna()
+        airports = sorted(set(windows["departure_from"]) | set(windows["departure_to"]))
+        return cls(
+            airports,
+            pd.Categorical(windows["departure_from"], categories=airports).codes,
+            pd.Categorical(windows["departure_to"], categories=airports).codes,
+            _day_numbers(windows["availability_start"]),
+            _day_numbers(windows["availability_end"]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def covering(self, travel_date) -> np.ndarray:
+        """Positions of the windows that include `travel_date`"""
+        day = int(_day_numbers([travel_date])[0])
+        lo = np.searchsorted(self.starts, day - self.max_length + 1, side="left")
+        hi = np.searchsorted(self.starts, day, side="right")
+        return lo + np.flatnonzero(self.ends[lo:hi] >= day)
+
+    def routes_on(
+        self,
+        travel_date,
+        hub: Optional[str] = None,
+        destination: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Routes advertised for travel on `travel_date`, optionally only those
+        departing from `hub` and/or arriving at `destination`, with the number
+        of records advertising each, most advertised first"""
+        idx = self.covering(travel_date)
+        for name, codes in [(hub, self.origins), (destination, self.destinations)]:
+            if name:
+                idx = idx[codes[idx] == self._airport_idx.get(name, -1)]
+        n_airports = max(len(self.airports), 1)
+        keys = self.origins[idx].astype(np.int64) * n_airports + self.destinations[idx]
+        routes, counts = np.unique(keys, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        airports = np.array(self.airports, dtype=object)
+        return pd.DataFrame(
+            {
+                "departure_from": airports[routes[order] // n_airports],
+                "departure_to": airports[routes[order] % n_airports],
+                "snapshots": counts[order],
+            }
+        )
+
+    def snapshot_count(self, origin: str, destination: str, travel_date) -> int:
+        """Number of records that advertised origin -> destination for travel
+        on `travel_date`"""
+        o, d = self._airport_idx.get(origin), self._airport_idx.get(destination)
+        if o is None or d is None:
+            return 0
+        day = int(_day_numbers([travel_date])[0]) - self._first_day
+        if day < 0 or day >= self._span:
+            return 0
+        base = (o * len(self.airports) + d) * self._span
+        started = np.searchsorted(self._start_keys, base + day, side="right")
+        started -= np.searchsorted(self._start_keys, base, side="left")
+        ended = np.searchsorted(self._end_keys, base + day, side="left")
+        ended -= np.searchsorted(self._end_keys, base, side="left")
+        return int(started - ended)
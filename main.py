@@ -1,14 +1,29 @@
 """PDF Table Downloader for the WizzAir AYCF Availability table."""
 
+import bisect
 import contextlib
+import difflib
 import tempfile
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 
 import typer
 
-import fetch as fetchlib
-import parse as parselib
+from anomalies import (
+    ANOMALY_EXIT_CODE,
+    DEFAULT_WINDOW,
+    check_latest,
+    fails_run,
+    format_report,
+    record_anomaly_metrics,
+)
+from changelog import DEFAULT_CHANGES_PATH, RouteChangeLog
+from connections import ConnectionFinder
+from metrics import TextfileMetrics, lag_seconds
+from routeindex import DEFAULT_INDEX_PATH, IndexFormatError, RouteIndex
+
+# fetch and parse pull in requests, pandas and camelot; they are imported by
+# the commands that need them so that `query` starts quickly.
 
 DEFAULT_AVAILABILITY_URL = "https://multipass.wizzair.com/aycf-availability.pdf"
 app = typer.Typer()
@@ -23,38 +38,142 @@ def path_or_temp_dir(path: Path | None = None):
             yield tmpdir
 
 
-def _parse(pdf_path: Path, data_dir: Path) -> tuple[str, datetime]:
+def _parse(
+    pdf_path: Path, data_dir: Path, metrics: TextfileMetrics
+) -> tuple[str, datetime]:
     """
     Parse PDF without printing
 
     Returns:
         (data_file, data_generated_at)
     """
-    metadata = parselib.get_metadata(pdf_path)
-    data_generated_at = metadata[1]
-    data = parselib.get_data(pdf_path)
-    parselib.add_metadata(data, metadata)
+    import parse as parselib
+
+    with metrics.stage("parse"):
+        metadata = parselib.get_metadata(pdf_path)
+        data_generated_at = metadata[1]
+        data = parselib.get_data(pdf_path)
+        parselib.add_metadata(data, metadata)
 
-    # Write to file
-    data_name = Path(f"{data_generated_at.isoformat().replace(':', '_')}.csv")
-    data_file = data_dir / data_name
-    data.to_csv(data_file, index=False)
+        # Write to file
+        data_name = Path(f"{data_generated_at.isoformat().replace(':', '_')}.csv")
+        data_file = data_dir / data_name
+        data.to_csv(data_file, index=False)
 
+    _record_parse_metrics(metrics, data, data_file, data_generated_at)
     return (data_file, data_generated_at)
 
 
+def _record_parse_metrics(
+    metrics: TextfileMetrics, data, data_file: Path, data_generated_at: datetime
+):
+    routes = data[["departure_from", "departure_to"]].drop_duplicates()
+    airports = set(routes["departure_from"]) | set(routes["departure_to"])
+    lag = lag_seconds(data_generated_at)
+    metrics.gauge(
+        "routes", len(routes), "Distinct routes in the parsed snapshot.", stage="parse"
+    )
+    metrics.gauge(
+        "airports",
+        len(airports),
+        "Distinct airports in the parsed snapshot.",
+        stage="parse",
+    )
+    metrics.gauge(
+        "data_generated_lag_seconds",
+        lag,
+        "Seconds between the PDF's data_generated time and the end of parsing.",
+        stage="parse",
+    )
+    metrics.gauge(
+        "output_size_bytes",
+        data_file.stat().st_size,
+        "Size of the written output file.",
+        stage="parse",
+    )
+
+
+def _update_changes(
+    data_dir: Path, changes_file: Path | None, metrics: TextfileMetrics
+) -> None:
+    if changes_file is None:
+        return
+    with metrics.stage("changes"):
+        new_events = RouteChangeLog(changes_file).update(data_dir)
+    added = sum(event.change == "added" for event in new_events)
+    for change, count in (("added", added), ("removed", len(new_events) - added)):
+        metrics.gauge(
+            "route_changes",
+            count,
+            "Routes added or removed by the newly logged snapshots.",
+            change=change,
+        )
+    print(f"Logged {len(new_events)} route changes in {changes_file}")
+
+
+def _check_anomalies(data_dir: Path, window: int, metrics: TextfileMetrics) -> bool:
+    """Report outliers of the newest snapshot; True if any should fail the run"""
+    with metrics.stage("anomalies"):
+        anomalies = check_latest(data_dir, window)
+    record_anomaly_metrics(metrics, anomalies)
+    print(format_report(anomalies))
+    return fails_run(anomalies)
+
+
+def _write_metrics(metrics: TextfileMetrics, metrics_file: Path | None):
+    if metrics_file is not None:
+        metrics.write(metrics_file)
+
+
 @app.command()
-def fetch(url: str = DEFAULT_AVAILABILITY_URL, pdf_dir: Path = Path("pdfs")):
-    """Fetch today's availability PDF and store it in the given directory"""
-    fetched = fetchlib.download_current_pdf(url, Path(pdf_dir))
+def fetch(
+    url: str = DEFAULT_AVAILABILITY_URL,
+    pdf_dir: Path = Path("pdfs"),
+    metrics_file: Path | None = None,
+):
+    """Fetch today's availability PDF and store it in the given directory
+
+    If metrics_file is defined, node-exporter textfile metrics are written there."""
+    import fetch as fetchlib
+
+    metrics = TextfileMetrics()
+    with metrics.stage("fetch"):
+        fetched = fetchlib.download_current_pdf(url, Path(pdf_dir))
+    metrics.gauge(
+        "output_size_bytes",
+        fetched.stat().st_size,
+        "Size of the written output file.",
+        stage="fetch",
+    )
+    _write_metrics(metrics, metrics_file)
     print(f"Currently published PDF downloaded and stored in {fetched}")
 
 
 @app.command()
-def parse(pdf_path: Path, data_dir: Path = Path("data")) -> str:
-    """Parse the given PDF at `pdf_path`, and store the CSV data in the given `out_dir`"""
-    data_file, _ = _parse(pdf_path, data_dir)
+def parse(
+    pdf_path: Path,
+    data_dir: Path = Path("data"),
+    metrics_file: Path | None = None,
+    changes_file: Path | None = None,
+    anomaly_window: int = DEFAULT_WINDOW,
+    fail_on_anomaly: bool = False,
+) -> str:
+    """Parse the given PDF at `pdf_path`, and store the CSV data in the given `out_dir`
+
+    If metrics_file is defined, node-exporter textfile metrics are written there.
+    If changes_file is defined, the route changes since the previous snapshot are
+    appended to that log.
+    The new snapshot's route and airport counts are checked against the previous
+    anomaly_window collection days; with fail_on_anomaly, outlying global counts
+    make the command exit with status 3."""
+    metrics = TextfileMetrics()
+    data_file, _ = _parse(pdf_path, data_dir, metrics)
     print(f"PDF parsed and data stored in {data_file}")
+    _update_changes(data_dir, changes_file, metrics)
+    found = _check_anomalies(data_dir, anomaly_window, metrics)
+    _write_metrics(metrics, metrics_file)
+    if found and fail_on_anomaly:
+        raise typer.Exit(ANOMALY_EXIT_CODE)
 
 
 @app.command()
@@ -62,15 +181,28 @@ def fetch_and_parse(
     url: str = DEFAULT_AVAILABILITY_URL,
     pdf_dir: Path | None = None,
     data_dir: Path = Path("data"),
+    metrics_file: Path | None = None,
+    changes_file: Path | None = None,
+    anomaly_window: int = DEFAULT_WINDOW,
+    fail_on_anomaly: bool = False,
 ):
     """Fetch today's availability PDF, parse it, and store the parsed data
 
-    If pdf_dir is also defined, the source pdf is retained in the specified directory."""
+    If pdf_dir is also defined, the source pdf is retained in the specified directory.
+    If metrics_file is defined, node-exporter textfile metrics are written there.
+    If changes_file is defined, the route changes since the previous snapshot are
+    appended to that log.
+    The new snapshot's route and airport counts are checked against the previous
+    anomaly_window collection days; with fail_on_anomaly, outlying global counts
+    make the command exit with status 3."""
+    import fetch as fetchlib
 
+    metrics = TextfileMetrics()
     with path_or_temp_dir(pdf_dir) as pdf_workdir:
-        unparsed = fetchlib.download_current_pdf(url, Path(pdf_workdir))
+        with metrics.stage("fetch"):
+            unparsed = fetchlib.download_current_pdf(url, Path(pdf_workdir))
 
-        data_file, data_generated_at = _parse(unparsed, data_dir)
+        data_file, data_generated_at = _parse(unparsed, data_dir, metrics)
 
         # In case all operations were successful, we reach this point.
         # Mark PDF as parsed, rename to data_generated_at timestamp
@@ -80,6 +212,191 @@ def fetch_and_parse(
         if pdf_dir is not None:
             print(f"Parsed PDF stored in {parsed}")
         print(f"CSV data stored in {data_file}.")
+    _update_changes(data_dir, changes_file, metrics)
+    found = _check_anomalies(data_dir, anomaly_window, metrics)
+    _write_metrics(metrics, metrics_file)
+    if found and fail_on_anomaly:
+        raise typer.Exit(ANOMALY_EXIT_CODE)
+
+
+@app.command()
+def index(data_dir: Path = Path("data"), out: Path = DEFAULT_INDEX_PATH):
+    """Build the route availability index used by `query` from the CSV files"""
+    from aggregate import build_aggregated_data
+    from routeindex import data_version
+
+    route_index = RouteIndex.from_aggregated(
+        build_aggregated_data(data_dir), version=data_version(data_dir)
+    )
+    size = route_index.write(out)
+    print(
+        f"wrote {out} ({size / 1024:.1f} KB): {len(route_index.dates)} days, "
+        f"{len(route_index.airports)} airports, {len(route_index.routes)} routes"
+    )
+
+
+def _open_index(path: Path) -> RouteIndex:
+    try:
+        return RouteIndex.open(path)
+    except FileNotFoundError:
+        raise typer.BadParameter(
+            f"{path} does not exist; build it with `main.py index`",
+            param_hint="--index",
+        )
+    except IndexFormatError as e:
+        raise typer.BadParameter(str(e), param_hint="--index")
+
+
+def _check_airport(route_index: RouteIndex, name: str, param_hint: str) -> int:
+    if name not in route_index.airport_idx:
+        close = difflib.get_close_matches(name, route_index.airports, n=3)
+        hint = f"; did you mean {', '.join(close)}?" if close else ""
+        raise typer.BadParameter(
+            f"unknown airport '{name}'{hint}", param_hint=param_hint
+        )
+    return route_index.airport_idx[name]
+
+
+def _iso_date(value: str | None) -> str | None:
+    """Normalize an optional YYYY-MM-DD option; the indexes compare dates as
+    strings, so anything else would silently select the wrong days"""
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise typer.BadParameter(
+            f"invalid date '{value}', expected YYYY-MM-DD"
+        ) from None
+
+
+@app.command()
+def query(
+    origin: str | None = typer.Option(None, "--from", help="Departure airport"),
+    destination: str | None = typer.Option(None, "--to", help="Arrival airport"),
+    since: str | None = typer.Option(
+        None, callback=_iso_date, help="First day, YYYY-MM-DD (inclusive)"
+    ),
+    until: str | None = typer.Option(
+        None, callback=_iso_date, help="Last day, YYYY-MM-DD (inclusive)"
+    ),
+    dates: bool = typer.Option(False, "--dates", help="List the available days"),
+    index_path: Path = typer.Option(DEFAULT_INDEX_PATH, "--index"),
+):
+    """Days with AYCF availability per route, answered from the prebuilt index
+
+    With --from and --to, report that route; with only one of them, report every
+    route from (or to) that airport, most available first."""
+    if origin is None and destination is None:
+        raise typer.BadParameter("give --from, --to or both")
+    route_index = _open_index(index_path)
+    if origin is not None:
+        o = _check_airport(route_index, origin, "--from")
+    if destination is not None:
+        d = _check_airport(route_index, destination, "--to")
+
+    if origin is not None and destination is not None:
+        route = route_index.route_idx.get((o, d))
+        if route is None:
+            print(f"{origin} → {destination}\tnever available")
+            return
+        routes = [route]
+    elif origin is not None:
+        routes = route_index.outbound[o]
+    else:
+        routes = route_index.inbound[d]
+
+    window = route_index.day_range_mask(since, until)
+    collected = window.bit_count()
+    # Last collection day of the period, for last-seen and the current streak
+    n_days = len(route_index.dates)
+    last_day = (bisect.bisect_right(route_index.dates, until) if until else n_days) - 1
+    counts = {r: route_index.days_available(r, window) for r in routes}
+    for r in sorted(routes, key=lambda r: -counts[r]):
+        o_name, d_name = (route_index.airports[i] for i in route_index.routes[r])
+        share = counts[r] / collected * 100 if collected else 0.0
+        runs = route_index.runs(r)
+        seen = runs.last_seen(last_day) if last_day >= 0 else None
+        print(
+            f"{o_name} → {d_name}\t{counts[r]}/{collected} days\t{share:.1f}%"
+            f"\tlast seen {route_index.dates[seen] if seen is not None else '-'}"
+            f"\tstreak {runs.current_streak(last_day)} days"
+        )
+        if dates:
+            for day in route_index.available_dates(r, window):
+                print(f"  {day}")
+
+
+@app.command()
+def connections(
+    origin: str = typer.Option(..., "--from", help="Departure airport"),
+    destination: str = typer.Option(..., "--to", help="Arrival airport"),
+    since: str | None = typer.Option(
+        None, callback=_iso_date, help="First day, YYYY-MM-DD (inclusive)"
+    ),
+    until: str | None = typer.Option(
+        None, callback=_iso_date, help="Last day, YYYY-MM-DD (inclusive)"
+    ),
+    max_stops: int = typer.Option(1, min=0, max=2, help="Most changes per trip"),
+    limit: int = typer.Option(20, min=0, help="Most itineraries to list"),
+    index_path: Path = typer.Option(DEFAULT_INDEX_PATH, "--index"),
+):
+    """Direct, one- and two-stop trips with every leg available on the same day
+
+    Lists itineraries feasible on at least one day between --since and --until,
+    ranked by how often their legs have been available over all collected days."""
+    route_index = _open_index(index_path)
+    _check_airport(route_index, origin, "--from")
+    _check_airport(route_index, destination, "--to")
+    if origin == destination:
+        raise typer.BadParameter("must differ from --from", param_hint="--to")
+
+    collected = route_index.day_range_mask(since, until).bit_count()
+    finder = ConnectionFinder(route_index)
+    found = finder.find(origin, destination, since, until, max_stops, limit)
+    if not found:
+        print(f"{origin} → {destination}\tno connections")
+    for connection in found:
+        print(
+            f"{' → '.join(connection.airports)}\t"
+            f"{connection.days}/{collected} days\t"
+            f"reliability {connection.reliability * 100:.1f}%"
+        )
+
+
+@app.command()
+def changes(
+    data_dir: Path = Path("data"),
+    changes_file: Path = DEFAULT_CHANGES_PATH,
+    since: str | None = typer.Option(
+        None, callback=_iso_date, help="First day, YYYY-MM-DD (inclusive)"
+    ),
+    until: str | None = typer.Option(
+        None, callback=_iso_date, help="Last day, YYYY-MM-DD (inclusive)"
+    ),
+    airport: str | None = typer.Option(None, help="Only changes touching this airport"),
+    update: bool = typer.Option(False, help="Log new snapshots before reporting"),
+):
+    """Route churn per airport between two days, from the route change log
+
+    With --airport, list that airport's individual route changes instead."""
+    log = RouteChangeLog(changes_file)
+    if update:
+        new_events = log.update(data_dir)
+        if new_events:
+            print(f"Logged {len(new_events)} new route changes in {changes_file}")
+
+    if airport is not None:
+        for event in log.changes(since, until):
+            if airport in event.route:
+                sign = "+" if event.change == "added" else "-"
+                route = f"{event.departure_from} → {event.departure_to}"
+                print(f"{event.date}\t{sign}\t{route}")
+        return
+
+    churn = log.churn(since, until)
+    for name, counts in sorted(churn.items(), key=lambda item: -item[1].total()):
+        print(f"{name}\t+{counts['added']}\t-{counts['removed']}")
 
 
 if __name__ == "__main__":
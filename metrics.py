@@ -0,0 +1,107 @@
+"""Prometheus node-exporter textfile metrics for pipeline runs.
+
+The textfile collector of node-exporter picks up `*.prom` files from a
+directory on every scrape, so no Prometheus client or server is needed here:
+metrics are rendered to the text exposition format and written atomically.
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+METRIC_PREFIX = "aycf"
+# The source PDFs carry naive local times of the publisher
+SOURCE_TIMEZONE = ZoneInfo("Europe/Budapest")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def lag_seconds(generated_at: datetime) -> float:
+    """Seconds from a naive source timestamp (CET/CEST) to now, independent
+    of the host's time zone"""
+    return time.time() - generated_at.replace(tzinfo=SOURCE_TIMEZONE).timestamp()
+
+
+class TextfileMetrics:
+    """Collects gauges for one run and renders them in textfile format."""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        # name -> (help text, {sorted label items -> value})
+        self._gauges: dict[str, tuple[str, dict[tuple, float]]] = {}
+
+    def gauge(self, name: str, value: float, help_text: str, **labels: str):
+        """Set the gauge `name` with the given labels to `value`."""
+        full_name = f"{self.prefix}_{name}"
+        _, samples = self._gauges.setdefault(full_name, (help_text, {}))
+        samples[tuple(sorted(labels.items()))] = value
+
+    @contextlib.contextmanager
+    def stage(self, stage: str):
+        """Time a pipeline stage; its success timestamp is only set if it completes."""
+        started = time.monotonic()
+        yield
+        self.gauge(
+            "stage_duration_seconds",
+            time.monotonic() - started,
+            "Wall-clock duration of the last successful run of a pipeline stage.",
+            stage=stage,
+        )
+        self.gauge(
+            "stage_last_success_timestamp_seconds",
+            time.time(),
+            "Unix time at which the pipeline stage last completed successfully.",
+            stage=stage,
+        )
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._gauges):
+            help_text, samples = self._gauges[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(samples.items()):
+                label_str = ",".join(
+                    f'{k}="{_escape_label(str(v))}"' for k, v in labels
+                )
+                series = f"{name}{{{label_str}}}" if label_str else name
+                lines.append(f"{series} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """Atomically replace `path` with the rendered metrics.
+
+        The temporary file lives in the same directory (so the final rename
+        cannot cross filesystems) and does not end in `.prom`, so the
+        collector never reads a partially written file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_name)
+            raise
@@ -0,0 +1,319 @@
+"""Compact index of route availability per collection day.
+
+Routes are (origin, destination) airport index pairs sorted by origin and then
+destination, like the `routes` of aggregate.py's output. Each route's
+availability is one Python int used as a bitset over the collection days, with
+day 0 in the most significant bit (the layout `numpy.packbits` produces), so
+per-day lookups are a shift and per-weekday ratios are popcounts.
+
+An index can be written to a compact binary file and opened again with mmap,
+reading only the route rows a query touches:
+
+    offset  size  content
+    0       8     magic b"AYCFIDX\\0"
+    8       4     format version (uint32, little endian)
+    12      4     header length H (uint32, little endian)
+    16      H     UTF-8 JSON header: airports, routes, dates, generated_at,
+                  version, row_bytes, matrix_offset
+    ...           zero padding up to matrix_offset (a multiple of 8)
+    matrix_offset rows * row_bytes bytes: the route x day bit matrix, one row
+                  per route, day 0 in the most significant bit of the first byte
+"""
+
+import bisect
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+from routeruns import RouteRuns
+
+INDEX_MAGIC = b"AYCFIDX\0"
+INDEX_FORMAT_VERSION = 1
+INDEX_PREFIX = struct.Struct("<8sII")
+DEFAULT_INDEX_PATH = Path("route-index.bin")
+
+WEEKDAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+
+def data_version(data_dir: Path) -> str:
+    """Short digest of the CSV file names, sizes and mtimes in `data_dir`,
+    which changes whenever a snapshot is added, removed or rewritten"""
+    digest = hashlib.sha1()
+    for file in sorted(Path(data_dir).glob("*.csv")):
+        stat = file.stat()
+        digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+class IndexFormatError(ValueError):
+    pass
+
+
+class MappedMasks(Sequence):
+    """Route masks read on demand from the matrix section of a mapped file"""
+
+    def __init__(self, buffer, offset: int, row_bytes: int, n_routes: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._row_bytes = row_bytes
+        self._n_routes = n_routes
+
+    def __len__(self) -> int:
+        return self._n_routes
+
+    def __getitem__(self, route: int) -> int:
+        if not 0 <= route < self._n_routes:
+            raise IndexError(route)
+        start = self._offset + route * self._row_bytes
+        return int.from_bytes(self._buffer[start : start + self._row_bytes], "big")
+
+
+@dataclass
+class RouteIndex:
+    airports: list[str]
+    routes: list[tuple[int, int]]
+    dates: list[str]
+    masks: Sequence[int]
+    generated_at: str | None = None
+    version: str = ""
+    airport_idx: dict[str, int] = field(init=False, repr=False)
+    route_idx: dict[tuple[int, int], int] = field(init=False, repr=False)
+    date_idx: dict[str, int] = field(init=False, repr=False)
+    outbound: list[list[int]] = field(init=False, repr=False)
+    inbound: list[list[int]] = field(init=False, repr=False)
+    weekday_masks: list[int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.airport_idx = {name: i for i, name in enumerate(self.airports)}
+        self.route_idx = {pair: r for r, pair in enumerate(self.routes)}
+        self.date_idx = {d: i for i, d in enumerate(self.dates)}
+        self.outbound = [[] for _ in self.airports]
+        self.inbound = [[] for _ in self.airports]
+        for r, (o, d) in enumerate(self.routes):
+            self.outbound[o].append(r)
+            self.inbound[d].append(r)
+        self.weekday_masks = [0] * 7
+        for i, day in enumerate(self.dates):
+            self.weekday_masks[date.fromisoformat(day).weekday()] |= self.day_bit(i)
+
+    @classmethod
+    def from_aggregated(cls, data: dict, version: str = "") -> "RouteIndex":
+        """Build from the output of `aggregate.build_aggregated_data`"""
+        dates = sorted(data["availability"])
+        index = cls(
+            airports=list(data["airports"]),
+            routes=[(o, d) for o, d in data["routes"]],
+            dates=dates,
+            masks=[0] * len(data["routes"]),
+            generated_at=data.get("generated_at"),
+            version=version,
+        )
+        for i, day in enumerate(dates):
+            bit = index.day_bit(i)
+            for r in data["availability"][day]:
+                index.masks[r] |= bit
+        return index
+
+    @classmethod
+    def open(cls, path: Path) -> "RouteIndex":
+        """Map an index file written by `write`; route rows are read lazily"""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < INDEX_PREFIX.size:
+            raise IndexFormatError(f"{path} is not a route index")
+        magic, format_version, header_len = INDEX_PREFIX.unpack_from(buffer)
+        if magic != INDEX_MAGIC:
+            raise IndexFormatError(f"{path} is not a route index")
+        if format_version != INDEX_FORMAT_VERSION:
+            raise IndexFormatError(
+                f"{path} has index format {format_version}, "
+                f"expected {INDEX_FORMAT_VERSION}; rebuild it"
+            )
+        start = INDEX_PREFIX.size
+        header = json.loads(buffer[start : start + header_len])
+        masks = MappedMasks(
+            buffer, header["matrix_offset"], header["row_bytes"], len(header["routes"])
+        )
+        return cls(
+            airports=header["airports"],
+            routes=[(o, d) for o, d in header["routes"]],
+            dates=header["dates"],
+            masks=masks,
+            generated_at=header["generated_at"],
+            version=header["version"],
+        )
+
+    def write(self, path: Path) -> int:
+        """Atomically replace `path` with the binary index; returns its size"""
+        row_bytes = self.width // 8
+        header = {
+            "airports": self.airports,
+            "routes": self.routes,
+            "dates": self.dates,
+            "generated_at": self.generated_at,
+            "version": self.version,
+            "row_bytes": row_bytes,
+        }
+        # The matrix offset is part of the header, so size it with a
+        # placeholder of the widest value it can take
+        header["matrix_offset"] = 2**32
+        header_len = len(json.dumps(header, separators=(",", ":")).encode())
+        header["matrix_offset"] = -(-(INDEX_PREFIX.size + header_len) // 8) * 8
+        header_bytes = json.dumps(header, separators=(",", ":")).encode()
+        header_bytes += b" " * (header_len - len(header_bytes))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(
+                    INDEX_PREFIX.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, header_len)
+                )
+                f.write(header_bytes)
+                f.write(b"\0" * (header["matrix_offset"] - f.tell()))
+                for mask in self.masks:
+                    f.write(mask.to_bytes(row_bytes, "big"))
+                size = f.tell()
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_name)
+            raise
+        return size
+
+    @property
+    def width(self) -> int:
+        """Bits per route mask: the day count rounded up to whole bytes"""
+        return (len(self.dates) + 7) // 8 * 8
+
+    def day_bit(self, day: int) -> int:
+        return 1 << (self.width - 1 - day)
+
+    def route(self, origin: str, destination: str) -> int | None:
+        o, d = self.airport_idx.get(origin), self.airport_idx.get(destination)
+        if o is None or d is None:
+            return None
+        return self.route_idx.get((o, d))
+
+    def destinations_on(self, origin: str, day: str) -> list[str]:
+        """Destinations reachable from `origin` on collection day `day`"""
+        bit = self.day_bit(self.date_idx[day])
+        return [
+            self.airports[self.routes[r][1]]
+            for r in self.outbound[self.airport_idx[origin]]
+            if self.masks[r] & bit
+        ]
+
+    def origins_on(self, destination: str, day: str) -> list[str]:
+        """Origins with a flight to `destination` on collection day `day`"""
+        bit = self.day_bit(self.date_idx[day])
+        return [
+            self.airports[self.routes[r][0]]
+            for r in self.inbound[self.airport_idx[destination]]
+            if self.masks[r] & bit
+        ]
+
+    def day_range_mask(self, since: str | None = None, until: str | None = None) -> int:
+        """Bits of the collection days between `since` and `until` (ISO dates,
+        both inclusive and optional)"""
+        lo = bisect.bisect_left(self.dates, since) if since else 0
+        hi = bisect.bisect_right(self.dates, until) if until else len(self.dates)
+        if hi <= lo:
+            return 0
+        return ((1 << (hi - lo)) - 1) << (self.width - hi)
+
+    def days_available(self, route: int, window: int) -> int:
+        return (self.masks[route] & window).bit_count()
+
+    def available_dates(self, route: int, window: int) -> list[str]:
+        mask = self.masks[route] & window
+        return [day for i, day in enumerate(self.dates) if mask & self.day_bit(i)]
+
+    def runs(self, route: int) -> RouteRuns:
+        """The route's availability as runs of consecutive collection days"""
+        mask = self.masks[route]
+        starts: list[int] = []
+        ends: list[int] = []
+        for day in range(len(self.dates)):
+            if not mask & self.day_bit(day):
+                continue
+            if ends and ends[-1] == day - 1:
+                ends[-1] = day
+            else:
+                starts.append(day)
+                ends.append(day)
+        return RouteRuns(starts, ends)
+
+    def round_trip_counts(self, return_days: int) -> list[int]:
+        """For every route A -> B, the number of collection days d on which
+        A -> B was available and B -> A was available on one of the next
+        `return_days` collection days.
+
+        Only the first len(dates) - return_days days count as outbound days,
+        so every return window is fully collected. Shifting the return mask
+        left by j lines day d + j up with day d.
+        """
+        if len(self.dates) <= return_days:
+            return [0] * len(self.routes)
+        outbound_days = self.day_range_mask(until=self.dates[-return_days - 1])
+        counts = []
+        for r, (o, d) in enumerate(self.routes):
+            back = self.route_idx.get((d, o))
+            if back is None:
+                counts.append(0)
+                continue
+            returns = self.masks[back]
+            within = 0
+            for shift in range(1, return_days + 1):
+                within |= returns << shift
+            counts.append((self.masks[r] & within & outbound_days).bit_count())
+        return counts
+
+    def weekday_ratios(
+        self,
+        origin: str,
+        destination: str,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict]:
+        """Share of collection days per weekday between `since` and `until`
+        (see day_range_mask) on which the route was available; a route never
+        seen has a ratio of 0 on every weekday"""
+        window = self.day_range_mask(since, until)
+        r = self.route(origin, destination)
+        mask = self.masks[r] & window if r is not None else 0
+        result = []
+        for weekday, name in enumerate(WEEKDAY_NAMES):
+            collected = (self.weekday_masks[weekday] & window).bit_count()
+            available = (mask & self.weekday_masks[weekday]).bit_count()
+            result.append(
+                {
+                    "weekday": name,
+                    "days_available": available,
+                    "days_collected": collected,
+                    "ratio": available / collected if collected else 0.0,
+                }
+            )
+        return result
@@ -0,0 +1,105 @@
+"""Run-length encoded route availability over the collection days.
+
+A route's presence is stored as sorted, non-overlapping runs of consecutive
+collection days, each an inclusive (start, end) pair of positions in the
+sorted list of collection dates. Prefix sums of the run lengths make "days
+available in a window" a pair of binary searches; "last seen", "current
+streak" and "longest gap" read the runs directly instead of every day.
+
+In aggregate.py's output, the runs of each route are flattened to
+[start0, end0, start1, end1, ...].
+"""
+
+import bisect
+from itertools import accumulate
+
+
+class RunBuilder:
+    """Builds the runs of every route one collection day at a time"""
+
+    def __init__(self, n_routes: int):
+        self.starts: list[list[int]] = [[] for _ in range(n_routes)]
+        self.ends: list[list[int]] = [[] for _ in range(n_routes)]
+
+    def add_day(self, day: int, route_ids) -> None:
+        """Mark the routes available on collection day `day`; days must be
+        added in increasing order"""
+        for r in route_ids:
+            ends = self.ends[r]
+            if ends and ends[-1] == day - 1:
+                ends[-1] = day
+            elif not ends or ends[-1] < day:
+                self.starts[r].append(day)
+                ends.append(day)
+
+    def flat(self, route: int) -> list[int]:
+        return [x for run in zip(self.starts[route], self.ends[route]) for x in run]
+
+
+class RouteRuns:
+    def __init__(self, starts: list[int], ends: list[int]):
+        self.starts = starts
+        self.ends = ends
+        # _cumulative[i] = days covered by the first i runs
+        self._cumulative = [0, *accumulate(e - s + 1 for s, e in zip(starts, ends))]
+
+    @classmethod
+    def from_flat(cls, flat: list[int]) -> "RouteRuns":
+        return cls(list(flat[0::2]), list(flat[1::2]))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def days_available(self) -> int:
+        return self._cumulative[-1]
+
+    def is_available(self, day: int) -> bool:
+        i = bisect.bisect_right(self.starts, day) - 1
+        return i >= 0 and day <= self.ends[i]
+
+    def days_in(self, first: int, last: int) -> int:
+        """Days available between collection days `first` and `last` (inclusive)"""
+        if last < first or not self.starts:
+            return 0
+        # Runs lo..hi-1 overlap the window; clip the two at its edges
+        lo = bisect.bisect_left(self.ends, first)
+        hi = bisect.bisect_right(self.starts, last)
+        if hi <= lo:
+            return 0
+        days = self._cumulative[hi] - self._cumulative[lo]
+        days -= max(0, first - self.starts[lo])
+        days -= max(0, self.ends[hi - 1] - last)
+        return days
+
+    def ratio(self, first: int, last: int) -> float:
+        """Share of the collection days between `first` and `last` (inclusive)
+        on which the route was available"""
+        if last < first:
+            return 0.0
+        return self.days_in(first, last) / (last - first + 1)
+
+    def last_seen(self, as_of: int | None = None) -> int | None:
+        """Last collection day on or before `as_of` with the route available"""
+        if as_of is None:
+            return self.ends[-1] if self.ends else None
+        i = bisect.bisect_right(self.starts, as_of) - 1
+        if i < 0:
+            return None
+        return min(self.ends[i], as_of)
+
+    def current_streak(self, as_of: int) -> int:
+        """Consecutive collection days up to and including `as_of` with the
+        route available (0 if it was not available on `as_of`)"""
+        i = bisect.bisect_right(self.starts, as_of) - 1
+        if i < 0 or self.ends[i] < as_of:
+            return 0
+        return as_of - self.starts[i] + 1
+
+    def longest_streak(self) -> int:
+        return max((e - s + 1 for s, e in zip(self.starts, self.ends)), default=0)
+
+    def longest_gap(self) -> int:
+        """Most consecutive collection days without the route between two of
+        its runs"""
+        return max((s - e - 1 for e, s in zip(self.ends, self.starts[1:])), default=0)
@@ -0,0 +1,387 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+"""Serve route and airport availability from the CSV corpus as a JSON HTTP API.
+
+The corpus is loaded once into a RouteIndex and swapped atomically when the
+files in the data directory change, so requests always see one consistent
+version. Responses carry the data version as their ETag and honour
+If-None-Match with 304 Not Modified.
+
+Endpoints (all GET):
+  /version                              data version and corpus size
+  /airports                             all airport names
+  /destinations?from=X&date=YYYY-MM-DD  destinations with seats from X on a day
+  /origins?to=X&date=YYYY-MM-DD         origins with seats to X on a day
+  /weekday-ratio?from=A&to=B[&since=D][&until=D]
+                                        availability ratio of A -> B by weekday
+  /connections?from=A&to=B[&since=D][&until=D][&max_stops=N]
+                                        trips from A to B with up to N changes
+  /travel?date=YYYY-MM-DD[&from=X]      routes advertised for travel on a day
+  /travel-count?from=A&to=B&date=...    snapshots advertising A -> B for a day
+
+`since` and `until` are optional, inclusive ISO collection dates that limit a
+statistic to that period; they are located by binary search in the sorted
+collection dates, so a short period costs less than the whole corpus.
+
+The /travel endpoints key by travel date: a snapshot advertises each route for
+every day of its availability window, not just the day it was collected on.
+"""
+
+import argparse
+import json
+import sys
+import threading
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from aggregate import build_aggregated_data
+from connections import ConnectionFinder
+from routeindex import RouteIndex, data_version
+from travelindex import TravelDateIndex
+
+
+class QueryError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Indexes(NamedTuple):
+    routes: RouteIndex
+    travel: TravelDateIndex
+    connections: ConnectionFinder
+
+
+class IndexHolder:
+    """Holds the current indexes and rebuilds them when the corpus changes.
+
+    Readers take `state` once per request; a reload builds the new indexes
+    first and then replaces the reference, which is atomic.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.state = self._build(data_version(data_dir))
+
+    @property
+    def current(self) -> RouteIndex:
+        return self.state.routes
+
+    def _build(self, version: str) -> Indexes:
+        index = RouteIndex.from_aggregated(
+            build_aggregated_data(self.data_dir), version=version
+        )
+        return Indexes(
+            index, TravelDateIndex.from_csv_dir(self.data_dir), ConnectionFinder(index)
+        )
+
+    def reload_if_changed(self) -> bool:
+        version = data_version(self.data_dir)
+        if version == self.current.version:
+            return False
+        try:
+            self.state = self._build(version)
+        except SystemExit as e:
+            # build_aggregated_data exits on an unusable corpus; keep serving
+            # the previous index in that case
+            print(
+                f"reload failed, keeping {self.current.version}: {e}", file=sys.stderr
+            )
+            return False
+        print(f"reloaded data version {version}", file=sys.stderr)
+        return True
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except OSError as e:
+                print(f"reload failed: {e}", file=sys.stderr)
+
+
+def _param(params: dict[str, list[str]], name: str) -> str:
+    values = params.get(name)
+    if not values or not values[0]:
+        raise QueryError(HTTPStatus.BAD_REQUEST, f"missing parameter '{name}'")
+    return values[0]
+
+
+def _airport(index: RouteIndex, name: str) -> str:
+    if name not in index.airport_idx:
+        raise QueryError(HTTPStatus.NOT_FOUND, f"unknown airport '{name}'")
+    return name
+
+
+def _day(index: RouteIndex, day: str) -> str:
+    if day not in index.date_idx:
+        raise QueryError(HTTPStatus.NOT_FOUND, f"no data collected on '{day}'")
+    return day
+
+
+def _iso_date(day: str) -> str:
+    try:
+        return date.fromisoformat(day).isoformat()
+    except ValueError:
+        raise QueryError(HTTPStatus.BAD_REQUEST, f"invalid date '{day}'") from None
+
+
+def _travel_date(params: dict[str, list[str]]) -> str:
+    return _iso_date(_param(params, "date"))
+
+
+def _date_range(params: dict[str, list[str]]) -> tuple[str | None, str | None]:
+    """The optional inclusive `since` and `until` collection dates"""
+    since = _iso_date(params["since"][0]) if params.get("since") else None
+    until = _iso_date(params["until"][0]) if params.get("until") else None
+    if since and until and until < since:
+        raise QueryError(HTTPStatus.BAD_REQUEST, "until must not be before since")
+    return since, until
+
+
+def _version(index: RouteIndex, params) -> dict:
+    return {
+        "data_version": index.version,
+        "generated_at": index.generated_at,
+        "first_date": index.dates[0] if index.dates else None,
+        "last_date": index.dates[-1] if index.dates else None,
+        "days": len(index.dates),
+        "airports": len(index.airports),
+        "routes": len(index.routes),
+    }
+
+
+def _airports(index: RouteIndex, params) -> dict:
+    return {"airports": index.airports}
+
+
+def _destinations(index: RouteIndex, params) -> dict:
+    origin = _airport(index, _param(params, "from"))
+    day = _day(index, _param(params, "date"))
+    return {
+        "from": origin,
+        "date": day,
+        "destinations": index.destinations_on(origin, day),
+    }
+
+
+def _origins(index: RouteIndex, params) -> dict:
+    destination = _airport(index, _param(params, "to"))
+    day = _day(index, _param(params, "date"))
+    return {
+        "to": destination,
+        "date": day,
+        "origins": index.origins_on(destination, day),
+    }
+
+
+def _weekday_ratio(index: RouteIndex, params) -> dict:
+    origin = _airport(index, _param(params, "from"))
+    destination = _airport(index, _param(params, "to"))
+    since, until = _date_range(params)
+    return {
+        "from": origin,
+        "to": destination,
+        "since": since,
+        "until": until,
+        "weekdays": index.weekday_ratios(origin, destination, since, until),
+    }
+
+
+def _int_param(params: dict[str, list[str]], name: str, default: int) -> int:
+    if not params.get(name):
+        return default
+    try:
+        return int(params[name][0])
+    except ValueError:
+        raise QueryError(
+            HTTPStatus.BAD_REQUEST, f"parameter '{name}' must be an integer"
+        ) from None
+
+
+def _count_param(params: dict[str, list[str]], name: str, default: int) -> int:
+    value = _int_param(params, name, default)
+    if value < 0:
+        raise QueryError(
+            HTTPStatus.BAD_REQUEST, f"parameter '{name}' must not be negative"
+        )
+    return value
+
+
+def _connections(indexes: Indexes, params) -> dict:
+    origin = _airport(indexes.routes, _param(params, "from"))
+    destination = _airport(indexes.routes, _param(params, "to"))
+    since, until = _date_range(params)
+    max_stops = _int_param(params, "max_stops", 1)
+    if not 0 <= max_stops <= 2:
+        raise QueryError(HTTPStatus.BAD_REQUEST, "max_stops must be 0, 1 or 2")
+    limit = _count_param(params, "limit", 20)
+    try:
+        found = indexes.connections.find(
+            origin, destination, since, until, max_stops, limit
+        )
+    except ValueError as e:
+        raise QueryError(HTTPStatus.BAD_REQUEST, str(e)) from None
+    return {
+        "from": origin,
+        "to": destination,
+        "since": since,
+        "until": until,
+        "connections": [
+            {
+                "airports": list(c.airports),
+                "days": c.days,
+                "reliability": c.reliability,
+            }
+            for c in found
+        ],
+    }
+
+
+def _travel(indexes: Indexes, params) -> dict:
+    day = _travel_date(params)
+    origin = params["from"][0] if params.get("from") else None
+    if origin is not None:
+        _airport(indexes.routes, origin)
+    routes = indexes.travel.routes_on(day, origin)
+    return {
+        "date": day,
+        "from": origin,
+        "routes": [
+            {"from": o, "to": d, "snapshots": count}
+            for (o, d), count in sorted(routes.items(), key=lambda kv: -kv[1])
+        ],
+    }
+
+
+def _travel_count(indexes: Indexes, params) -> dict:
+    origin = _airport(indexes.routes, _param(params, "from"))
+    destination = _airport(indexes.routes, _param(params, "to"))
+    day = _travel_date(params)
+    return {
+        "from": origin,
+        "to": destination,
+        "date": day,
+        "snapshots": indexes.travel.snapshot_count(origin, destination, day),
+    }
+
+
+ROUTES = {
+    "/version": _version,
+    "/airports": _airports,
+    "/destinations": _destinations,
+    "/origins": _origins,
+    "/weekday-ratio": _weekday_ratio,
+}
+# Handlers that read the other indexes too
+INDEXES_ROUTES = {
+    "/connections": _connections,
+    "/travel": _travel,
+    "/travel-count": _travel_count,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    server_version = "aycf-query/1"
+    holder: IndexHolder  # set on the subclass created by make_server
+
+    def do_GET(self):
+        indexes = self.holder.state
+        index = indexes.routes
+        etag = f'"{index.version}"'
+        url = urlsplit(self.path)
+        if url.path in INDEXES_ROUTES:
+            handler, source = INDEXES_ROUTES[url.path], indexes
+        else:
+            handler, source = ROUTES.get(url.path), index
+        if handler is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"}, etag)
+            return
+
+        # Answers depend only on the path, the query and the data version
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        try:
+            body = handler(source, parse_qs(url.query))
+        except QueryError as e:
+            self._send_json(e.status, {"error": str(e)}, etag)
+            return
+        self._send_json(HTTPStatus.OK, body, etag)
+
+    def _send_json(self, status: HTTPStatus, body: dict, etag: str):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == HTTPStatus.OK:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(host: str, port: int, holder: IndexHolder) -> ThreadingHTTPServer:
+    handler = type("BoundQueryHandler", (QueryHandler,), {"holder": holder})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path("data"),
+        help="directory containing daily CSV files (default: ./data)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="(default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="(default: 8000)")
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=60.0,
+        help="seconds between checks for new data files; 0 disables (default: 60)",
+    )
+    args = parser.parse_args()
+
+    holder = IndexHolder(args.data_dir)
+    index = holder.current
+    print(
+        f"loaded data version {index.version}: {len(index.dates)} days, "
+        f"{len(index.airports)} airports, {len(index.routes)} routes",
+        file=sys.stderr,
+    )
+
+    stop = threading.Event()
+    if args.reload_interval > 0:
+        threading.Thread(
+            target=holder.watch,
+            args=(args.reload_interval, stop),
+            name="reload",
+            daemon=True,
+        ).start()
+
+    server = make_server(args.host, args.port, holder)
+    print(f"serving on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import pytest
+
+from routeindex import RouteIndex
+
+
+def aggregated(days: dict[str, set[tuple[str, str]]]) -> dict:
+    """Data shaped like aggregate.build_aggregated_data's output, from the
+    routes available on each collection day"""
+    airports = sorted({name for routes in days.values() for r in routes for name in r})
+    airport_idx = {name: i for i, name in enumerate(airports)}
+    routes = sorted(
+        {(airport_idx[o], airport_idx[d]) for rs in days.values() for o, d in rs}
+    )
+    route_idx = {pair: r for r, pair in enumerate(routes)}
+    return {
+        "airports": airports,
+        "routes": [list(pair) for pair in routes],
+        "availability": {
+            day: sorted(route_idx[airport_idx[o], airport_idx[d]] for o, d in rs)
+            for day, rs in sorted(days.items())
+        },
+        "generated_at": max(days, default=None),
+    }
+
+
+@pytest.fixture
+def make_index():
+    def make(days: dict[str, set[tuple[str, str]]], version: str = "v1"):
+        return RouteIndex.from_aggregated(aggregated(days), version)
+
+    return make
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from aggregate import parse_collection_date, read_csv_routes
+from anomalies import AnomalyDetector, DayCounts, fails_run
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def corpus_days(since: str, until: str) -> list[DayCounts]:
+    per_date: dict[str, set[tuple[str, str]]] = {}
+    for path in sorted(DATA_DIR.glob("*.csv")):
+        date = parse_collection_date(path.name)
+        if date is not None and since <= date <= until:
+            per_date.setdefault(date, set()).update(read_csv_routes(path) or ())
+    if not per_date:
+        pytest.skip(f"no collection days between {since} and {until}")
+    return [DayCounts.from_routes(date, routes) for date, routes in per_date.items()]
+
+
+def check_all(detector: AnomalyDetector, days: list[DayCounts]) -> list:
+    return [(day.date, detector.check(day)) for day in days]
+
+
+def network(n_airports: int, spokes: int = 12) -> set[tuple[str, str]]:
+    """Every airport flying to `spokes` others"""
+    return {
+        (f"A{i}", f"A{(i + j) % n_airports}")
+        for i in range(n_airports)
+        for j in range(1, spokes + 1)
+    }
+
+
+def test_normal_corpus_days_are_not_flagged():
+    days = corpus_days("2025-04-15", "2025-07-25")
+    results = check_all(AnomalyDetector(), days)
+    assert not any(fails_run(found) for _, found in results)
+    # Per-airport outliers stay rare (a handful of real suspensions)
+    flagged_days = sum(bool(found) for _, found in results)
+    assert flagged_days <= 0.05 * len(days)
+
+
+def test_corpus_outage_fails_the_run():
+    days = corpus_days("2025-07-01", "2025-08-07")
+    _, found = check_all(AnomalyDetector(), days)[-1]
+    assert fails_run(found)
+    assert {a.metric for a in found if a.is_global} >= {"routes"}
+
+
+def test_nothing_reported_before_min_history():
+    detector = AnomalyDetector(min_history=7)
+    for i in range(7):
+        assert detector.check(DayCounts.from_routes(f"d{i}", network(40))) == []
+
+
+def test_small_change_of_a_constant_count_is_not_flagged():
+    # A flat history has a MAD of 0; the floor keeps one lost airport normal
+    detector = AnomalyDetector()
+    for i in range(10):
+        detector.check(DayCounts.from_routes(f"d{i}", network(150, spokes=5)))
+    smaller = {r for r in network(150, spokes=5) if "A0" not in r}
+    found = detector.check(DayCounts.from_routes("d10", smaller))
+    assert not fails_run(found)
+
+
+def test_large_drop_of_global_counts_is_flagged():
+    detector = AnomalyDetector()
+    for i in range(10):
+        detector.check(DayCounts.from_routes(f"d{i}", network(100)))
+    found = detector.check(DayCounts.from_routes("d10", network(50)))
+    assert {a.metric for a in found} >= {"routes", "airports"}
+    assert all(a.score < 0 for a in found if a.is_global)
+    assert fails_run(found)
+
+
+def test_airports_without_stable_history_are_skipped():
+    detector = AnomalyDetector()
+    base = network(40)
+    for i in range(10):
+        # X only appears on some days
+        extra = {("X", "A1")} if i % 2 else set()
+        detector.check(DayCounts.from_routes(f"d{i}", base | extra))
+    burst = {("X", f"A{i}") for i in range(20)}
+    found = detector.check(DayCounts.from_routes("d10", base | burst))
+    assert not [a for a in found if a.airport == "X"]
+
+
+def test_airport_outliers_need_a_large_relative_change():
+    detector = AnomalyDetector()
+    base = network(40, spokes=10)
+    for i in range(10):
+        detector.check(DayCounts.from_routes(f"d{i}", base))
+    # A0 has 20 routes (10 out, 10 in): losing 5 is a quarter of them
+    fewer = base - {("A0", f"A{j}") for j in range(1, 6)}
+    found = detector.check(DayCounts.from_routes("d10", fewer))
+    assert not [a for a in found if a.airport == "A0"]
+    # Losing all of them is reported, but does not fail the run on its own
+    gone = {r for r in base if "A0" not in r}
+    found = detector.check(DayCounts.from_routes("d11", gone))
+    assert [a.airport for a in found if not a.is_global] == ["A0"]
+    assert not fails_run(found)
@@ -0,0 +1,117 @@
+import csv
+
+from changelog import ADDED, REMOVED, RouteChange, RouteChangeLog
+
+
+def write_snapshot(data_dir, name, routes):
+    with (data_dir / name).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["departure_from", "departure_to"])
+        writer.writerows(sorted(routes))
+
+
+def test_first_snapshot_adds_every_route(tmp_path):
+    write_snapshot(tmp_path, "2025-06-01T07_00_00.csv", {("A", "B"), ("B", "A")})
+    log = RouteChangeLog(tmp_path / "changes.csv")
+    assert log.update(tmp_path) == [
+        RouteChange("2025-06-01", "A", "B", ADDED),
+        RouteChange("2025-06-01", "B", "A", ADDED),
+    ]
+
+
+def test_days_are_diffed_against_the_previous_day(tmp_path):
+    write_snapshot(tmp_path, "2025-06-01T07_00_00.csv", {("A", "B"), ("A", "C")})
+    write_snapshot(tmp_path, "2025-06-02T07_00_00.csv", {("A", "B"), ("C", "A")})
+    write_snapshot(tmp_path, "2025-06-03T07_00_00.csv", {("A", "B"), ("C", "A")})
+    log = RouteChangeLog(tmp_path / "changes.csv")
+    log.update(tmp_path)
+    assert log.changes("2025-06-02") == [
+        RouteChange("2025-06-02", "C", "A", ADDED),
+        RouteChange("2025-06-02", "A", "C", REMOVED),
+    ]
+    assert log.replay("2025-06-01") == {("A", "B"), ("A", "C")}
+    assert log.replay() == {("A", "B"), ("C", "A")}
+    assert log.churn("2025-06-02")["A"] == {ADDED: 1, REMOVED: 1}
+
+
+def test_files_of_one_day_are_merged(tmp_path):
+    write_snapshot(tmp_path, "2025-06-01T07_00_00.csv", {("A", "B")})
+    write_snapshot(tmp_path, "2025-06-01T19_00_00.csv", {("B", "A")})
+    log = RouteChangeLog(tmp_path / "changes.csv")
+    log.update(tmp_path)
+    assert log.replay() == {("A", "B"), ("B", "A")}
+
+
+def test_empty_snapshot_changes_nothing(tmp_path):
+    write_snapshot(tmp_path, "2025-06-01T07_00_00.csv", {("A", "B")})
+    write_snapshot(tmp_path, "2025-06-02T07_00_00.csv", set())
+    log = RouteChangeLog(tmp_path / "changes.csv")
+    log.update(tmp_path)
+    assert log.changes("2025-06-02") == []
+    assert log.replay() == {("A", "B")}
+
+
+def test_update_only_appends_newer_days(tmp_path):
+    changes_file = tmp_path / "changes.csv"
+    write_snapshot(tmp_path, "2025-06-01T07_00_00.csv", {("A", "B")})
+    RouteChangeLog(changes_file).update(tmp_path)
+    write_snapshot(tmp_path, "2025-06-02T07_00_00.csv", {("B", "A")})
+
+    log = RouteChangeLog(changes_file)
+    assert log.update(tmp_path) == [
+        RouteChange("2025-06-02", "B", "A", ADDED),
+        RouteChange("2025-06-02", "A", "B", REMOVED),
+    ]
+    assert RouteChangeLog(changes_file).update(tmp_path) == []
+    assert RouteChangeLog(changes_file).events == log.events
+
+
+def logged(tmp_path, days):
+    for date, routes in days.items():
+        write_snapshot(tmp_path, f"{date}T07_00_00.csv", routes)
+    log = RouteChangeLog(tmp_path / "changes.csv")
+    log.update(tmp_path)
+    return log
+
+
+DAYS = {
+    "2025-06-01": {("A", "B"), ("B", "A")},
+    "2025-06-02": {("A", "B"), ("A", "C")},
+    "2025-06-04": {("A", "C"), ("C", "A")},
+    "2025-06-05": {("A", "C"), ("C", "A")},
+}
+
+
+def test_replay_rebuilds_each_day(tmp_path):
+    log = logged(tmp_path, DAYS)
+    for date, routes in DAYS.items():
+        assert log.replay(date) == routes
+    # Days between snapshots keep the routes of the last collection day
+    assert log.replay("2025-06-03") == DAYS["2025-06-02"]
+    assert log.replay("2025-05-31") == set()
+
+
+def test_replay_after_reopening(tmp_path):
+    logged(tmp_path, DAYS)
+    assert RouteChangeLog(tmp_path / "changes.csv").replay() == DAYS["2025-06-05"]
+
+
+def test_changes_in_a_date_range(tmp_path):
+    log = logged(tmp_path, DAYS)
+    assert log.changes("2025-06-02", "2025-06-03") == [
+        RouteChange("2025-06-02", "A", "C", ADDED),
+        RouteChange("2025-06-02", "B", "A", REMOVED),
+    ]
+    assert [e.date for e in log.changes(until="2025-06-01")] == ["2025-06-01"] * 2
+    assert {e.date for e in log.changes(since="2025-06-03")} == {"2025-06-04"}
+    assert log.changes("2025-06-05", "2025-06-05") == []
+
+
+def test_churn_counts_both_ends_of_a_route(tmp_path):
+    log = logged(tmp_path, DAYS)
+    churn = log.churn("2025-06-02", "2025-06-04")
+    # 06-02: +A->C -B->A; 06-04: +C->A -A->B
+    assert churn["A"] == {ADDED: 2, REMOVED: 2}
+    assert churn["B"] == {REMOVED: 2}
+    assert churn["C"] == {ADDED: 2}
+    assert log.churn("2025-06-05") == {}
@@ -0,0 +1,64 @@
+import pytest
+
+from connections import ConnectionFinder
+
+DAYS = {
+    "2025-06-02": {("A", "B"), ("B", "C"), ("A", "C"), ("C", "A"), ("B", "A")},
+    "2025-06-03": {("A", "B"), ("B", "C"), ("C", "A")},
+    "2025-06-04": {("A", "B"), ("C", "D"), ("B", "D")},
+}
+
+
+@pytest.fixture
+def finder(make_index):
+    return ConnectionFinder(make_index(DAYS))
+
+
+def paths(found):
+    return [c.airports for c in found]
+
+
+def test_direct_and_one_stop(finder):
+    found = finder.find("A", "C")
+    assert set(paths(found)) == {("A", "C"), ("A", "B", "C")}
+    one_stop = next(c for c in found if c.stops == 1)
+    # A -> B and B -> C were both available on the first two days
+    assert one_stop.days == 2
+
+
+def test_legs_must_share_a_day(finder):
+    # A -> C (day 1) and C -> D (day 3) never line up
+    found = finder.find("A", "D", max_stops=1)
+    assert paths(found) == [("A", "B", "D")]
+
+
+def test_two_stops(finder):
+    found = finder.find("A", "D", max_stops=2)
+    assert ("A", "B", "C", "D") not in paths(found)  # B -> C and C -> D differ
+    assert ("A", "B", "D") in paths(found)
+
+
+def test_date_range_limits_feasible_days(finder):
+    assert paths(finder.find("A", "C", since="2025-06-03")) == [("A", "B", "C")]
+    assert finder.find("A", "C", since="2025-06-04") == []
+
+
+def test_ranked_by_reliability(finder):
+    found = finder.find("A", "C")
+    reliabilities = [c.reliability for c in found]
+    assert reliabilities == sorted(reliabilities, reverse=True)
+
+
+def test_limit(finder):
+    assert len(finder.find("A", "C", limit=1)) == 1
+    assert finder.find("A", "C", limit=0) == []
+
+
+def test_same_origin_and_destination_is_rejected(finder):
+    with pytest.raises(ValueError):
+        finder.find("A", "A")
+
+
+def test_negative_limit_is_rejected(finder):
+    with pytest.raises(ValueError):
+        finder.find("A", "C", limit=-1)
@@ -0,0 +1,69 @@
+import pytest
+
+from routeindex import IndexFormatError, RouteIndex
+
+DAYS = {
+    "2025-06-02": {("A", "B"), ("B", "A")},
+    "2025-06-03": {("A", "B")},
+    "2025-06-04": {("B", "A"), ("A", "C")},
+    "2025-06-09": {("A", "B"), ("A", "C")},
+}
+
+
+def test_write_and_open_round_trip(tmp_path, make_index):
+    index = make_index(DAYS, "v7")
+    path = tmp_path / "route-index.bin"
+    index.write(path)
+
+    opened = RouteIndex.open(path)
+    assert opened.version == "v7"
+    assert opened.airports == index.airports
+    assert opened.routes == index.routes
+    assert opened.dates == index.dates
+    assert list(opened.masks) == list(index.masks)
+    assert opened.destinations_on("A", "2025-06-04") == ["C"]
+
+
+def test_round_trip_of_more_days_than_a_byte(tmp_path, make_index):
+    days = {f"2025-06-{d:02}": {("A", "B")} for d in range(1, 20, 2)}
+    index = make_index(days)
+    index.write(tmp_path / "index.bin")
+    opened = RouteIndex.open(tmp_path / "index.bin")
+    assert list(opened.masks) == list(index.masks)
+    assert opened.days_available(0, opened.day_range_mask()) == len(days)
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "not-an-index.bin"
+    path.write_bytes(b"departure_from,departure_to\n")
+    with pytest.raises(IndexFormatError):
+        RouteIndex.open(path)
+
+
+def test_day_range_mask(make_index):
+    index = make_index(DAYS)
+    route = index.route("A", "B")
+    window = index.day_range_mask("2025-06-03", "2025-06-05")
+    assert index.available_dates(route, window) == ["2025-06-03"]
+    assert index.available_dates(route, index.day_range_mask()) == [
+        "2025-06-02",
+        "2025-06-03",
+        "2025-06-09",
+    ]
+    assert index.day_range_mask("2025-06-05", "2025-06-08") == 0
+
+
+def test_weekday_ratios(make_index):
+    ratios = {row["weekday"]: row for row in make_index(DAYS).weekday_ratios("A", "B")}
+    # 2025-06-02 and 2025-06-09 are Mondays
+    assert ratios["Monday"]["days_collected"] == 2
+    assert ratios["Monday"]["ratio"] == 1.0
+    assert ratios["Wednesday"]["ratio"] == 0.0
+    assert ratios["Sunday"]["days_collected"] == 0
+
+
+def test_runs_match_the_mask(make_index):
+    index = make_index(DAYS)
+    runs = index.runs(index.route("A", "B"))
+    assert (runs.starts, runs.ends) == ([0, 3], [1, 3])
+    assert runs.last_seen(2) == 1
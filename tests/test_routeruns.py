@@ -0,0 +1,67 @@
+import pytest
+
+from routeruns import RouteRuns, RunBuilder
+
+
+def build(days: dict[int, list[int]], n_routes: int = 2) -> RunBuilder:
+    builder = RunBuilder(n_routes)
+    for day in sorted(days):
+        builder.add_day(day, days[day])
+    return builder
+
+
+def test_builder_joins_consecutive_days():
+    builder = build({0: [0], 1: [0, 1], 2: [0], 4: [0, 1], 5: [1]})
+    assert builder.flat(0) == [0, 2, 4, 4]
+    assert builder.flat(1) == [1, 1, 4, 5]
+
+
+def test_builder_ignores_repeated_days():
+    builder = RunBuilder(1)
+    builder.add_day(3, [0, 0])
+    builder.add_day(3, [0])
+    assert builder.flat(0) == [3, 3]
+
+
+def test_flat_round_trip():
+    runs = RouteRuns.from_flat(build({0: [0], 1: [0], 3: [0]}).flat(0))
+    assert (runs.starts, runs.ends) == ([0, 3], [1, 3])
+    assert len(runs) == 2
+    assert runs.days_available == 3
+
+
+# Available on days 2-4, 7 and 10-12
+RUNS = RouteRuns([2, 7, 10], [4, 7, 12])
+
+
+@pytest.mark.parametrize(
+    ("first", "last", "days"),
+    [(0, 20, 7), (3, 10, 4), (5, 6, 0), (7, 7, 1), (11, 30, 2), (4, 2, 0)],
+)
+def test_days_in(first, last, days):
+    assert RUNS.days_in(first, last) == days
+    assert RUNS.days_in(first, last) == sum(
+        RUNS.is_available(day) for day in range(first, last + 1)
+    )
+
+
+def test_last_seen():
+    assert RUNS.last_seen() == 12
+    assert RUNS.last_seen(1) is None
+    assert RUNS.last_seen(3) == 3
+    assert RUNS.last_seen(9) == 7
+    assert RouteRuns([], []).last_seen() is None
+
+
+def test_streaks_and_gaps():
+    assert RUNS.current_streak(11) == 2
+    assert RUNS.current_streak(8) == 0
+    assert RUNS.current_streak(1) == 0
+    assert RUNS.longest_streak() == 3
+    assert RUNS.longest_gap() == 2
+    assert RouteRuns([5], [9]).longest_gap() == 0
+
+
+def test_ratio():
+    assert RUNS.ratio(2, 5) == 0.75
+    assert RUNS.ratio(5, 2) == 0.0
@@ -0,0 +1,92 @@
+import csv
+import http.client
+import json
+import threading
+
+import pytest
+
+from serve import IndexHolder, make_server
+
+
+def write_snapshot(data_dir, name, routes):
+    with (data_dir / name).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["departure_from", "departure_to"])
+        writer.writerows(sorted(routes))
+
+
+@pytest.fixture
+def server(tmp_path):
+    write_snapshot(tmp_path, "2025-06-02T07_00_00.csv", {("A", "B"), ("B", "C")})
+    write_snapshot(tmp_path, "2025-06-03T07_00_00.csv", {("A", "B")})
+    holder = IndexHolder(tmp_path)
+    httpd = make_server("127.0.0.1", 0, holder)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, holder, tmp_path
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(httpd, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", httpd.server_port)
+    try:
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, response.getheader("ETag"), body
+    finally:
+        conn.close()
+
+
+def test_etag_is_the_data_version(server):
+    httpd, holder, _ = server
+    status, etag, body = get(httpd, "/version")
+    assert status == 200
+    assert etag == f'"{holder.current.version}"'
+    assert json.loads(body)["days"] == 2
+
+
+def test_matching_if_none_match_is_not_modified(server):
+    httpd, _, _ = server
+    _, etag, _ = get(httpd, "/airports")
+    status, etag_304, body = get(httpd, "/airports", {"If-None-Match": etag})
+    assert status == 304
+    assert etag_304 == etag
+    assert body == b""
+
+
+def test_new_data_changes_the_etag(server):
+    httpd, holder, data_dir = server
+    _, old_etag, _ = get(httpd, "/airports")
+    write_snapshot(data_dir, "2025-06-04T07_00_00.csv", {("C", "A")})
+    assert holder.reload_if_changed()
+
+    status, etag, _ = get(httpd, "/airports", {"If-None-Match": old_etag})
+    assert status == 200
+    assert etag != old_etag
+
+
+def test_errors_carry_no_etag(server):
+    httpd, _, _ = server
+    status, etag, body = get(httpd, "/destinations?from=X&date=2025-06-02")
+    assert status == 404
+    assert etag is None
+    assert "unknown airport" in json.loads(body)["error"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["from=A&to=A", "from=A&to=B&limit=-1", "from=A&to=B&max_stops=3"],
+)
+def test_bad_connection_queries(server, query):
+    httpd, _, _ = server
+    status, _, _ = get(httpd, f"/connections?{query}")
+    assert status == 400
+
+
+def test_connections(server):
+    httpd, _, _ = server
+    status, _, body = get(httpd, "/connections?from=A&to=C")
+    assert status == 200
+    assert [c["airports"] for c in json.loads(body)["connections"]] == [["A", "B", "C"]]
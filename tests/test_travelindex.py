@@ -0,0 +1,104 @@
+import csv
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from travelindex import TravelDateIndex, Window
+
+
+def day(iso: str) -> int:
+    return date.fromisoformat(iso).toordinal()
+
+
+def window(start: str, end: str, route=("A", "B"), collected="2025-06-01"):
+    return Window(day(start), day(end), route, collected)
+
+
+def test_window_ends_are_inclusive():
+    index = TravelDateIndex([window("2025-06-02", "2025-06-04")])
+    assert index.snapshot_count("A", "B", "2025-06-01") == 0
+    assert index.snapshot_count("A", "B", "2025-06-02") == 1
+    assert index.snapshot_count("A", "B", "2025-06-04") == 1
+    assert index.snapshot_count("A", "B", "2025-06-05") == 0
+    assert index.routes_on("2025-06-05") == {}
+
+
+def test_long_window_covers_days_after_later_starts():
+    index = TravelDateIndex(
+        [
+            window("2025-06-01", "2025-06-10"),
+            window("2025-06-08", "2025-06-08", ("B", "A")),
+            window("2025-06-09", "2025-06-09", ("A", "C")),
+        ]
+    )
+    assert index.routes_on("2025-06-09") == {("A", "B"): 1, ("A", "C"): 1}
+    assert index.routes_on("2025-06-08", origin="B") == {("B", "A"): 1}
+
+
+def test_overlapping_windows_of_a_route_are_counted_per_snapshot():
+    index = TravelDateIndex(
+        [
+            window("2025-06-01", "2025-06-03", collected="2025-06-01"),
+            window("2025-06-02", "2025-06-04", collected="2025-06-02"),
+            window("2025-06-03", "2025-06-03", collected="2025-06-03"),
+        ]
+    )
+    assert [index.snapshot_count("A", "B", f"2025-06-0{d}") for d in range(1, 6)] == [
+        1,
+        2,
+        3,
+        1,
+        0,
+    ]
+    assert index.snapshot_count("A", "C", "2025-06-02") == 0
+
+
+def test_matches_a_scan_of_every_window():
+    rng = random.Random(7)
+    first = date(2025, 6, 1)
+    windows = []
+    for _ in range(300):
+        start = first + timedelta(days=rng.randrange(30))
+        end = start + timedelta(days=rng.randrange(4))
+        route = (rng.choice("ABC"), rng.choice("DE"))
+        windows.append(window(start.isoformat(), end.isoformat(), route))
+    index = TravelDateIndex(windows)
+    for offset in range(-2, 36):
+        travel = (first + timedelta(days=offset)).isoformat()
+        expected = {}
+        for w in windows:
+            if w.start <= day(travel) <= w.end:
+                expected[w.route] = expected.get(w.route, 0) + 1
+        assert index.routes_on(travel) == expected
+        for route in {w.route for w in windows}:
+            assert index.snapshot_count(*route, travel) == expected.get(route, 0)
+
+
+def test_from_csv_dir(tmp_path):
+    with (tmp_path / "2025-06-01T07_00_00.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["departure_from", "departure_to", "availability_start", "availability_end"]
+        )
+        writer.writerow(["A", "B", "2025-06-01T07:00:00", "2025-06-03T23:59:59"])
+        writer.writerow(["A", "C", "not a date", "2025-06-03T23:59:59"])
+    # Files without the window columns or a dated name are skipped
+    (tmp_path / "2025-06-02T07_00_00.csv").write_text("departure_from,departure_to\n")
+    (tmp_path / "notes.csv").write_text("departure_from,departure_to\n")
+
+    index = TravelDateIndex.from_csv_dir(tmp_path)
+    assert [w.collection_date for w in index.windows] == ["2025-06-01"]
+    assert index.routes_on("2025-06-03") == {("A", "B"): 1}
+
+
+def test_empty_index():
+    index = TravelDateIndex([])
+    assert index.covering("2025-06-01") == []
+    assert index.snapshot_count("A", "B", "2025-06-01") == 0
+
+
+@pytest.mark.parametrize("travel", ["2025-6-1", "tomorrow"])
+def test_invalid_travel_date(travel):
+    with pytest.raises(ValueError):
+        TravelDateIndex([window("2025-06-01", "2025-06-01")]).covering(travel)
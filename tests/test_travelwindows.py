@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+from travelwindows import TravelWindows
+
+
+def records(*rows):
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "departure_from",
+            "departure_to",
+            "availability_start",
+            "availability_end",
+        ],
+    )
+
+
+def routes(frame: pd.DataFrame) -> list:
+    return list(frame.itertuples(index=False, name=None))
+
+
+def test_window_ends_are_inclusive():
+    windows = TravelWindows.from_frame(
+        records(("A", "B", "2025-06-02 07:00:01", "2025-06-04 23:59:59"))
+    )
+    counts = [windows.snapshot_count("A", "B", f"2025-06-0{d}") for d in range(1, 6)]
+    assert counts == [0, 1, 1, 1, 0]
+    assert windows.routes_on("2025-06-05").empty
+
+
+def test_routes_on_ranks_by_snapshots_then_route():
+    windows = TravelWindows.from_frame(
+        records(
+            ("B", "A", "2025-06-01", "2025-06-10"),
+            ("A", "C", "2025-06-08", "2025-06-09"),
+            ("A", "B", "2025-06-09", "2025-06-09"),
+            ("A", "C", "2025-06-09", "2025-06-11"),
+        )
+    )
+    assert routes(windows.routes_on("2025-06-09")) == [
+        ("A", "C", 2),
+        ("A", "B", 1),
+        ("B", "A", 1),
+    ]
+    assert routes(windows.routes_on("2025-06-09", hub="A", destination="B")) == [
+        ("A", "B", 1)
+    ]
+    assert routes(windows.routes_on("2025-06-09", destination="A")) == [("B", "A", 1)]
+    assert windows.routes_on("2025-06-09", hub="Unknown").empty
+
+
+def test_matches_a_scan_of_every_record():
+    rng = random.Random(11)
+    first = pd.Timestamp("2025-06-01")
+    rows = []
+    for _ in range(300):
+        start = first + pd.Timedelta(days=rng.randrange(30), hours=7)
+        end = start + pd.Timedelta(days=rng.randrange(4), hours=16)
+        rows.append((rng.choice("ABC"), rng.choice("DE"), start, end))
+    frame = records(*rows)
+    windows = TravelWindows.from_frame(frame)
+    for offset in range(-2, 36):
+        travel = (first + pd.Timedelta(days=offset)).date()
+        covering = frame[
+            (frame["availability_start"].dt.date <= travel)
+            & (frame["availability_end"].dt.date >= travel)
+        ]
+        expected = covering.groupby(["departure_from", "departure_to"]).size()
+        found = windows.routes_on(travel)
+        pairs = zip(found["departure_from"], found["departure_to"])
+        assert dict(zip(pairs, found["snapshots"])) == expected.to_dict()
+        assert np.all(np.diff(found["snapshots"].to_numpy()) <= 0)
+        for (origin, destination), count in expected.items():
+            assert windows.snapshot_count(origin, destination, travel) == count
+
+
+def test_incomplete_records_are_left_out():
+    windows = TravelWindows.from_frame(
+        records(
+            ("A", "B", "2025-06-01", None),
+            ("A", "C", "2025-06-01", "2025-06-01"),
+        )
+    )
+    assert len(windows) == 1
+    assert windows.snapshot_count("A", "B", "2025-06-01") == 0
+
+
+@pytest.mark.parametrize(
+    "frame", [pd.DataFrame(), pd.DataFrame({"departure_from": ["A"]})]
+)
+def test_empty_index(frame):
+    windows = TravelWindows.from_frame(frame)
+    assert len(windows) == 0
+    assert windows.routes_on("2025-06-01").empty
+    assert windows.snapshot_count("A", "B", "2025-06-01") == 0
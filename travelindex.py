@@ -0,0 +1,109 @@
+"""Index of travel dates covered by the snapshots' availability windows.
+
+Every CSV row advertises a route for travel between its availability_start and
+availability_end (a few days after the snapshot). The windows are stored as
+inclusive (start, end) day ordinals, sorted by start, both for the whole
+corpus and per route. Because windows are short, the ones covering a travel
+day T all start in [T - longest window + 1, T]: a binary search finds that
+slice. Per route, the number of windows covering T is
+#(start <= T) - #(end < T), two binary searches over sorted starts and ends.
+"""
+
+import bisect
+import csv
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from aggregate import parse_collection_date
+
+WINDOW_COLUMNS = (
+    "departure_from",
+    "departure_to",
+    "availability_start",
+    "availability_end",
+)
+
+
+def _day(timestamp: str) -> int:
+    return date.fromisoformat(timestamp[:10]).toordinal()
+
+
+@dataclass(frozen=True, slots=True)
+class Window:
+    start: int
+    end: int
+    route: tuple[str, str]
+    collection_date: str
+
+
+class TravelDateIndex:
+    def __init__(self, windows: list[Window]):
+        self.windows = sorted(windows, key=lambda w: (w.start, w.end))
+        self._starts = [w.start for w in self.windows]
+        self._max_length = max((w.end - w.start + 1 for w in self.windows), default=0)
+
+        starts: dict[tuple[str, str], list[int]] = defaultdict(list)
+        ends: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for w in self.windows:
+            starts[w.route].append(w.start)
+            ends[w.route].append(w.end)
+        self._route_starts = dict(starts)
+        self._route_ends = {route: sorted(e) for route, e in ends.items()}
+
+    @classmethod
+    def from_csv_dir(cls, data_dir: Path) -> "TravelDateIndex":
+        """Read the availability windows of every snapshot in `data_dir`;
+        files without the window columns or a dated name are skipped"""
+        windows = []
+        # One tuple per route, shared by all of its windows
+        routes: dict[tuple[str, str], tuple[str, str]] = {}
+        for path in sorted(Path(data_dir).glob("*.csv")):
+            collection_date = parse_collection_date(path.name)
+            if collection_date is None:
+                continue
+            with path.open(newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                if any(c not in (reader.fieldnames or ()) for c in WINDOW_COLUMNS):
+                    continue
+                for row in reader:
+                    try:
+                        start = _day(row["availability_start"])
+                        end = _day(row["availability_end"])
+                    except (TypeError, ValueError):
+                        continue
+                    route = (row["departure_from"].strip(), row["departure_to"].strip())
+                    route = routes.setdefault(route, route)
+                    windows.append(Window(start, end, route, collection_date))
+        return cls(windows)
+
+    def covering(self, travel_date: str) -> list[Window]:
+        """Windows that include `travel_date` (ISO date)"""
+        day = date.fromisoformat(travel_date).toordinal()
+        lo = bisect.bisect_left(self._starts, day - self._max_length + 1)
+        hi = bisect.bisect_right(self._starts, day)
+        return [w for w in self.windows[lo:hi] if w.end >= day]
+
+    def routes_on(
+        self, travel_date: str, origin: str | None = None
+    ) -> dict[tuple[str, str], int]:
+        """Routes advertised for travel on `travel_date` (optionally only those
+        departing from `origin`), with the number of snapshots advertising each"""
+        result: dict[tuple[str, str], int] = defaultdict(int)
+        for w in self.covering(travel_date):
+            if origin is None or w.route[0] == origin:
+                result[w.route] += 1
+        return dict(result)
+
+    def snapshot_count(self, origin: str, destination: str, travel_date: str) -> int:
+        """Number of snapshots that advertised origin -> destination for travel
+        on `travel_date`"""
+        route = (origin, destination)
+        starts = self._route_starts.get(route)
+        if not starts:
+            return 0
+        day = date.fromisoformat(travel_date).toordinal()
+        return bisect.bisect_right(starts, day) - bisect.bisect_left(
+            self._route_ends[route], day
+        )